@@ -0,0 +1,217 @@
+import math
+import os
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+
+# operasi yang punya implementasi referensi (Python murni) dan cepat
+OPERATIONS = (
+    "apply_kernel",          # (px_img, w, h, kernel, padding) -> Image
+    "filter_batas",          # (px_img, w, h, padding) -> Image
+    "filter_batas_min",
+    "filter_batas_max",
+    "filter_mean",
+    "filter_median",
+    "sobel_edge_detection",  # (img_gray) -> Image
+    "threshold_image",       # (img_gray, threshold) -> Image
+    "connected_components",  # (binary_img) -> (labels 2D list, count)
+)
+
+_LOADERS = {}
+_cache = {}
+_active = os.environ.get("PCD_BACKEND", "fast")
+
+
+def register_backend(name, loader):
+    """Register a backend: loader() returns {operation: function} for
+    every name in OPERATIONS, with the signatures listed there."""
+    _LOADERS[name] = loader
+    _cache.pop(name, None)
+
+
+def available_backends():
+    return tuple(_LOADERS)
+
+
+def set_backend(name):
+    """Select the backend used by get_function() without a name."""
+    global _active
+    if name not in _LOADERS:
+        raise ValueError(f"Backend tidak dikenal: {name!r} "
+                         f"(pilihan: {', '.join(_LOADERS)})")
+    _active = name
+
+
+def active_backend():
+    return _active
+
+
+@contextmanager
+def use_backend(name):
+    """Temporarily switch the active backend."""
+    previous = _active
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def backend(name=None):
+    """Dict {operation: function} of a backend (loaded once)."""
+    name = name or _active
+    if name not in _cache:
+        if name not in _LOADERS:
+            raise ValueError(f"Backend tidak dikenal: {name!r}")
+        functions = _LOADERS[name]()
+        missing = [op for op in OPERATIONS if op not in functions]
+        if missing:
+            raise ValueError(f"Backend {name!r} tidak punya: "
+                             f"{', '.join(missing)}")
+        _cache[name] = functions
+    return _cache[name]
+
+
+def get_function(op, name=None):
+    return backend(name)[op]
+
+
+def _reference():
+    """The original per-pixel implementations, kept as the ground truth
+    every faster engine must reproduce bit for bit."""
+    import main
+    import count_rice
+    from kernel_registry import get_kernel
+
+    def apply_kernel(px_img, w, h, kernel, padding="zero"):
+        # versi loop asli dari main, sebelum memakai kernel_registry;
+        # jangkauan tap -offset .. k_size-1-offset agar kernel genap
+        # (2x2) juga terdefinisi, sama dengan anchor registry
+        if isinstance(kernel, str):
+            kernel = get_kernel(kernel).coeffs.tolist()
+        try:
+            is_color = isinstance(px_img[0, 0], tuple)
+        except Exception:
+            is_color = False
+
+        k_size = len(kernel)
+        offset = k_size // 2
+        k_sum = sum(sum(row) for row in kernel)
+
+        out_img = Image.new("RGB" if is_color else "L", (w, h))
+        out_px = out_img.load()
+        for y in range(h):
+            for x in range(w):
+                total_r = 0.0
+                total_g = 0.0
+                total_b = 0.0
+
+                for i in range(-offset, k_size - offset):
+                    for j in range(-offset, k_size - offset):
+                        pv = main.get_pixel(px_img, w, h, x + j, y + i,
+                                            padding)
+                        kval = kernel[i + offset][j + offset]
+                        if isinstance(pv, tuple):
+                            total_r += kval * pv[0]
+                            total_g += kval * pv[1]
+                            total_b += kval * pv[2]
+                        else:
+                            total_r += kval * pv
+                            total_g += kval * pv
+                            total_b += kval * pv
+
+                # Normalisasi jika kernel sum > 0 (untuk mean/gaussian)
+                if k_sum > 0:
+                    total_r /= k_sum
+                    total_g /= k_sum
+                    total_b /= k_sum
+
+                r = max(0, min(255, int(total_r)))
+                if is_color:
+                    g = max(0, min(255, int(total_g)))
+                    b = max(0, min(255, int(total_b)))
+                    out_px[x, y] = (r, g, b)
+                else:
+                    out_px[x, y] = r
+        return out_img
+
+    def sobel_edge_detection(img_gray):
+        # versi loop asli dari count_rice, sebelum divektorisasi
+        px = img_gray.load()
+        w, h = img_gray.size
+        kernels = count_rice.kernel_sobel
+        img_gx = apply_kernel(px, w, h, kernels["sobel_h"],
+                              padding="replicate")
+        img_gy = apply_kernel(px, w, h, kernels["sobel_v"],
+                              padding="replicate")
+        px_h = img_gx.load()
+        px_v = img_gy.load()
+        result = Image.new("L", (w, h))
+        px_res = result.load()
+        for x in range(w):
+            for y in range(h):
+                gx = px_h[x, y]
+                gy = px_v[x, y]
+                magnitude = math.sqrt(gx**2 + gy**2)
+                px_res[x, y] = int(min(255, magnitude))
+        return result
+
+    return {
+        "apply_kernel": apply_kernel,
+        "filter_batas": main.filter_batas,
+        "filter_batas_min": main.filter_batas_min,
+        "filter_batas_max": main.filter_batas_max,
+        "filter_mean": main.filter_mean,
+        "filter_median": main.filter_median,
+        "sobel_edge_detection": sobel_edge_detection,
+        "threshold_image": count_rice.threshold_image,
+        "connected_components": count_rice.connected_components,
+    }
+
+
+def _fast():
+    """numpy engines: kernel_registry, batch_filters and run labeling."""
+    from image_array import to_array, to_image
+    from kernel_registry import convolve
+    from batch_filters import rank_filter
+    from histogram import auto_threshold
+    from rle import label_runs
+    import count_rice
+
+    def apply_kernel(px_img, w, h, kernel, padding="zero"):
+        return convolve(px_img, kernel, padding, w, h)
+
+    def rank(op):
+        def run(px_img, w, h, padding="zero"):
+            # filter 4-tetangga membuang tetangga di luar gambar; padding
+            # tidak berpengaruh, sama seperti versi referensi
+            return rank_filter(to_array(px_img, w, h), op)
+        return run
+
+    def threshold_image(img_gray, threshold=50):
+        if isinstance(threshold, str):
+            threshold = auto_threshold(img_gray, threshold)
+        arr = to_array(img_gray)
+        return to_image(np.where(arr > threshold, 255, 0).astype(np.uint8))
+
+    def connected_components(binary_img):
+        runs, count = label_runs(binary_img)
+        return runs.to_dense().tolist(), count
+
+    return {
+        "apply_kernel": apply_kernel,
+        "filter_batas": rank("batas"),
+        "filter_batas_min": rank("min"),
+        "filter_batas_max": rank("max"),
+        "filter_mean": rank("mean"),
+        "filter_median": rank("median"),
+        "sobel_edge_detection": count_rice.sobel_edge_detection,
+        "threshold_image": threshold_image,
+        "connected_components": connected_components,
+    }
+
+
+register_backend("reference", _reference)
+register_backend("fast", _fast)
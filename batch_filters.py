@@ -0,0 +1,165 @@
+import numpy as np
+
+from image_array import to_array, to_image, pad_array
+from kernel_registry import (
+    get_kernel, kernel_padding, correlate_padded, finish_array)
+
+
+# anggaran memori kerja per potongan; kira-kira sebesar cache L2/L3
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+RANK_OPS = ("min", "max", "median", "mean", "batas")
+
+
+def stack_images(images):
+    """Stack same-size images into one N x H x W (x 3) uint8 array.
+
+    Accepts PIL images or arrays; every image must have the same size
+    and mode.
+    """
+    arrays = [to_array(img) for img in images]
+    if not arrays:
+        raise ValueError("Tidak ada gambar untuk ditumpuk")
+    shape = arrays[0].shape
+    for i, arr in enumerate(arrays):
+        if arr.shape != shape:
+            raise ValueError(
+                f"Gambar ke-{i} berukuran {arr.shape}, harus {shape}")
+    return np.stack(arrays)
+
+
+def unstack_images(stack):
+    """Split an N x H x W (x 3) stack back into PIL images."""
+    return [to_image(arr) for arr in stack]
+
+
+def _chunks(n_images, rows, bytes_per_row, chunk_bytes):
+    """Yield (i0, i1, y0, y1): groups of whole images when they fit the
+    budget, otherwise bands of rows of a single image."""
+    per_image = rows * bytes_per_row
+    if per_image <= chunk_bytes:
+        step = max(1, chunk_bytes // max(per_image, 1))
+        for i in range(0, n_images, step):
+            yield i, min(i + step, n_images), 0, rows
+        return
+    band = max(1, chunk_bytes // max(bytes_per_row, 1))
+    for i in range(n_images):
+        for y in range(0, rows, band):
+            yield i, i + 1, y, min(y + band, rows)
+
+
+def apply_kernel_batch(stack, kernel, padding="zero",
+                       chunk_bytes=DEFAULT_CHUNK_BYTES, out=None):
+    """Apply a list_kernels filter to every image of a stack in one call.
+
+    stack is N x H x W or N x H x W x C uint8. The work is split into
+    chunks of whole images (or row bands of one large image) whose
+    int64 working set fits chunk_bytes. Results equal apply_kernel on
+    each image. Returns an array of the stack's shape (written into out
+    when given).
+    """
+    stack = np.asarray(stack)
+    ck = get_kernel(kernel)
+    n, h, w = stack.shape[:3]
+    if out is None:
+        out = np.empty(stack.shape, dtype=np.uint8)
+    pad = kernel_padding(ck)
+    channels = int(np.prod(stack.shape[3:], dtype=np.int64))
+    # padded input + dua akumulator (separable) dalam int64/float64
+    bytes_per_row = 3 * 8 * (w + 2 * pad) * channels
+
+    banded = (None, None)
+    for i0, i1, y0, y1 in _chunks(n, h, bytes_per_row, chunk_bytes):
+        # sumbu spasial di depan, sumbu gambar dibawa sebagai kanal
+        group = np.moveaxis(stack[i0:i1], 0, -1)
+        if y0 == 0 and y1 == h:
+            padded = pad_array(group.astype(ck.coeffs.dtype), pad, pad,
+                               padding)
+        else:
+            # pita baris: padding (uint8) dihitung sekali dari gambar utuh
+            # agar mode reflect/wrap tetap benar di perbatasan pita
+            if banded[0] != i0:
+                banded = (i0, pad_array(group, pad, pad, padding))
+            padded = banded[1][y0:y1 + 2 * pad].astype(ck.coeffs.dtype)
+        total = correlate_padded(padded, ck, y1 - y0, w)
+        out[i0:i1, y0:y1] = np.moveaxis(finish_array(total, ck), -1, 0)
+    return out
+
+
+def _neighbor_stack(stack, fill):
+    """4-neighbour values (up, down, left, right) as a trailing axis of
+    size 4, with fill where the neighbour falls outside the image."""
+    a = stack.astype(np.int16)
+    nb = np.full(a.shape + (4,), fill, dtype=np.int16)
+    nb[:, 1:, :, ..., 0] = a[:, :-1]
+    nb[:, :-1, :, ..., 1] = a[:, 1:]
+    nb[:, :, 1:, ..., 2] = a[:, :, :-1]
+    nb[:, :, :-1, ..., 3] = a[:, :, 1:]
+    return a, nb
+
+
+def _neighbor_count(stack):
+    """Number of in-bounds 4-neighbours per pixel, broadcastable to stack."""
+    h, w = stack.shape[1:3]
+    ys = np.arange(h)[:, None]
+    xs = np.arange(w)[None, :]
+    count = ((ys > 0).astype(np.int16) + (ys < h - 1) + (xs > 0) +
+             (xs < w - 1))
+    return count.reshape((1, h, w) + (1,) * (stack.ndim - 3))
+
+
+def _rank_chunk(chunk, op):
+    if op == "min":
+        a, nb = _neighbor_stack(chunk, 256)
+        return np.minimum(nb.min(axis=-1), a)
+    if op == "max":
+        a, nb = _neighbor_stack(chunk, -1)
+        return np.maximum(nb.max(axis=-1), a)
+
+    count = _neighbor_count(chunk)
+    if op == "batas":
+        a, nb_lo = _neighbor_stack(chunk, 256)
+        _, nb_hi = _neighbor_stack(chunk, -1)
+        res = np.clip(a, nb_lo.min(axis=-1), nb_hi.max(axis=-1))
+    elif op == "mean":
+        a, nb = _neighbor_stack(chunk, 0)
+        res = nb.sum(axis=-1) // np.maximum(count, 1)
+    else:
+        # median: tetangga di luar gambar diurutkan ke belakang
+        a, nb = _neighbor_stack(chunk, 32767)
+        nb.sort(axis=-1)
+        idx = np.broadcast_to(count // 2, a.shape)[..., None]
+        res = np.take_along_axis(nb, idx.astype(np.intp), axis=-1)[..., 0]
+    # pixel tanpa tetangga (gambar 1x1) dibiarkan apa adanya
+    return np.where(count == 0, a, res)
+
+
+def rank_filter_batch(stack, op="median", chunk_bytes=DEFAULT_CHUNK_BYTES,
+                      out=None):
+    """4-neighbour rank filters of main.py over a whole stack.
+
+    op is "min", "max", "median", "mean" or "batas" and matches
+    filter_batas_min, filter_batas_max, filter_median, filter_mean and
+    filter_batas exactly (out-of-bounds neighbours are dropped, so no
+    padding applies). Stacks are processed in cache-sized groups of
+    images.
+    """
+    if op not in RANK_OPS:
+        raise ValueError(f"Operasi rank tidak dikenal: {op!r} "
+                         f"(pilihan: {', '.join(RANK_OPS)})")
+    stack = np.asarray(stack)
+    n, h, w = stack.shape[:3]
+    if out is None:
+        out = np.empty(stack.shape, dtype=np.uint8)
+    channels = int(np.prod(stack.shape[3:], dtype=np.int64))
+    # int16 x (pusat + 4 tetangga) x 2 salinan sementara
+    per_image = h * w * channels * 2 * 10
+    step = max(1, chunk_bytes // max(per_image, 1))
+    for i in range(0, n, step):
+        out[i:i + step] = _rank_chunk(stack[i:i + step], op)
+    return out
+
+
+def rank_filter(img, op="median"):
+    """Single-image rank filter through the batch engine (PIL in/out)."""
+    return to_image(rank_filter_batch(to_array(img)[None], op)[0])
@@ -0,0 +1,346 @@
+import argparse
+import glob
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from count_rice import load_image, detect_rice_grains
+from kernel_registry import convolve, KERNELS
+from render import render_overlay
+from buffer_pool import default_pool
+from results_store import ResultsStore
+
+
+_DONE = object()
+
+
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0        # detik kerja, dijumlah semua worker
+        self.blocked = 0.0     # detik menunggu antrean keluaran yang penuh
+        self._lock = threading.Lock()
+
+    def record(self, busy, blocked, error=False):
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+            if error:
+                self.errors += 1
+
+    def summary(self, wall):
+        """Dict of items, items/s over the wall time, busy share per worker."""
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "items_per_s": self.items / wall if wall > 0 else 0.0,
+            "ms_per_item": 1000 * self.busy / self.items if self.items
+            else 0.0,
+            "utilization": self.busy / (wall * self.workers) if wall > 0
+            else 0.0,
+            "blocked_s": self.blocked,
+        }
+
+
+class PipelinedExecutor:
+    """Three-stage decode -> compute -> encode pipeline.
+
+    Stages run in their own worker threads and are connected by bounded
+    queues, so decoding the next images and encoding finished results
+    overlap with computation. A full queue blocks the stage before it
+    (back-pressure) instead of buffering the whole batch in memory.
+
+    decode_fn(path) -> item, compute_fn(item) -> result and
+    write_fn(path, result) -> output are plain callables. With
+    use_processes=True, compute_fn runs in a process pool (it and its
+    arguments must then be picklable) so CPU-bound pure-Python stages are
+    not serialised by the GIL.
+    """
+
+    def __init__(self, decode_workers=2, compute_workers=1, write_workers=2,
+                 prefetch=4, queue_size=4, use_processes=False):
+        self.decode_workers = decode_workers
+        self.compute_workers = compute_workers
+        self.write_workers = write_workers
+        self.prefetch = prefetch
+        self.queue_size = queue_size
+        self.use_processes = use_processes
+        self.stats = {}
+        self.wall = 0.0
+
+    def _stage(self, name, fn, inbox, outbox, stats, n_workers, pass_path):
+        def worker():
+            while True:
+                job = inbox.get()
+                if job is _DONE:
+                    break
+                index, path, payload = job
+                start = time.perf_counter()
+                error = None
+                if isinstance(payload, BaseException):
+                    result = payload
+                else:
+                    try:
+                        result = fn(path, payload) if pass_path \
+                            else fn(payload)
+                    except Exception as e:
+                        result = e
+                        error = e
+                busy = time.perf_counter() - start
+                start = time.perf_counter()
+                outbox.put((index, path, result))
+                stats.record(busy, time.perf_counter() - start,
+                             error is not None)
+
+        threads = [threading.Thread(target=worker, name=f"{name}-{i}",
+                                    daemon=True)
+                   for i in range(n_workers)]
+        for t in threads:
+            t.start()
+        return threads
+
+    def run(self, paths, decode_fn, compute_fn, write_fn):
+        """Process every path; returns a list of (path, output) in input
+        order, where output is the exception for a failed item."""
+        paths = list(paths)
+        q_paths = queue.Queue()
+        q_decoded = queue.Queue(maxsize=self.prefetch)
+        q_computed = queue.Queue(maxsize=self.queue_size)
+        q_written = queue.Queue()
+
+        self.stats = {
+            "decode": StageStats("decode", self.decode_workers),
+            "compute": StageStats("compute", self.compute_workers),
+            "write": StageStats("write", self.write_workers),
+        }
+
+        process_pool = None
+        if self.use_processes:
+            process_pool = ProcessPoolExecutor(self.compute_workers)
+
+        def compute(item):
+            if process_pool is None:
+                return compute_fn(item)
+            return process_pool.submit(compute_fn, item).result()
+
+        start = time.perf_counter()
+        decoders = self._stage("decode", lambda p, _: decode_fn(p), q_paths,
+                               q_decoded, self.stats["decode"],
+                               self.decode_workers, pass_path=True)
+        computers = self._stage("compute", compute, q_decoded, q_computed,
+                                self.stats["compute"], self.compute_workers,
+                                pass_path=False)
+        writers = self._stage("write", write_fn, q_computed, q_written,
+                              self.stats["write"], self.write_workers,
+                              pass_path=True)
+
+        for index, path in enumerate(paths):
+            q_paths.put((index, path, None))
+
+        # tutup tiap tahap setelah tahap sebelumnya selesai
+        for stage_threads, inbox in ((decoders, q_paths),
+                                     (computers, q_decoded),
+                                     (writers, q_computed)):
+            for _ in stage_threads:
+                inbox.put(_DONE)
+            for t in stage_threads:
+                t.join()
+
+        if process_pool is not None:
+            process_pool.shutdown()
+        self.wall = time.perf_counter() - start
+
+        outputs = [None] * len(paths)
+        while not q_written.empty():
+            index, path, result = q_written.get()
+            outputs[index] = (path, result)
+        return outputs
+
+    def report(self):
+        """Print per-stage throughput; the busiest stage is the bottleneck."""
+        print(f"\nWaktu total: {self.wall:.2f} s")
+        print(f"{'Tahap':<8} {'worker':>6} {'item':>5} {'item/s':>8} "
+              f"{'ms/item':>8} {'util':>6} {'blok(s)':>8}")
+        rows = [s.summary(self.wall) for s in self.stats.values()]
+        for r in rows:
+            print(f"{r['stage']:<8} {r['workers']:>6} {r['items']:>5} "
+                  f"{r['items_per_s']:>8.2f} {r['ms_per_item']:>8.1f} "
+                  f"{r['utilization']:>6.0%} {r['blocked_s']:>8.2f}")
+        if rows:
+            slowest = max(rows, key=lambda r: r["utilization"])
+            print(f"Bottleneck: tahap '{slowest['stage']}'")
+        return rows
+
+
+def decode_image(path, scale=1):
+    """Decode stage: (grayscale, color) images of one file, decoded once
+    (optionally at 1/2, 1/4 or 1/8 size for JPEG)."""
+    return load_image(path, scale)
+
+
+def count_task(item, threshold=25, min_area=800, max_area=9000, **kwargs):
+    """Compute stage for counting: returns count, props and overlay image."""
+    img_gray, img_color = item
+    result = detect_rice_grains(img_gray, threshold, min_area, max_area,
+                                verbose=False, **kwargs)
+    overlay = render_overlay(img_color, None,
+                             boxes=result["runs"].bboxes())
+    default_pool.release_image(result["edges"])
+    default_pool.release_image(result["binary"])
+    return {"count": result["count"], "props": result["props"],
+            "runs": result["runs"], "size": img_gray.size, "image": overlay}
+
+
+class CountTask:
+    """Compute stage for counting with fixed parameters (picklable).
+    solidity: also compute grain solidity (needed for the results store)."""
+
+    def __init__(self, threshold, min_area, max_area, solidity=False):
+        self.threshold = threshold
+        self.min_area = min_area
+        self.max_area = max_area
+        self.solidity = solidity
+
+    def __call__(self, item):
+        return count_task(item, self.threshold, self.min_area, self.max_area,
+                          solidity=self.solidity)
+
+
+class FilterTask:
+    """Compute stage applying one registered kernel (picklable)."""
+
+    def __init__(self, kernel_name, padding="zero"):
+        self.kernel_name = kernel_name
+        self.padding = padding
+
+    def __call__(self, item):
+        _, img_color = item
+        return {"image": convolve(img_color, self.kernel_name, self.padding)}
+
+
+class ImageWriter:
+    """Write stage: encodes result["image"] into output_dir.
+    With save_runs, result["runs"] (label runs) is archived next to it as
+    a compact .rle file (see rle.RunLengthLabels.load). With a
+    results_store.ResultsStore, count results are also recorded under
+    run_id."""
+
+    def __init__(self, output_dir, suffix="_hasil", ext=".png",
+                 save_runs=False, store=None, run_id=None, lot=None):
+        self.output_dir = output_dir
+        self.suffix = suffix
+        self.ext = ext
+        self.save_runs = save_runs
+        self.store = store
+        self.run_id = run_id
+        self.lot = lot
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __call__(self, path, result):
+        name = os.path.splitext(os.path.basename(path))[0]
+        out_path = os.path.join(self.output_dir,
+                                name + self.suffix + self.ext)
+        result["image"].save(out_path)
+        written = {"output": out_path}
+        if self.save_runs and "runs" in result:
+            runs_path = os.path.join(self.output_dir, name + ".rle")
+            result["runs"].save(runs_path)
+            written["runs_output"] = runs_path
+        if self.store is not None and "count" in result:
+            self.store.add_image(self.run_id, path, result, self.lot,
+                                 out_path, save_runs=self.save_runs)
+        return {k: v for k, v in result.items()
+                if k not in ("image", "runs")} | written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Proses banyak gambar dengan pipeline "
+                    "decode/compute/encode paralel.")
+    parser.add_argument("inputs", nargs="+",
+                        help="file, folder, atau pola glob gambar")
+    parser.add_argument("--output", default="./images/output/batch")
+    parser.add_argument("--filter", dest="kernel", default=None,
+                        help="nama kernel list_kernels (default: hitung beras)")
+    parser.add_argument("--padding", default="zero")
+    parser.add_argument("--threshold", default="25")
+    parser.add_argument("--min-area", type=int, default=800)
+    parser.add_argument("--max-area", type=int, default=9000)
+    parser.add_argument("--decoders", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--prefetch", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=1, choices=(1, 2, 4, 8),
+                        help="decode JPEG langsung pada skala 1/n")
+    parser.add_argument("--processes", action="store_true",
+                        help="jalankan tahap compute di process pool")
+    parser.add_argument("--save-runs", action="store_true",
+                        help="simpan label butir sebagai file .rle")
+    parser.add_argument("--db", default=None,
+                        help="simpan hasil hitung ke database SQLite ini")
+    parser.add_argument("--lot", default=None,
+                        help="nama lot untuk hasil di database")
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        paths.extend(p for p in sorted(glob.glob(pattern))
+                     if os.path.isfile(p))
+    if not paths:
+        print("Tidak ada gambar yang ditemukan.")
+        return
+
+    if args.kernel:
+        if args.kernel not in KERNELS:
+            print(f"Kernel tidak terdaftar: {args.kernel}")
+            return
+        compute = FilterTask(args.kernel, args.padding)
+    else:
+        threshold = int(args.threshold) if args.threshold.isdigit() \
+            else args.threshold
+        compute = CountTask(threshold, args.min_area / args.scale ** 2,
+                            args.max_area / args.scale ** 2,
+                            solidity=bool(args.db))
+
+    store = run_id = None
+    if args.db and not args.kernel:
+        store = ResultsStore(args.db)
+        run_id = store.start_run(args.lot, vars(args))
+
+    executor = PipelinedExecutor(args.decoders, args.workers, args.writers,
+                                 prefetch=args.prefetch,
+                                 use_processes=args.processes)
+    outputs = executor.run(paths, partial(decode_image, scale=args.scale),
+                           compute,
+                           ImageWriter(args.output,
+                                       save_runs=args.save_runs,
+                                       store=store, run_id=run_id,
+                                       lot=args.lot))
+    if store is not None:
+        store.close()
+        print(f"Hasil tersimpan di database: {args.db}")
+    for path, out in outputs:
+        if isinstance(out, BaseException):
+            print(f"✗ {path}: {out}")
+        elif "count" in out:
+            print(f"✓ {path}: {out['count']} butir -> {out['output']}")
+        else:
+            print(f"✓ {path} -> {out['output']}")
+    executor.report()
+
+
+if __name__ == "__main__":
+    main()
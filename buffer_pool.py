@@ -0,0 +1,101 @@
+import threading
+
+from PIL import Image
+import numpy as np
+
+
+class BufferPool:
+    """Recycles same-shape PIL images and numpy arrays.
+
+    acquire_* returns a pooled buffer when one of the right shape is
+    free, otherwise allocates a new one; release_* hands it back. The
+    contents of a recycled buffer are NOT cleared.
+    """
+
+    def __init__(self, max_per_shape=4):
+        self.max_per_shape = max_per_shape
+        self._images = {}
+        self._arrays = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire_image(self, mode, size):
+        key = (mode, tuple(size))
+        with self._lock:
+            free = self._images.get(key)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return Image.new(mode, size)
+
+    def release_image(self, img):
+        key = (img.mode, img.size)
+        with self._lock:
+            free = self._images.setdefault(key, [])
+            if len(free) < self.max_per_shape and \
+                    all(f is not img for f in free):
+                free.append(img)
+
+    def acquire_array(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._arrays.get(key)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release_array(self, arr):
+        key = (arr.shape, arr.dtype.str)
+        with self._lock:
+            free = self._arrays.setdefault(key, [])
+            if len(free) < self.max_per_shape and \
+                    all(f is not arr for f in free):
+                free.append(arr)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._arrays.clear()
+
+
+default_pool = BufferPool()
+
+
+def output_image(out, mode, size):
+    """Return out after checking it matches mode/size, or a new image
+    when out is None."""
+    if out is None:
+        return Image.new(mode, size)
+    if out.mode != mode or out.size != tuple(size):
+        raise ValueError(
+            f"Buffer out tidak cocok: butuh {mode} {tuple(size)}, "
+            f"didapat {out.mode} {out.size}")
+    return out
+
+
+def check_not_source(out, src):
+    """Raise ValueError when out is the source image of a neighbourhood
+    filter: writing there would change pixels that are still to be read.
+
+    The check is by identity, so src must be the Image itself; a
+    PixelAccess does not expose its image and cannot be checked, which is
+    why the filters also accept the Image in place of image.load().
+    """
+    if out is not None and src is out:
+        raise ValueError("out tidak boleh gambar sumber: filter tetangga "
+                         "masih membaca pixel yang sudah ditimpa")
+
+
+def output_labels(out, w, h):
+    """Return a zeroed H x W nested list, reusing out when it fits."""
+    if out is None:
+        return [[0] * w for _ in range(h)]
+    if len(out) != h or any(len(row) != w for row in out):
+        raise ValueError(f"Buffer label out harus berukuran {h} x {w}")
+    for row in out:
+        row[:] = [0] * w
+    return out
@@ -0,0 +1,215 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from buffer_pool import BufferPool
+from count_rice import EDGE_METHODS, detect_rice_grains
+from image_loader import grayscale_array
+
+
+def read_frames(source, axis=0):
+    """Yield grayscale frames of a sequence as PIL 'L' images.
+
+    source is a folder, a glob pattern ("frames/*.png"), or one
+    multi-frame file (animated GIF / multi-page TIFF, read with
+    ImageSequence). Frames are transposed when the belt runs along x
+    (axis=1), so that motion is always along the rows.
+    """
+    if os.path.isdir(source):
+        source = os.path.join(source, "*")
+    if any(c in source for c in "*?["):
+        paths = sorted(p for p in glob.glob(source) if os.path.isfile(p))
+        if not paths:
+            raise FileNotFoundError(f"Tidak ada frame: {source}")
+        frames = (Image.open(p) for p in paths)
+    else:
+        frames = ImageSequence.Iterator(Image.open(source))
+    for frame in frames:
+        gray = Image.fromarray(grayscale_array(frame.convert("RGB")), "L")
+        yield gray.transpose(Image.TRANSPOSE) if axis == 1 else gray
+
+
+def row_profile(img_gray):
+    """Mean intensity of every row: a 1D signature of the frame along
+    the direction of motion."""
+    return np.asarray(img_gray, dtype=np.float64).mean(axis=1)
+
+
+def estimate_shift(prev_profile, profile, max_shift=None):
+    """Belt displacement in rows between two frames by 1D phase
+    correlation of their row profiles.
+
+    A positive result s means content moved down: row y of the previous
+    frame is row y + s of the current one. Profiles are zero-padded to
+    twice their length so the correlation does not wrap around.
+    """
+    n = len(profile)
+    window = np.hanning(n)
+    a = (prev_profile - prev_profile.mean()) * window
+    b = (profile - profile.mean()) * window
+    fa = np.fft.rfft(a, 2 * n)
+    fb = np.fft.rfft(b, 2 * n)
+    cross = fb * np.conj(fa)
+    cross /= np.maximum(np.abs(cross), 1e-12)
+    corr = np.fft.irfft(cross, 2 * n)
+    lags = np.concatenate([np.arange(n), np.arange(-n, 0)])
+    if max_shift is not None:
+        corr = np.where(np.abs(lags) <= max_shift, corr, -np.inf)
+    return int(lags[int(np.argmax(corr))])
+
+
+class ConveyorCounter:
+    """Running grain count over overlapping conveyor frames.
+
+    For each frame the belt shift is estimated, and only the newly
+    exposed strip plus a margin of already-seen rows (at least one grain
+    length, so a grain entering the frame is complete in some window) is
+    run through detect_rice_grains. Grains touching the entry edge of the
+    frame or the inner edge of the window are incomplete and skipped.
+    Counted grains are tracked by their centroid in belt coordinates
+    (row minus the accumulated shift), so a grain seen again in the
+    overlap is matched and not counted twice. Windows of equal size reuse
+    the same pooled buffers.
+    """
+
+    def __init__(self, threshold=25, min_area=800, max_area=9000,
+                 margin=120, match_radius=10.0, max_shift=None,
+                 edge_method="sobel", pool=None):
+        self.threshold = threshold
+        self.min_area = min_area
+        self.max_area = max_area
+        self.margin = margin
+        self.match_radius = match_radius
+        self.max_shift = max_shift
+        self.edge_method = edge_method
+        self.pool = pool or BufferPool()
+        self.total = 0
+        self.offset = 0           # geseran kumulatif sabuk (baris)
+        self.frames = 0
+        self.rows_processed = 0
+        self.rows_seen = 0
+        self._tracked = []        # (x, y sabuk) butir yang sudah dihitung
+        self._prev_profile = None
+
+    def _window(self, h, shift):
+        """Rows (y0, y1) of the frame to process, and the frame edge the
+        belt enters from ("top", "bottom" or None for the first frame)."""
+        if self._prev_profile is None:
+            return 0, h, None
+        if shift > 0:
+            return 0, min(h, shift + self.margin), "top"
+        return max(0, h + shift - self.margin), h, "bottom"
+
+    def _is_new(self, bx, by):
+        r2 = self.match_radius ** 2
+        for tx, ty in self._tracked:
+            if (tx - bx) ** 2 + (ty - by) ** 2 <= r2:
+                return False
+        return True
+
+    def process(self, frame):
+        """Count the new grains of one frame; returns a per-frame dict."""
+        w, h = frame.size
+        profile = row_profile(frame)
+        shift = 0
+        if self._prev_profile is not None:
+            shift = estimate_shift(self._prev_profile, profile,
+                                   self.max_shift or h - 1)
+            self.offset += shift
+        y0, y1, entry = self._window(h, shift)
+        self._prev_profile = profile
+        self.frames += 1
+        self.rows_seen += h
+
+        new = 0
+        if entry is None or shift != 0:
+            window = frame.crop((0, y0, w, y1))
+            result = detect_rice_grains(
+                window, self.threshold, self.min_area, self.max_area,
+                pool=self.pool, verbose=False, edge_method=self.edge_method)
+            self.pool.release_image(result["edges"])
+            self.pool.release_image(result["binary"])
+            self.rows_processed += y1 - y0
+
+            for p in result["props"]:
+                _, top, _, bottom = p["bbox"]
+                top += y0
+                bottom += y0
+                # butir terpotong: di tepi masuk/keluar frame atau di tepi
+                # dalam jendela (bagian lainnya ada di frame lain)
+                if top == 0 or bottom == h - 1:
+                    continue
+                if (entry == "top" and bottom == y1 - 1) or \
+                        (entry == "bottom" and top == y0):
+                    continue
+                cx, cy = p["centroid"]
+                belt = (cx, cy + y0 - self.offset)
+                if self._is_new(*belt):
+                    self._tracked.append(belt)
+                    new += 1
+            self.total += new
+
+        # lupakan butir yang sudah keluar dari frame
+        lo, hi = -self.offset - self.match_radius, \
+            h - self.offset + self.match_radius
+        self._tracked = [t for t in self._tracked if lo <= t[1] <= hi]
+        return {"frame": self.frames - 1, "shift": shift, "rows": y1 - y0
+                if (entry is None or shift != 0) else 0,
+                "new": new, "total": self.total}
+
+    def run(self, frames, verbose=True):
+        """Process an iterable of frames; returns the running total."""
+        for frame in frames:
+            info = self.process(frame)
+            if verbose:
+                print(f"Frame {info['frame']:>4}: geser {info['shift']:>4} "
+                      f"baris, proses {info['rows']:>4} baris, "
+                      f"+{info['new']} butir (total {info['total']})")
+        return self.total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Hitung butir beras di sabuk konveyor dari urutan "
+                    "frame tanpa menghitung ulang butir yang sama.")
+    parser.add_argument("source",
+                        help="folder/pola glob frame, atau GIF/TIFF "
+                             "multi-frame")
+    parser.add_argument("--axis", type=int, choices=(0, 1), default=0,
+                        help="0: sabuk bergerak vertikal, 1: horizontal")
+    parser.add_argument("--threshold", default="25")
+    parser.add_argument("--min-area", type=int, default=800)
+    parser.add_argument("--max-area", type=int, default=9000)
+    parser.add_argument("--margin", type=int, default=120,
+                        help="baris lama yang ikut diproses; minimal "
+                             "sepanjang satu butir")
+    parser.add_argument("--match-radius", type=float, default=10.0)
+    parser.add_argument("--edge", choices=EDGE_METHODS,
+                        default="sobel")
+    args = parser.parse_args()
+
+    threshold = int(args.threshold) if args.threshold.isdigit() \
+        else args.threshold
+    counter = ConveyorCounter(threshold, args.min_area, args.max_area,
+                              args.margin, args.match_radius,
+                              edge_method=args.edge)
+    start = time.perf_counter()
+    total = counter.run(read_frames(args.source, args.axis))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'='*50}")
+    print(f"TOTAL: {total} butir dari {counter.frames} frame")
+    if counter.rows_seen:
+        print(f"Baris diproses: {counter.rows_processed} dari "
+              f"{counter.rows_seen} "
+              f"({counter.rows_processed / counter.rows_seen:.0%}), "
+              f"{elapsed:.2f} s")
+    print(f"{'='*50}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,42 @@
 from PIL import Image
 import matplotlib.pyplot as plt
-import math
-from main import apply_kernel
-
-
-def rgb_to_grayscale(img_path: str) -> Image:
-    """Convert RGB image to grayscale using standard luminosity formula."""
-    img = Image.open(img_path)
+import numpy as np
+from main import filter_gaussian
+from buffer_pool import (
+    check_not_source, default_pool, output_image, output_labels)
+from image_array import to_array, to_image
+from image_loader import open_image, grayscale_array
+from kernel_registry import register_kernels, correlate_array
+from histogram import auto_threshold
+from watershed import split_touching_grains
+from canny import canny_edge_detection, fill_holes
+from rle import RunLengthLabels, label_runs
+from render import labels_to_color_array, render_overlay
+from pyramid import build_pyramid, scale_area, upscale_bbox
+from regionprops import fill_grains, region_properties
+from roi import roi_mask, mask_bbox, find_tray_roi
+
+
+EDGE_METHODS = ("sobel", "canny")
+
+
+def rgb_to_grayscale(img_path, out=None) -> Image:
+    """Convert RGB image to grayscale using standard luminosity formula.
+    img_path may also be an already opened PIL image.
+    out: optional preallocated 'L' image of the same size.
+    """
+    if isinstance(img_path, Image.Image):
+        img = img_path
+    else:
+        img = Image.open(img_path)
     px = img.load()
-    canvas = Image.new("L", (img.width, img.height))
+    canvas = output_image(out, "L", (img.width, img.height))
     px_new = canvas.load()
 
     for y in range(img.height):
         for x in range(img.width):
 
-            r, g, b = px[x, y]
+            r, g, b = px[x, y][:3]
             gray = int(0.299 * r + 0.587 * g + 0.114 * b)
             px_new[x, y] = gray
 
@@ -22,16 +44,17 @@ def rgb_to_grayscale(img_path: str) -> Image:
     return canvas
 
 
-def load_image(img_path):
-    """Load image and convert to grayscale if needed. Returns (grayscale, color) tuple."""
-    img = Image.open(img_path)
-    img_gray = img.copy()
-    img_color = img.copy()
-
-    # Use getpixel to check if image is RGB (tuple) or grayscale (int)
-    if isinstance(img.getpixel((0, 0)), tuple):
-        img_gray = rgb_to_grayscale(img_path)
+def load_image(img_path, scale=1, gray_only=False):
+    """Load image and convert to grayscale if needed. Returns (grayscale, color) tuple.
+    The file is decoded once. scale (1, 2, 4, 8) decodes JPEGs directly at
+    reduced size; gray_only decodes only the luma channel and returns
+    (grayscale, None).
+    """
+    if gray_only:
+        return open_image(img_path, scale, "L"), None
 
+    img_color = open_image(img_path, scale)
+    img_gray = Image.fromarray(grayscale_array(img_color), "L")
     return img_gray, img_color
 
 
@@ -45,41 +68,54 @@ kernel_sobel = {
         [1,  2,  1]
     ]
 }
+register_kernels(kernel_sobel)
 
 
-def sobel_edge_detection(img_gray):
-    """Apply Sobel edge detection to grayscale image."""
-    px = img_gray.load()
-    w, h = img_gray.size
-
-    img_gx = apply_kernel(
-        px, w, h, kernel_sobel["sobel_h"], padding="replicate")
-    img_gy = apply_kernel(
-        px, w, h, kernel_sobel['sobel_v'], padding="replicate"
-    )
-
-    px_h = img_gx.load()
-    px_v = img_gy.load()
-
-    result = Image.new("L", (w, h))
-    px_res = result.load()
-
-    for x in range(w):
-        for y in range(h):
-            gx = px_h[x, y]
-            gy = px_v[x, y]
-
-            magnitude = math.sqrt(gx**2 + gy**2)
-            px_res[x, y] = int(min(255, magnitude))
-
-    return result
+def sobel_edge_detection(img_gray, out=None, pool=None):
+    """Apply Sobel edge detection to grayscale image.
+    out: optional 'L' image to write into (not img_gray: ValueError).
+    The gradient, square and magnitude arrays are pooled buffers reused
+    with in-place numpy operations.
+    """
+    check_not_source(out, img_gray)
+    pool = pool or default_pool
+    arr = to_array(img_gray)
+    h, w = arr.shape[:2]
+    gx = pool.acquire_array((h, w), np.int64)
+    gy = pool.acquire_array((h, w), np.int64)
+    magnitude = pool.acquire_array((h, w), np.float64)
+    result = pool.acquire_array((h, w), np.uint8)
+
+    # sama dengan convolve: jumlah kernel (k_sum 0) dipotong ke 0-255
+    for grad, name in ((gx, "sobel_h"), (gy, "sobel_v")):
+        correlate_array(arr, name, "replicate", out=grad, pool=pool)
+        np.clip(grad, 0, 255, out=grad)
+        np.multiply(grad, grad, out=grad)
+    np.add(gx, gy, out=gx)
+    np.sqrt(gx, out=magnitude)
+    np.minimum(magnitude, 255, out=magnitude)
+    np.copyto(result, magnitude, casting="unsafe")
+
+    out = to_image(result, out=output_image(out, "L", (w, h)))
+    for buf in (gx, gy, magnitude, result):
+        pool.release_array(buf)
+    return out
 
 
-def threshold_image(img_gray, threshold=50):
-    """Return binary PIL 'L' image with 0/255 values."""
+def threshold_image(img_gray, threshold=50, out=None, verbose=False):
+    """Return binary PIL 'L' image with 0/255 values.
+    threshold is either a fixed level or an automatic method name from
+    histogram.auto_threshold ("otsu", "triangle", "percentile:<p>").
+    out: optional 'L' image to write into; out=img_gray thresholds in place.
+    verbose: print the level chosen by an automatic method.
+    """
+    if isinstance(threshold, str):
+        threshold = auto_threshold(img_gray, threshold)
+        if verbose:
+            print(f"Threshold otomatis: {threshold}")
     w, h = img_gray.size
     pixels = img_gray.load()
-    out = Image.new("L", (w, h))
+    out = output_image(out, "L", (w, h))
     out_px = out.load()
     for y in range(h):
         for x in range(w):
@@ -87,10 +123,11 @@ def threshold_image(img_gray, threshold=50):
     return out
 
 
-def connected_components(binary_img):
+def connected_components(binary_img, out=None):
     """Label connected components (4-connectivity) using union-find.
     Input: PIL 'L' binary image (0/255). Returns (labels, label_count) where labels is
     a 2D list of ints (H x W) with labels 0..n, and label_count is number of labels.
+    out: optional H x W nested list reused (and cleared) for the labels.
     """
     w, h = binary_img.size
     px = binary_img.load()
@@ -98,7 +135,7 @@ def connected_components(binary_img):
     # mask ke true/false
     mask = [[px[x, y] != 0 for x in range(w)] for y in range(h)]
 
-    labels = [[0 for _ in range(w)] for _ in range(h)]
+    labels = output_labels(out, w, h)
 
     parent = [0]
 
@@ -167,9 +204,10 @@ def connected_components(binary_img):
     return labels, next_label
 
 
-def filter_by_area(labels, min_area=50, max_area=5000):
+def filter_by_area(labels, min_area=50, max_area=5000, out=None):
     """Filter components by area; labels is 2D list; return remapped 2D list of
     sequential labels and count.
+    out: optional H x W nested list for the result; out=labels works in place.
     """
     h = len(labels)
     w = len(labels[0]) if h > 0 else 0
@@ -188,7 +226,10 @@ def filter_by_area(labels, min_area=50, max_area=5000):
                     cnt <= max_area}
     new_label_map = {}
     new_label = 0
-    filtered = [[0 for _ in range(w)] for _ in range(h)]
+    if out is None:
+        filtered = [[0 for _ in range(w)] for _ in range(h)]
+    else:
+        filtered = out
 
     for lab in sorted(valid_labels):
         new_label += 1
@@ -197,8 +238,7 @@ def filter_by_area(labels, min_area=50, max_area=5000):
     for y in range(h):
         for x in range(w):
             lab = labels[y][x]
-            if lab in new_label_map:
-                filtered[y][x] = new_label_map[lab]
+            filtered[y][x] = new_label_map.get(lab, 0)
 
     return filtered, new_label
 
@@ -207,51 +247,354 @@ def labels_to_color_image(labels):
     """Convert a 2D label list to an RGB PIL image (colors for each label).
     Label 0 -> black; label n -> color from simple palette.
     """
-    h = len(labels)
-    w = len(labels[0]) if h > 0 else 0
-    img = Image.new("RGB", (w, h))
-    px = img.load()
+    return Image.fromarray(labels_to_color_array(labels), "RGB")
 
-    def color_for_label(l):
-        if l == 0:
-            return (0, 0, 0)
-        r = (l * 97) % 256
-        g = (l * 57) % 256
-        b = (l * 37) % 256
-        return (r, g, b)
 
-    for y in range(h):
-        for x in range(w):
-            px[x, y] = color_for_label(labels[y][x])
-    return img
+def _refine_labels(img_gray, full_edges, threshold, box):
+    """Full-resolution labels of the inclusive box (x1, y1, x2, y2).
+
+    The Sobel magnitude is taken from full_edges when given, otherwise
+    computed on the crop grown by a 1 pixel halo, so every pixel of the
+    box has the same gradient as in a full-image pass.
+    """
+    x1, y1, x2, y2 = box
+    if full_edges is not None:
+        grad = full_edges[y1:y2 + 1, x1:x2 + 1]
+    else:
+        w, h = img_gray.size
+        hx1, hy1 = max(0, x1 - 1), max(0, y1 - 1)
+        hx2, hy2 = min(w - 1, x2 + 1), min(h - 1, y2 + 1)
+        grad = np.asarray(sobel_edge_detection(
+            img_gray.crop((hx1, hy1, hx2 + 1, hy2 + 1))))
+        grad = grad[y1 - hy1:y2 - hy1 + 1, x1 - hx1:x2 - hx1 + 1]
+    runs, _ = label_runs(grad > threshold)
+    return runs.to_dense()
+
+
+def detect_grains_pyramid(
+    img_gray,
+    level=1,
+    threshold=25,
+    min_area=500,
+    max_area=8000,
+    refine=True,
+    margin=None
+):
+    """Detect grains on a reduced pyramid level, then refine each grain at
+    full resolution inside its (grown) bounding box only.
+
+    The coarse pass only proposes candidates, at half the threshold since
+    box downsampling halves the contrast of one-pixel edges. Sobel edge
+    rings shrink by less than 4**level and neighbouring grains can merge
+    there, so only min_area (scaled by 4**level) is applied at that
+    level. Each candidate box is relabelled at full resolution and grown
+    until no component reaching the candidate touches its border; those
+    components are filtered with min_area/max_area exactly as in the
+    single-scale path, so the count matches it. A string threshold is
+    chosen per scale: on the coarse gradient for detection and on the
+    full-resolution gradient for refinement (one full-size Sobel pass,
+    reused by the crops).
+    With refine=False the coarse masks are simply upsampled and both area
+    limits are applied at the coarse level. Returns (labels, grains,
+    edges, binary) where labels is a full-size label array, grains a list
+    of dicts with label/area/bbox and edges/binary are the coarse
+    intermediate images.
+    Both passes use Sobel + threshold + connected components; Canny edges
+    and watershed splitting are not available in this mode.
+    """
+    w, h = img_gray.size
+    scale = 2 ** level
+    if margin is None:
+        margin = 2 * scale
+
+    small = build_pyramid(img_gray, level)[-1]
+    edges = sobel_edge_detection(small)
+    coarse_threshold = threshold
+    if isinstance(threshold, str):
+        coarse_threshold = auto_threshold(edges, threshold)
+    if refine:
+        # usulan kandidat longgar: perkecilan box membagi dua kontras
+        # tepi/garis setebal satu pixel
+        coarse_threshold = coarse_threshold // 2
+    binary = threshold_image(edges, coarse_threshold)
+    coarse_runs, _ = label_runs(binary)
+    coarse_runs, _ = coarse_runs.filter_by_area(
+        scale_area(min_area, level),
+        scale_area(max_area, level) if not refine else np.inf)
+    coarse = coarse_runs.to_dense()
+
+    full_edges = None
+    if refine and isinstance(threshold, str):
+        # threshold otomatis untuk refine dihitung di resolusi penuh
+        full_edges = np.asarray(sobel_edge_detection(img_gray))
+        threshold = auto_threshold(full_edges, threshold)
+
+    labels = np.zeros((h, w), dtype=np.int32)
+    grains = []
+    whole = None
+    for lab, box in sorted(coarse_runs.bboxes().items()):
+        grow = margin
+        while True:
+            x1, y1, x2, y2 = upscale_bbox(box, level, grow, (w, h))
+            if refine and 4 * (x2 - x1 + 1) * (y2 - y1 + 1) > w * h:
+                # kotak besar: label seluruh gambar sekali, dipakai ulang
+                x1, y1, x2, y2 = 0, 0, w - 1, h - 1
+            ys = np.minimum(np.arange(y1, y2 + 1) // scale,
+                            coarse.shape[0] - 1)
+            xs = np.minimum(np.arange(x1, x2 + 1) // scale,
+                            coarse.shape[1] - 1)
+            mask = coarse[np.ix_(ys, xs)] == lab
+            if not refine:
+                components = [mask]
+                break
+            if (x2 - x1 + 1) * (y2 - y1 + 1) == w * h:
+                if whole is None:
+                    whole = _refine_labels(
+                        img_gray, full_edges, threshold, (x1, y1, x2, y2))
+                crop_labels = whole
+            else:
+                crop_labels = _refine_labels(
+                    img_gray, full_edges, threshold, (x1, y1, x2, y2))
+            hits = np.unique(crop_labels[mask & (crop_labels > 0)])
+            # komponen yang menyentuh tepi potongan (bukan tepi gambar)
+            # belum lengkap: perbesar kotak lalu ulangi
+            border = np.zeros(mask.shape, dtype=bool)
+            border[0, :] |= y1 > 0
+            border[-1, :] |= y2 < h - 1
+            border[:, 0] |= x1 > 0
+            border[:, -1] |= x2 < w - 1
+            if not np.isin(crop_labels[border], hits).any():
+                areas = np.bincount(crop_labels.ravel())[hits]
+                hits = hits[(areas >= min_area) & (areas <= max_area)]
+                components = [crop_labels == hit for hit in hits]
+                break
+            grow *= 2
+
+        region = labels[y1:y2 + 1, x1:x2 + 1]
+        for comp in components:
+            area = int(comp.sum())
+            if refine and region[comp].any():
+                # komponen yang sama sudah ditemukan dari kandidat lain
+                continue
+            new_label = len(grains) + 1
+            region[comp & (region == 0)] = new_label
+            ys_in, xs_in = np.nonzero(comp)
+            grains.append({
+                "label": new_label,
+                "area": area,
+                "bbox": (x1 + int(xs_in.min()), y1 + int(ys_in.min()),
+                         x1 + int(xs_in.max()), y1 + int(ys_in.max())),
+            })
 
+    return labels, grains, edges, binary
 
-def count_rice_grains(
-    image_path,
+
+def detect_rice_grains(
+    img_gray,
     threshold=25,
     min_area=500,
-    max_area=8000
+    max_area=8000,
+    split_touching=False,
+    blur_sigma=None,
+    pool=None,
+    pyramid_level=0,
+    verbose=True,
+    roi=None,
+    edge_method="sobel",
+    solidity=False
 ):
-    """Main pipeline to count rice grains without gaussian blur.
-    Returns the count and saves result image.
+    """Run the counting stages on a grayscale image without any plotting.
+    Returns a dict with the intermediate images ("gray", "edges", "binary"),
+    the grain "count", per-grain "props" and the filtered labels as a
+    rle.RunLengthLabels ("runs"); props are computed from the runs and
+    the dense label array is only built by result["runs"].to_dense().
+    "edges" and "binary" come from pool unless roi is used; release them
+    when done. Parameters are described in count_rice_grains; solidity
+    adds the (slower, per-grain convex hull) solidity to the props.
     """
-    print("Memuat gambar...")
-    img_gray, img_color = load_image(image_path)
+    log = print if verbose else (lambda *args, **kwargs: None)
+    pool = pool or default_pool
+    if edge_method not in EDGE_METHODS:
+        raise ValueError(f"Metode tepi tidak dikenal: {edge_method!r} "
+                         f"(pilihan: {', '.join(EDGE_METHODS)})")
+    if pyramid_level > 0 and (edge_method != "sobel" or split_touching):
+        raise ValueError("Mode pyramid hanya mendukung edge_method='sobel' "
+                         "tanpa split_touching")
+
+    full_gray = img_gray
+    if isinstance(roi, str) and roi == "auto":
+        roi = find_tray_roi(img_gray)
+        log(f"ROI otomatis: {roi}")
+    if roi is not None:
+        # hanya kotak pembatas ROI (+1 pixel halo untuk Sobel) yang diproses
+        mask = roi_mask(roi, img_gray.size)
+        box = mask_bbox(mask, halo=1)
+        if box is None:
+            raise ValueError("ROI kosong")
+        bx1, by1, bx2, by2 = box
+        img_gray = img_gray.crop((bx1, by1, bx2 + 1, by2 + 1))
+        roi_window = mask[by1:by2 + 1, bx1:bx2 + 1]
+    w, h = img_gray.size
 
-    print("Deteksi tepi (Sobel)...")
-    edges = sobel_edge_detection(img_gray)
+    if blur_sigma:
+        log(f"Gaussian blur rekursif (sigma {blur_sigma})...")
+        # gambar baru: gambar milik pemanggil tidak ikut terblur
+        img_gray = filter_gaussian(
+            img_gray.load(), w, h, sigma=blur_sigma, padding="replicate")
+
+    if pyramid_level > 0:
+        log(f"Deteksi multi-skala (level {pyramid_level})...")
+        dense, grains, edges, binary = detect_grains_pyramid(
+            img_gray, pyramid_level, threshold, min_area, max_area)
+        runs = RunLengthLabels.from_dense(dense)
+        rice_count = len(grains)
+        log(f"Butir yang valid setelah filter: {rice_count}")
+    else:
+        if edge_method == "canny":
+            # tepi tipis dan tersambung; kontur tertutup diisi jadi butir
+            log("Deteksi tepi (Canny)...")
+            edges = canny_edge_detection(
+                img_gray, high=threshold,
+                out=pool.acquire_image("L", (w, h)))
+            log("Mengisi kontur tertutup...")
+            filled = fill_holes(np.asarray(edges) != 0)
+            binary = to_image(np.where(filled, 255, 0).astype(np.uint8),
+                              out=pool.acquire_image("L", (w, h)))
+        else:
+            log("Deteksi tepi (Sobel)...")
+            edges = sobel_edge_detection(
+                img_gray, out=pool.acquire_image("L", (w, h)))
+
+            log("Thresholding...")
+            binary = threshold_image(
+                edges, threshold, out=pool.acquire_image("L", (w, h)),
+                verbose=verbose)
+        if roi is not None:
+            to_image(np.where(roi_window, np.asarray(binary), 0), out=binary)
+
+        if split_touching:
+            log("Labeling komponen (distance transform + watershed)...")
+            labels, num = split_touching_grains(binary, max_area=max_area)
+        else:
+            # label langsung dalam bentuk run; tanpa list H x W per pixel
+            log("Labeling komponen (connected components, run-length)...")
+            runs, num = label_runs(binary)
+        log(f"Komponen ditemukan (total labels): {num}")
+
+        log("Filter berdasarkan ukuran area...")
+        if split_touching:
+            labels, rice_count = filter_by_area(
+                labels, min_area, max_area, out=labels)
+            runs = RunLengthLabels.from_dense(labels)
+        else:
+            # tetap dalam bentuk run; to_dense() hanya bila diminta
+            runs, rice_count = runs.filter_by_area(min_area, max_area)
+        log(f"Butir yang valid setelah filter: {rice_count}")
+
+    if roi is not None:
+        # potong ke bentuk ROI (sebesar jendela saja), lalu geser run ke
+        # koordinat gambar penuh
+        window = RunLengthLabels.from_dense(
+            np.where(roi_window, runs.to_dense(), 0))
+        window = window.select(np.unique(window.labels).tolist())
+        fw, fh = full_gray.size
+        runs = RunLengthLabels((fh, fw), window.rows + by1,
+                               window.starts + bx1, window.ends + bx1,
+                               window.labels)
+        rice_count = runs.count
+        full_edges = Image.new("L", (fw, fh))
+        full_edges.paste(edges, (bx1, by1))
+        full_binary = Image.new("L", (fw, fh))
+        full_binary.paste(binary, (bx1, by1))
+        if pyramid_level <= 0:
+            pool.release_image(edges)
+            pool.release_image(binary)
+        edges, binary = full_edges, full_binary
+        if blur_sigma:
+            full_gray = full_gray.copy()
+            full_gray.paste(img_gray, (bx1, by1))
+        img_gray = full_gray
+
+    # tepi Sobel hanya garis luar butir: bentuk dihitung dari butir terisi
+    shapes = runs if edge_method == "canny" or split_touching \
+        else fill_grains(runs)
+    props = region_properties(shapes, with_solidity=solidity)
+    if props:
+        n = len(props)
+        log("Rata-rata bentuk butir: "
+            f"area {sum(p['area'] for p in props) / n:.0f} px, "
+            f"sumbu {sum(p['major_axis'] for p in props) / n:.1f} x "
+            f"{sum(p['minor_axis'] for p in props) / n:.1f} px, "
+            f"eksentrisitas "
+            f"{sum(p['eccentricity'] for p in props) / n:.2f}")
+
+    return {
+        "gray": img_gray,
+        "edges": edges,
+        "binary": binary,
+        "count": rice_count,
+        "props": props,
+        "runs": runs,
+    }
 
-    print("Thresholding...")
-    binary = threshold_image(edges, threshold)
 
-    print("Labeling komponen (connected components)...")
-    labels, num = connected_components(binary)
-    print(f"Komponen ditemukan (total labels): {num}")
+def count_rice_grains(
+    image_path,
+    threshold=25,
+    min_area=500,
+    max_area=8000,
+    split_touching=False,
+    blur_sigma=None,
+    pool=None,
+    pyramid_level=0,
+    decode_scale=1,
+    roi=None,
+    edge_method="sobel",
+    output_path="./images/output/hasil_deteksi_beras.png",
+    store=None,
+    lot=None
+):
+    """Main pipeline to count rice grains.
+    Returns the count and saves result image to output_path (None skips
+    saving).
+    blur_sigma: optional recursive Gaussian pre-smoothing before Sobel
+    (None = no blur).
+    split_touching: separate merged grains with distance-transform watershed
+    instead of plain connected components; outlines are filled first and
+    only blobs larger than max_area are split.
+    pool: BufferPool for the intermediate images (default: shared pool),
+    so repeated runs on same-size images reuse their buffers.
+    pyramid_level: > 0 detects on an image reduced 2**level times and
+    refines each grain at full resolution (see detect_grains_pyramid);
+    only the Sobel path is supported there, so edge_method="canny" or
+    split_touching=True with pyramid_level > 0 raise ValueError.
+    decode_scale: decode the image at 1/2, 1/4 or 1/8 size (JPEG DCT
+    scaling) for a fast coarse count; area limits are scaled to match.
+    roi: restrict all stages to a region of interest: a list of inclusive
+    (x1, y1, x2, y2) rectangles, a binary mask, or "auto" to locate the
+    tray with a coarse threshold (roi.find_tray_roi).
+    edge_method: "sobel" (gradient magnitude + global threshold) or
+    "canny" (thin hysteresis edges whose closed outlines are filled;
+    threshold is then the strong-edge level, low = threshold / 2).
+    store: optional results_store.ResultsStore; the image and every grain
+    are recorded under a new run tagged with lot.
+    """
+    pool = pool or default_pool
 
-    print("Filter berdasarkan ukuran area...")
-    filtered_labels, rice_count = filter_by_area(
-        labels, min_area, max_area)
-    print(f"Butir yang valid setelah filter: {rice_count}")
+    print("Memuat gambar...")
+    img_gray, img_color = load_image(image_path, decode_scale)
+    min_area = min_area / decode_scale ** 2
+    max_area = max_area / decode_scale ** 2
+
+    result = detect_rice_grains(
+        img_gray, threshold, min_area, max_area, split_touching,
+        blur_sigma, pool, pyramid_level, roi=roi, edge_method=edge_method,
+        solidity=store is not None)
+    img_gray = result["gray"]
+    edges = result["edges"]
+    binary = result["binary"]
+    filtered_labels = result["runs"].to_dense()
+    rice_count = result["count"]
 
     # visualization
     color_labels_img = labels_to_color_image(filtered_labels)
@@ -266,7 +609,8 @@ def count_rice_grains(
     axes[0, 1].axis('off')
 
     axes[0, 2].imshow(edges, cmap='gray')
-    axes[0, 2].set_title('Edge Detection (Sobel)')
+    axes[0, 2].set_title(
+        f'Edge Detection ({"Canny" if edge_method == "canny" else "Sobel"})')
     axes[0, 2].axis('off')
 
     axes[1, 0].imshow(binary, cmap='gray')
@@ -278,62 +622,28 @@ def count_rice_grains(
     axes[1, 1].axis('off')
 
     # overlay original and bounding boxes
-    overlay = img_color.copy()
-    overlay_px = overlay.load()
-
-    # find boxes per label
-    boxes = {}
-    h = len(filtered_labels)
-    w = len(filtered_labels[0]) if h > 0 else 0
-    for y in range(h):
-        for x in range(w):
-            lab = filtered_labels[y][x]
-            if lab == 0:
-                continue
-            if lab not in boxes:
-                boxes[lab] = [x, y, x, y]
-            else:
-                L = boxes[lab]
-                if x < L[0]:
-                    L[0] = x
-                if y < L[1]:
-                    L[1] = y
-                if x > L[2]:
-                    L[2] = x
-                if y > L[3]:
-                    L[3] = y
-
-    # draw boxes (green) and centers (red)
-    for lab, box in boxes.items():
-        x1, y1, x2, y2 = box
-        # draw horizontal edges
-        for x in range(x1, x2 + 1):
-            if 0 <= x < w and 0 <= y1 < h:
-                overlay_px[x, y1] = (0, 255, 0)
-            if 0 <= x < w and 0 <= y2 < h:
-                overlay_px[x, y2] = (0, 255, 0)
-        for y in range(y1, y2 + 1):
-            if 0 <= x1 < w and 0 <= y < h:
-                overlay_px[x1, y] = (0, 255, 0)
-            if 0 <= x2 < w and 0 <= y < h:
-                overlay_px[x2, y] = (0, 255, 0)
-        cx = (x1 + x2) // 2
-        cy = (y1 + y2) // 2
-        for dx in range(-2, 3):
-            for dy in range(-2, 3):
-                nx = cx + dx
-                ny = cy + dy
-                if 0 <= nx < w and 0 <= ny < h:
-                    overlay_px[nx, ny] = (255, 0, 0)
+    overlay = render_overlay(img_color, filtered_labels)
 
     axes[1, 2].imshow(overlay)
     axes[1, 2].set_title(f'Hasil {rice_count} butir')
     axes[1, 2].axis('off')
 
     plt.tight_layout()
-    plt.savefig('./images/output/hasil_deteksi_beras.png',
-                dpi=150, bbox_inches='tight')
+    if output_path:
+        plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.show()
+    plt.close(fig)
+
+    if store is not None:
+        run_id = store.start_run(lot, {
+            "threshold": threshold, "min_area": min_area,
+            "max_area": max_area, "edge_method": edge_method,
+            "decode_scale": decode_scale})
+        store.add_image(run_id, image_path, result, lot, output_path)
+        store.flush()
+
+    pool.release_image(edges)
+    pool.release_image(binary)
 
     return rice_count
 
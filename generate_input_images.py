@@ -1,20 +1,46 @@
+import argparse
+import os
+
 from PIL import Image
-import random
+import numpy as np
 
 
-def add_white_speckles(input_path, output_path, amount=500):
+def add_white_speckles(input_path, output_path, amount=500, dirty=None,
+                       seed=None):
+    """Sprinkle white pixels over an image.
+    All speckle positions are drawn at once and written with one array
+    assignment.
+    dirty: optional incremental.DirtyRegions that records every speckle,
+    so filters and counts can be refreshed without a full rerun.
+    """
     img = Image.open(input_path).convert("RGB")
-    pixels = img.load()
     width, height = img.size
+    pixels = np.array(img)
 
-    for _ in range(amount):
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        pixels[x, y] = (255, 255, 255)  # titik putih
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(0, width, size=amount)
+    ys = rng.integers(0, height, size=amount)
+    pixels[ys, xs] = (255, 255, 255)  # titik putih
+    if dirty is not None:
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            dirty.add_point(x, y)
 
-    img.save(output_path)
+    Image.fromarray(pixels, "RGB").save(output_path)
     print("Selesai, tersimpan:", output_path)
 
 
-# contoh pemakaian
-add_white_speckles("images\input\input-cars.jpg", "output.jpg", amount=2000)
+if __name__ == "__main__":
+    # contoh pemakaian:
+    # python generate_input_images.py images/input/beras.jpg output.jpg
+    parser = argparse.ArgumentParser(
+        description="Tambahkan noise titik putih ke gambar.")
+    parser.add_argument("input", nargs="?",
+                        default=os.path.join("images", "input",
+                                             "beras.jpg"))
+    parser.add_argument("output", nargs="?", default="output.jpg")
+    parser.add_argument("--amount", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    add_white_speckles(args.input, args.output, amount=args.amount,
+                       seed=args.seed)
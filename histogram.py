@@ -0,0 +1,134 @@
+import numpy as np
+
+
+N_BINS = 256
+
+
+def _as_gray_array(img):
+    """Return a 2D uint8 array from a PIL image or array-like."""
+    arr = np.asarray(img)
+    if arr.ndim == 3:
+        raise ValueError("Histogram membutuhkan gambar grayscale (mode 'L')")
+    if arr.dtype != np.uint8:
+        arr = np.clip(arr, 0, 255).astype(np.uint8)
+    return arr
+
+
+def histogram(img):
+    """Compute the 256-bin histogram of a grayscale image in one pass."""
+    arr = _as_gray_array(img)
+    return np.bincount(arr.ravel(), minlength=N_BINS)
+
+
+def tile_histograms(img, tile_size=64):
+    """Compute 256-bin histograms for every tile of the image in one pass.
+
+    Returns an array of shape (tiles_y, tiles_x, 256). Edge tiles cover the
+    remaining pixels when the image size is not a multiple of tile_size.
+    """
+    arr = _as_gray_array(img)
+    h, w = arr.shape
+    tiles_y = -(-h // tile_size)
+    tiles_x = -(-w // tile_size)
+
+    # index tile tiap pixel, lalu gabungkan dengan nilai pixel menjadi satu
+    # indeks bin global sehingga cukup satu bincount
+    ty = (np.arange(h) // tile_size)[:, None]
+    tx = (np.arange(w) // tile_size)[None, :]
+    tile_idx = ty * tiles_x + tx
+    flat = tile_idx.astype(np.int64) * N_BINS + arr
+    counts = np.bincount(flat.ravel(), minlength=tiles_y * tiles_x * N_BINS)
+    return counts.reshape(tiles_y, tiles_x, N_BINS)
+
+
+def threshold_otsu(hist):
+    """Otsu threshold: maximise between-class variance over all 256 cuts."""
+    hist = np.asarray(hist, dtype=np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 0
+    levels = np.arange(hist.size, dtype=np.float64)
+    w0 = np.cumsum(hist)
+    w1 = total - w0
+    m0 = np.cumsum(hist * levels)
+    mt = m0[-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mt * w0 - m0 * total) ** 2 / (w0 * w1)
+    between[~np.isfinite(between)] = -1
+    if between.max() < 0:
+        # satu tingkat saja (gambar rata): tidak ada foreground
+        return int(np.flatnonzero(hist)[0])
+    # pixel > threshold masuk ke kelas foreground
+    return int(np.argmax(between))
+
+
+def threshold_triangle(hist):
+    """Triangle threshold (Zack et al.), suited to a single dominant peak.
+
+    A line is drawn from the histogram peak to the far end of the longest
+    tail; the threshold is the bin with maximum distance to that line.
+    """
+    hist = np.asarray(hist, dtype=np.float64)
+    nonzero = np.flatnonzero(hist)
+    if nonzero.size == 0:
+        return 0
+    first, last = nonzero[0], nonzero[-1]
+    peak = int(np.argmax(hist))
+    if first == last:
+        return int(first)
+
+    # pilih sisi ekor yang paling panjang
+    flip = (peak - first) > (last - peak)
+    if flip:
+        hist = hist[::-1]
+        first, last, peak = (hist.size - 1 - last, hist.size - 1 - first,
+                             hist.size - 1 - peak)
+
+    height = hist[peak]
+    span = last - peak
+    if span <= 0:
+        threshold = peak
+    else:
+        xs = np.arange(peak, last + 1)
+        # jarak (tanpa normalisasi) tiap titik histogram ke garis puncak-ekor
+        dist = np.abs((xs - peak) * (hist[last] - height)
+                      - (hist[xs] - height) * span)
+        threshold = int(xs[np.argmax(dist)])
+
+    if flip:
+        threshold = hist.size - 1 - threshold
+    return threshold
+
+
+def threshold_percentile(hist, percentile=50.0):
+    """Smallest level whose cumulative share reaches the given percentile."""
+    hist = np.asarray(hist, dtype=np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 0
+    cdf = np.cumsum(hist) / total
+    return int(np.searchsorted(cdf, percentile / 100.0))
+
+
+threshold_methods = {
+    "otsu": threshold_otsu,
+    "triangle": threshold_triangle,
+    "percentile": threshold_percentile,
+}
+
+
+def auto_threshold(img, method="otsu", **kwargs):
+    """Select a threshold from the image histogram.
+
+    method may be "otsu", "triangle", "percentile" or "percentile:<p>",
+    e.g. "percentile:90".
+    """
+    name, _, arg = method.partition(":")
+    if name not in threshold_methods:
+        raise ValueError(
+            f"Metode threshold tidak dikenal: {method!r} "
+            f"(pilihan: {', '.join(threshold_methods)})")
+    if arg:
+        kwargs["percentile"] = float(arg)
+    return threshold_methods[name](histogram(img), **kwargs)
@@ -0,0 +1,128 @@
+from PIL import Image
+import numpy as np
+
+
+def to_array(src, w=None, h=None):
+    """Return pixel data as a numpy array (H x W or H x W x 3).
+
+    src may be a PIL Image, a numpy array, or a PixelAccess object (then
+    w and h are required, like the filter functions in main.py).
+    RGBA images are reduced to RGB, matching how the filters read
+    only the first three channels.
+    """
+    if isinstance(src, Image.Image):
+        if src.mode not in ("L", "RGB"):
+            src = src.convert("RGB") if len(src.getbands()) >= 3 \
+                else src.convert("L")
+        return np.asarray(src)
+    if isinstance(src, np.ndarray):
+        return src
+
+    if w is None or h is None:
+        raise ValueError("w dan h wajib diisi untuk PixelAccess")
+    sample = src[0, 0]
+    if isinstance(sample, tuple):
+        data = [[src[x, y][:3] for x in range(w)] for y in range(h)]
+    else:
+        data = [[src[x, y] for x in range(w)] for y in range(h)]
+    return np.array(data, dtype=np.uint8)
+
+
+def pixel_access(src):
+    """PixelAccess of src: a PIL Image is loaded, anything else (already
+    a PixelAccess) is returned as is."""
+    if isinstance(src, Image.Image):
+        return src.load()
+    return src
+
+
+def to_image(arr, out=None):
+    """Convert a 2D/3D array to a PIL 'L'/'RGB' image, clamped to 0-255.
+    When out is given, the pixels are decoded into that image straight
+    from the array buffer instead of allocating a new one.
+    """
+    arr = np.asarray(arr)
+    if arr.dtype != np.uint8:
+        arr = np.clip(arr, 0, 255).astype(np.uint8)
+    mode = "RGB" if arr.ndim == 3 else "L"
+    if out is None:
+        return Image.fromarray(arr, mode)
+    if out.mode != mode or out.size != (arr.shape[1], arr.shape[0]):
+        raise ValueError(
+            f"Buffer out tidak cocok: butuh {mode} "
+            f"{(arr.shape[1], arr.shape[0])}, didapat {out.mode} {out.size}")
+    out.frombytes(np.ascontiguousarray(arr))
+    return out
+
+
+def _source_index(idx, n, padding):
+    """Map (possibly out-of-range) indices to source indices following
+    get_pixel; returns None entries as -1 for zero padding."""
+    if padding == "replicate":
+        return np.clip(idx, 0, n - 1)
+    if padding == "reflect":
+        # satu kali pantul (if/elif seperti get_pixel), lalu clamp
+        idx = np.where(idx < 0, -idx,
+                       np.where(idx >= n, 2 * n - idx - 2, idx))
+        return np.clip(idx, 0, n - 1)
+    if padding == "wrap":
+        return idx % n
+    return np.where((idx >= 0) & (idx < n), idx, -1)
+
+
+def _pad_index(n, pad, padding):
+    """Source index for positions -pad .. n+pad-1, following get_pixel."""
+    return _source_index(np.arange(-pad, n + pad), n, padding)
+
+
+def pad_array(arr, pad_y, pad_x, padding="zero", out=None):
+    """Pad the two spatial axes with the same rules as main.get_pixel.
+    Like get_pixel, an unknown padding name reads every pixel as 0.
+    out: optional array of the padded shape to fill (any dtype the values
+    fit in); the interior is copied once and only the border rows and
+    columns are filled, so no padded-size temporaries are made.
+    """
+    h, w = arr.shape[:2]
+    shape = (h + 2 * pad_y, w + 2 * pad_x) + arr.shape[2:]
+    if out is None:
+        out = np.empty(shape, dtype=arr.dtype)
+    elif out.shape != shape:
+        raise ValueError(f"Buffer out harus berukuran {shape}, "
+                         f"didapat {out.shape}")
+    if padding not in ("zero", "replicate", "reflect", "wrap"):
+        out[...] = 0
+        return out
+
+    out[pad_y:pad_y + h, pad_x:pad_x + w] = arr
+    rows = _pad_index(h, pad_y, padding).tolist()
+    cols = _pad_index(w, pad_x, padding).tolist()
+    # baris tepi dulu (kolom dalam), lalu kolom tepi dari array yang sudah
+    # berisi baris tepi, sehingga pojok ikut terisi
+    for i in list(range(pad_y)) + list(range(pad_y + h, shape[0])):
+        if rows[i] < 0:
+            out[i, pad_x:pad_x + w] = 0
+        else:
+            out[i, pad_x:pad_x + w] = arr[rows[i]]
+    for j in list(range(pad_x)) + list(range(pad_x + w, shape[1])):
+        if cols[j] < 0:
+            out[:, j] = 0
+        else:
+            out[:, j] = out[:, pad_x + cols[j]]
+    return out
+
+
+def padded_window(arr, x1, y1, x2, y2, pad, padding="zero"):
+    """The part of pad_array(arr, pad, pad, padding) that covers the
+    inclusive box (x1, y1, x2, y2) plus pad pixels on each side, built
+    without padding the whole image."""
+    h, w = arr.shape[:2]
+    if padding not in ("zero", "replicate", "reflect", "wrap"):
+        return np.zeros((y2 - y1 + 1 + 2 * pad, x2 - x1 + 1 + 2 * pad)
+                        + arr.shape[2:], dtype=arr.dtype)
+    rows = _source_index(np.arange(y1 - pad, y2 + pad + 1), h, padding)
+    cols = _source_index(np.arange(x1 - pad, x2 + pad + 1), w, padding)
+    window = arr[np.maximum(rows, 0)[:, None], np.maximum(cols, 0)[None, :]]
+    if padding == "zero":
+        outside = (rows < 0)[:, None] | (cols < 0)[None, :]
+        window[outside] = 0
+    return window
@@ -0,0 +1,46 @@
+from PIL import Image
+import numpy as np
+
+
+DRAFT_SCALES = (1, 2, 4, 8)
+
+
+def open_image(img_path, scale=1, mode=None):
+    """Decode an image file once, optionally reduced and/or grayscale.
+
+    scale : 1, 2, 4 or 8. For JPEG the reduction happens inside the
+            decoder (DCT scaling via Image.draft), so a 1/8 preview skips
+            most of the decode work. Other formats are decoded fully and
+            then reduced with a box filter.
+    mode  : None to keep the file mode, or "L" / "RGB". For JPEG, "L"
+            decodes only the luma channel.
+    Returns a loaded PIL image.
+    """
+    if scale not in DRAFT_SCALES:
+        raise ValueError(f"Skala decode harus salah satu dari {DRAFT_SCALES}")
+    img = Image.open(img_path)
+    full_w, full_h = img.size
+
+    if img.format == "JPEG" and (scale > 1 or mode == "L"):
+        img.draft(mode if mode == "L" else img.mode,
+                  (max(1, full_w // scale), max(1, full_h // scale)))
+    img.load()
+
+    # draft hanya berlaku untuk JPEG; format lain diperkecil setelah decode
+    factor = img.width // max(1, full_w // scale)
+    if factor > 1:
+        img = img.reduce(factor)
+    if mode is not None and img.mode != mode:
+        img = img.convert(mode)
+    return img
+
+
+def grayscale_array(img):
+    """Luminosity grayscale identical to count_rice.rgb_to_grayscale:
+    int(0.299 r + 0.587 g + 0.114 b), computed in one vectorized pass."""
+    arr = np.asarray(img)
+    if arr.ndim == 2:
+        return arr
+    rgb = arr[..., :3].astype(np.float64)
+    gray = 0.299 * rgb[..., 0] + 0.587 * rgb[..., 1] + 0.114 * rgb[..., 2]
+    return gray.astype(np.uint8)
@@ -0,0 +1,340 @@
+import numpy as np
+
+from image_array import to_array, to_image, padded_window
+from kernel_registry import (
+    get_kernel, kernel_padding, correlate_padded, finish_array, convolve)
+from render import label_bboxes
+from count_rice import (
+    sobel_edge_detection, threshold_image, connected_components)
+
+
+class DirtyRegions:
+    """Dirty rectangles of a w x h image, coalesced on a tile grid.
+
+    Edits are recorded as inclusive (x1, y1, x2, y2) boxes; the tiles
+    they touch are marked, so thousands of scattered speckles collapse
+    into a bounded number of rectangles (one per horizontal run of dirty
+    tiles) instead of a list that has to be merged pairwise.
+    """
+
+    def __init__(self, size, tile=16):
+        self.size = size
+        self.tile = tile
+        w, h = size
+        self._tiles = np.zeros(((h + tile - 1) // tile,
+                                (w + tile - 1) // tile), dtype=bool)
+
+    def add(self, x1, y1, x2, y2):
+        """Mark an inclusive box (clipped to the image) as dirty."""
+        w, h = self.size
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(w - 1, x2), min(h - 1, y2)
+        if x1 > x2 or y1 > y2:
+            return
+        t = self.tile
+        self._tiles[y1 // t:y2 // t + 1, x1 // t:x2 // t + 1] = True
+
+    def add_point(self, x, y):
+        self.add(x, y, x, y)
+
+    def add_mask(self, mask):
+        """Mark every tile containing a nonzero pixel of an H x W mask."""
+        h, w = self._tiles.shape
+        t = self.tile
+        mask = np.asarray(mask) != 0
+        full = np.zeros((h * t, w * t), dtype=bool)
+        full[:mask.shape[0], :mask.shape[1]] = mask
+        self._tiles |= full.reshape(h, t, w, t).any(axis=(1, 3))
+
+    def rects(self):
+        """Dirty boxes in image coordinates, one per run of dirty tiles."""
+        w, h = self.size
+        t = self.tile
+        boxes = []
+        for ty, row in enumerate(self._tiles):
+            cols = np.flatnonzero(row)
+            if cols.size == 0:
+                continue
+            # pecah kolom menjadi run berurutan
+            breaks = np.flatnonzero(np.diff(cols) > 1)
+            starts = np.concatenate([[cols[0]], cols[breaks + 1]])
+            ends = np.concatenate([cols[breaks], [cols[-1]]])
+            for s, e in zip(starts.tolist(), ends.tolist()):
+                boxes.append((s * t, ty * t, min(w - 1, (e + 1) * t - 1),
+                              min(h - 1, (ty + 1) * t - 1)))
+        return boxes
+
+    def area(self):
+        """Number of dirty pixels (tile-rounded)."""
+        return sum((x2 - x1 + 1) * (y2 - y1 + 1)
+                   for x1, y1, x2, y2 in self.rects())
+
+    def clear(self):
+        self._tiles[:] = False
+
+    def __bool__(self):
+        return bool(self._tiles.any())
+
+
+def diff_regions(old, new, tile=16):
+    """DirtyRegions of the pixels that differ between two same-size
+    images, for edits made by tools that do not report what they touched."""
+    a = to_array(old)
+    b = to_array(new)
+    if a.shape != b.shape:
+        raise ValueError(f"Ukuran gambar berbeda: {a.shape} dan {b.shape}")
+    changed = a != b
+    if changed.ndim == 3:
+        changed = changed.any(axis=-1)
+    dirty = DirtyRegions((a.shape[1], a.shape[0]), tile)
+    dirty.add_mask(changed)
+    return dirty
+
+
+def expand_rect(box, radius, size, padding="zero"):
+    """Output boxes affected by a change inside box for a filter of the
+    given radius. With "wrap" padding the parts that spill over an image
+    edge reappear on the opposite side."""
+    w, h = size
+    x1, y1, x2, y2 = box
+    x1, y1, x2, y2 = x1 - radius, y1 - radius, x2 + radius, y2 + radius
+    clip = (max(0, x1), max(0, y1), min(w - 1, x2), min(h - 1, y2))
+    if padding != "wrap":
+        return [clip]
+
+    def spans(lo, hi, n):
+        if hi - lo + 1 >= n:
+            return [(0, n - 1)]
+        out = [(max(0, lo), min(n - 1, hi))]
+        if lo < 0:
+            out.append((lo % n, n - 1))
+        if hi >= n:
+            out.append((0, hi % n))
+        return out
+
+    return [(sx1, sy1, sx2, sy2)
+            for sy1, sy2 in spans(y1, y2, h)
+            for sx1, sx2 in spans(x1, x2, w)]
+
+
+def paste_patch(source, patch, x, y):
+    """Write patch (image or array) into the source array with its
+    top-left corner at x, y, clipped to the image bounds. Returns the
+    inclusive box that was written; a patch lying entirely outside the
+    image raises ValueError."""
+    patch = to_array(patch)
+    ph, pw = patch.shape[:2]
+    h, w = source.shape[:2]
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(w, x + pw), min(h, y + ph)
+    if x1 >= x2 or y1 >= y2:
+        raise ValueError(f"Patch {pw}x{ph} di ({x}, {y}) berada di luar "
+                         f"gambar {w}x{h}")
+    source[y1:y2, x1:x2] = patch[y1 - y:y2 - y, x1 - x:x2 - x]
+    return x1, y1, x2 - 1, y2 - 1
+
+
+class IncrementalFilter:
+    """A list_kernels filter whose result is kept up to date under edits.
+
+    The source pixels live in self.source (H x W or H x W x 3 uint8).
+    Write edits through paste(), or modify self.source directly and call
+    mark(); refresh() then recomputes only the dirty boxes grown by the
+    kernel radius. Results equal convolve() on the edited image for every
+    padding mode.
+    """
+
+    def __init__(self, src, kernel, padding="zero", tile=16):
+        self.kernel = get_kernel(kernel)
+        self.padding = padding
+        self.source = to_array(src).copy()
+        h, w = self.source.shape[:2]
+        self.size = (w, h)
+        self.radius = kernel_padding(self.kernel)
+        self.result = to_array(
+            convolve(self.source, self.kernel, padding)).copy()
+        self.dirty = DirtyRegions(self.size, tile)
+
+    def paste(self, patch, x, y):
+        """Write a patch (image or array) with its top-left corner at x, y;
+        the part outside the image is dropped."""
+        self.mark(paste_patch(self.source, patch, x, y))
+
+    def mark(self, box):
+        """Record an inclusive box of self.source as modified."""
+        self.dirty.add(*box)
+
+    def _compute(self, box):
+        x1, y1, x2, y2 = box
+        window = padded_window(self.source, x1, y1, x2, y2, self.radius,
+                               self.padding)
+        total = correlate_padded(window.astype(self.kernel.coeffs.dtype),
+                                 self.kernel, y2 - y1 + 1, x2 - x1 + 1)
+        return finish_array(total, self.kernel)
+
+    def refresh(self):
+        """Recompute the outputs affected by the pending edits.
+        Returns the list of output boxes that were rewritten."""
+        boxes = []
+        for box in self.dirty.rects():
+            boxes.extend(expand_rect(box, self.radius, self.size,
+                                     self.padding))
+        for x1, y1, x2, y2 in boxes:
+            self.result[y1:y2 + 1, x1:x2 + 1] = self._compute(
+                (x1, y1, x2, y2))
+        self.dirty.clear()
+        return boxes
+
+    def image(self, out=None):
+        """Current filter result as a PIL image."""
+        return to_image(self.result, out=out)
+
+
+def _labels_array(binary):
+    """4-connected labels of a boolean array through connected_components."""
+    labels, _ = connected_components(
+        to_image(np.where(binary, 255, 0).astype(np.uint8)))
+    return np.asarray(labels, dtype=np.int32).reshape(binary.shape)
+
+
+class IncrementalLabeler:
+    """4-connected component labels maintained under local edits.
+
+    update() takes the new binary image and the boxes where it may have
+    changed, and relabels only the components touching those boxes: the
+    work is proportional to the edit plus the size of the affected
+    grains, not to the frame. Label ids are not sequential; new
+    components get fresh ids and the ids of removed ones are dropped.
+    """
+
+    def __init__(self, binary):
+        binary = np.asarray(binary) != 0
+        self.labels = _labels_array(binary)
+        self.size = (binary.shape[1], binary.shape[0])
+        self.areas = {}
+        self.bboxes = {}
+        self._add_regions(self.labels, 0, 0)
+        self.next_label = int(self.labels.max()) + 1
+
+    def _add_regions(self, labels, ox, oy):
+        counts = np.bincount(labels.ravel())
+        for lab, (x1, y1, x2, y2) in label_bboxes(labels).items():
+            self.areas[lab] = int(counts[lab])
+            self.bboxes[lab] = (x1 + ox, y1 + oy, x2 + ox, y2 + oy)
+
+    def update(self, binary, boxes):
+        """Bring the labels in line with binary (H x W, nonzero =
+        foreground) given the boxes outside of which it is unchanged."""
+        binary = np.asarray(binary)
+        for box in boxes:
+            # komponen yang menyentuh kotak (+1 pixel) ikut dilabel ulang
+            gx1, gy1, gx2, gy2 = expand_rect(box, 1, self.size)[0]
+            touched = self.labels[gy1:gy2 + 1, gx1:gx2 + 1]
+            affected = np.unique(touched[touched > 0])
+
+            x1, y1, x2, y2 = gx1, gy1, gx2, gy2
+            for lab in affected.tolist():
+                bx1, by1, bx2, by2 = self.bboxes.pop(lab)
+                del self.areas[lab]
+                x1, y1 = min(x1, bx1), min(y1, by1)
+                x2, y2 = max(x2, bx2), max(y2, by2)
+
+            region = np.s_[y1:y2 + 1, x1:x2 + 1]
+            old = self.labels[region]
+            own = np.isin(old, affected)
+            inside = np.zeros(old.shape, dtype=bool)
+            inside[gy1 - y1:gy2 - y1 + 1, gx1 - x1:gx2 - x1 + 1] = True
+            # pixel yang dilabel ulang: latar depan baru di kotak, serta
+            # pixel milik komponen terdampak yang masih latar depan
+            keep = (binary[region] != 0) & (own | inside)
+            old[own | inside] = 0
+
+            local = _labels_array(keep)
+            n = int(local.max())
+            if n == 0:
+                continue
+            fresh = np.where(local > 0, local + (self.next_label - 1), 0)
+            old[local > 0] = fresh[local > 0]
+            self._add_regions(fresh, x1, y1)
+            self.next_label += n
+
+    def count(self, min_area=0, max_area=None):
+        """Number of components with min_area <= area <= max_area."""
+        return sum(1 for a in self.areas.values()
+                   if a >= min_area and (max_area is None or a <= max_area))
+
+    def filtered(self, min_area=0, max_area=None):
+        """Sequential H x W labels of the components within the area
+        limits, ordered by label id."""
+        valid = sorted(lab for lab, a in self.areas.items()
+                       if a >= min_area
+                       and (max_area is None or a <= max_area))
+        lut = np.zeros(self.next_label, dtype=np.int32)
+        lut[valid] = np.arange(1, len(valid) + 1)
+        return lut[self.labels]
+
+
+class IncrementalRiceCounter:
+    """count_rice pipeline (Sobel -> threshold -> labels -> area filter)
+    kept up to date as a grayscale frame is edited.
+
+    Edits go through paste() or mark() as for IncrementalFilter. refresh()
+    recomputes the Sobel magnitude and the threshold only in the dirty
+    boxes grown by one pixel and relabels only the grains they touch.
+    threshold must be a fixed level: an automatic level depends on the
+    whole histogram and would invalidate everything on each edit.
+    """
+
+    def __init__(self, img_gray, threshold=25, min_area=500, max_area=8000,
+                 tile=16):
+        if isinstance(threshold, str):
+            raise ValueError("Mode inkremental butuh threshold tetap")
+        self.threshold = threshold
+        self.min_area = min_area
+        self.max_area = max_area
+        self.source = to_array(img_gray).copy()
+        h, w = self.source.shape
+        self.size = (w, h)
+        self.dirty = DirtyRegions(self.size, tile)
+        self.edges = to_array(
+            sobel_edge_detection(to_image(self.source))).copy()
+        self.binary = to_array(
+            threshold_image(to_image(self.edges), threshold)).copy()
+        self.labeler = IncrementalLabeler(self.binary)
+
+    def paste(self, patch, x, y):
+        self.mark(paste_patch(self.source, patch, x, y))
+
+    def mark(self, box):
+        self.dirty.add(*box)
+
+    def _sobel(self, box):
+        x1, y1, x2, y2 = box
+        window = padded_window(self.source, x1, y1, x2, y2, 1, "replicate")
+        window = window.astype(np.int64)
+        mags = []
+        for name in ("sobel_h", "sobel_v"):
+            total = correlate_padded(window, name, y2 - y1 + 1, x2 - x1 + 1)
+            mags.append(finish_array(total, name).astype(np.float64))
+        gx, gy = mags
+        return np.minimum(255, np.sqrt(gx**2 + gy**2)).astype(np.uint8)
+
+    def refresh(self):
+        """Apply pending edits; returns the current grain count."""
+        boxes = [expand_rect(box, 1, self.size)[0]
+                 for box in self.dirty.rects()]
+        for x1, y1, x2, y2 in boxes:
+            region = np.s_[y1:y2 + 1, x1:x2 + 1]
+            self.edges[region] = self._sobel((x1, y1, x2, y2))
+            self.binary[region] = np.where(
+                self.edges[region] > self.threshold, 255, 0)
+        self.labeler.update(self.binary, boxes)
+        self.dirty.clear()
+        return self.count()
+
+    def count(self):
+        return self.labeler.count(self.min_area, self.max_area)
+
+    def labels(self):
+        """Sequential labels of the grains within the area limits."""
+        return self.labeler.filtered(self.min_area, self.max_area)
@@ -0,0 +1,264 @@
+import json
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from buffer_pool import check_not_source, default_pool, output_image
+from image_array import to_array, to_image, pad_array
+from kernels import list_kernels
+
+
+class CompiledKernel(NamedTuple):
+    """Kernel analysed once: everything apply_kernel used to recompute on
+    every call is stored here."""
+    name: str
+    coeffs: np.ndarray              # read-only int64 / float64, k x k
+    size: int                       # k
+    anchor: int                     # offset tap pusat (k // 2)
+    norm: float                     # pembagi normalisasi (sum jika > 0)
+    separable: Optional[tuple]      # (kolom, baris) jika rank 1
+    symmetric: bool                 # simetris titik (korelasi == konvolusi)
+    strategy: str                   # "separable" atau "direct"
+
+
+KERNELS = {}
+_anonymous = {}
+
+
+def _readonly(arr):
+    arr = np.ascontiguousarray(arr)
+    arr.setflags(write=False)
+    return arr
+
+
+def _separable_factors(coeffs):
+    """Return integer-valued (col, row) with outer(col, row) == coeffs, or
+    None. Only exact integer factors are accepted so the separable path
+    gives bit-identical sums."""
+    rows = np.flatnonzero(np.any(coeffs != 0, axis=1))
+    if rows.size == 0:
+        return None
+    row = coeffs[rows[0]]
+    j = np.flatnonzero(row)[0]
+    col = coeffs[:, j] / row[j]
+    if not np.all(col == np.round(col)):
+        return None
+    col = col.astype(coeffs.dtype)
+    if not np.array_equal(np.outer(col, row), coeffs):
+        return None
+    return _readonly(col), _readonly(row.copy())
+
+
+def compile_kernel(kernel, name=None):
+    """Analyse a square nested-list kernel into a CompiledKernel."""
+    coeffs = np.array(kernel)
+    if coeffs.ndim != 2 or coeffs.shape[0] != coeffs.shape[1]:
+        raise ValueError(f"Kernel {name!r} harus berupa matriks persegi")
+    if not np.issubdtype(coeffs.dtype, np.number):
+        raise ValueError(f"Kernel {name!r} harus berisi angka")
+    if np.all(coeffs == np.round(coeffs)):
+        coeffs = coeffs.astype(np.int64)
+    else:
+        coeffs = coeffs.astype(np.float64)
+
+    size = coeffs.shape[0]
+    k_sum = coeffs.sum()
+    separable = None
+    if coeffs.dtype == np.int64:
+        separable = _separable_factors(coeffs)
+    # kernel 3x3 rank-1: 6 tap alih-alih 9; untuk 2x2 tidak ada untungnya
+    strategy = "separable" if separable is not None and size >= 3 \
+        else "direct"
+
+    return CompiledKernel(
+        name=name or "",
+        coeffs=_readonly(coeffs),
+        size=size,
+        anchor=size // 2,
+        norm=k_sum.item() if k_sum > 0 else 1,
+        separable=separable,
+        symmetric=bool(np.array_equal(coeffs, coeffs[::-1, ::-1])),
+        strategy=strategy,
+    )
+
+
+def register_kernel(name, kernel):
+    """Compile and register a kernel under name; returns the compiled kernel."""
+    compiled = compile_kernel(kernel, name)
+    KERNELS[name] = compiled
+    return compiled
+
+
+def register_kernels(kernels):
+    """Register every entry of a {name: nested list} dict."""
+    for name, kernel in kernels.items():
+        register_kernel(name, kernel)
+
+
+def load_kernels_json(path):
+    """Register custom kernels from a JSON file of the form
+    {"nama_kernel": [[...], [...], [...]], ...}. Returns the names loaded.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("File JSON kernel harus berupa objek {nama: matriks}")
+    register_kernels(data)
+    return list(data)
+
+
+def get_kernel(kernel):
+    """Look up a kernel by name, pass a CompiledKernel through, or compile
+    (and cache) an unnamed nested-list kernel."""
+    if isinstance(kernel, CompiledKernel):
+        return kernel
+    if isinstance(kernel, str):
+        try:
+            return KERNELS[kernel]
+        except KeyError:
+            raise KeyError(f"Kernel tidak terdaftar: {kernel!r}") from None
+    key = tuple(tuple(row) for row in kernel)
+    compiled = _anonymous.get(key)
+    if compiled is None:
+        compiled = _anonymous[key] = compile_kernel(kernel)
+    return compiled
+
+
+def kernel_taps(kernel):
+    """(dy, dx, coefficient) for every non-zero tap, relative to the anchor."""
+    ck = get_kernel(kernel)
+    a = ck.anchor
+    return [(i - a, j - a, ck.coeffs[i, j].item())
+            for i in range(ck.size) for j in range(ck.size)
+            if ck.coeffs[i, j] != 0]
+
+
+def kernel_padding(kernel):
+    """Border width correlate_padded expects around the image."""
+    ck = get_kernel(kernel)
+    return max(ck.anchor, ck.size - 1 - ck.anchor)
+
+
+def _accumulate(acc, src, c, scratch):
+    """acc += c * src without allocating a temporary."""
+    if c == 1:
+        np.add(acc, src, out=acc)
+    elif c == -1:
+        np.subtract(acc, src, out=acc)
+    else:
+        np.multiply(src, c, out=scratch)
+        np.add(acc, scratch, out=acc)
+
+
+def correlate_padded(padded, kernel, h, w, out=None, pool=None):
+    """Raw kernel sums for an array already padded by kernel_padding() on
+    both spatial axes (axes 0 and 1); trailing axes are carried along.
+
+    Returns int64 for integer kernels (exact), float64 otherwise, written
+    into out when given. Intermediates come from pool (default: the
+    shared BufferPool) and go back to it.
+    """
+    ck = get_kernel(kernel)
+    pool = pool or default_pool
+    # tap berada pada offset -a .. size-1-a dari pixel pusat
+    base = kernel_padding(ck) - ck.anchor
+    rest = padded.shape[2:]
+    dtype = ck.coeffs.dtype
+    shape = (h, w) + rest
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    out[...] = 0
+    scratch = pool.acquire_array(shape, dtype)
+
+    if ck.strategy == "separable":
+        col, row = ck.separable
+        tmp_shape = (padded.shape[0], w) + rest
+        tmp = pool.acquire_array(tmp_shape, dtype)
+        tmp_scratch = pool.acquire_array(tmp_shape, dtype)
+        tmp[...] = 0
+        for j, c in enumerate(row.tolist()):
+            if c:
+                _accumulate(tmp, padded[:, base + j:base + j + w], c,
+                            tmp_scratch)
+        for i, c in enumerate(col.tolist()):
+            if c:
+                _accumulate(out, tmp[base + i:base + i + h], c, scratch)
+        pool.release_array(tmp)
+        pool.release_array(tmp_scratch)
+    else:
+        for i in range(ck.size):
+            for j in range(ck.size):
+                c = ck.coeffs[i, j].item()
+                if c:
+                    _accumulate(out, padded[base + i:base + i + h,
+                                            base + j:base + j + w],
+                                c, scratch)
+    pool.release_array(scratch)
+    return out
+
+
+def correlate_array(arr, kernel, padding="zero", out=None, pool=None):
+    """Raw kernel sums of an H x W (x C) array, before normalisation.
+
+    Returns int64 for integer kernels (exact), float64 otherwise, written
+    into out when given; the padded copy is a pooled buffer.
+    """
+    ck = get_kernel(kernel)
+    pool = pool or default_pool
+    h, w = arr.shape[:2]
+    pad = kernel_padding(ck)
+    padded = pool.acquire_array((h + 2 * pad, w + 2 * pad) + arr.shape[2:],
+                                ck.coeffs.dtype)
+    pad_array(arr, pad, pad, padding, out=padded)
+    total = correlate_padded(padded, ck, h, w, out=out, pool=pool)
+    pool.release_array(padded)
+    return total
+
+
+def finish_array(total, kernel, out=None, pool=None):
+    """Normalise and clamp raw sums exactly like apply_kernel does:
+    divide by the kernel sum when positive, truncate, clamp to 0-255.
+    Returns uint8, written into out when given."""
+    ck = get_kernel(kernel)
+    pool = pool or default_pool
+    if out is None:
+        out = np.empty(total.shape, dtype=np.uint8)
+    buf = pool.acquire_array(total.shape, np.float64)
+    np.copyto(buf, total)
+    if ck.norm != 1:
+        np.divide(buf, ck.norm, out=buf)
+    np.trunc(buf, out=buf)
+    np.clip(buf, 0, 255, out=buf)
+    np.copyto(out, buf, casting="unsafe")
+    pool.release_array(buf)
+    return out
+
+
+def convolve(src, kernel, padding="zero", w=None, h=None, out=None,
+             pool=None):
+    """Vectorized counterpart of main.apply_kernel.
+
+    src is a PIL Image, an array, or a PixelAccess with w and h.
+    Returns a PIL 'L' or 'RGB' image with identical pixel values, written
+    into out when given (out must not be src: ValueError). All numpy
+    intermediates are pooled buffers, so repeated calls on same-size
+    images allocate nothing but the decoded input array.
+    """
+    check_not_source(out, src)
+    ck = get_kernel(kernel)
+    pool = pool or default_pool
+    arr = to_array(src, w, h)
+    h, w = arr.shape[:2]
+    total = pool.acquire_array(arr.shape, ck.coeffs.dtype)
+    result = pool.acquire_array(arr.shape, np.uint8)
+    correlate_array(arr, ck, padding, out=total, pool=pool)
+    finish_array(total, ck, out=result, pool=pool)
+    out = output_image(out, "RGB" if arr.ndim == 3 else "L", (w, h))
+    to_image(result, out=out)
+    pool.release_array(total)
+    pool.release_array(result)
+    return out
+
+
+# kompilasi semua kernel bawaan sekali saat import
+register_kernels(list_kernels)
@@ -0,0 +1,117 @@
+# kernel bawaan; kernel_registry mengompilasinya saat diimpor
+list_kernels = {
+    # LOW-PASS FILTER (SMOOTHING / BLURRING)
+    # Catatan: Kernel "sharpening 1" dan "sharpening 2" pada dasarnya adalah filter low-pass (smoothing)
+    # kecuali dinormalisasi sebagai filter sharpening high-boost.
+    "smoothing_diamond": [
+        [0, 1, 0],
+        [1, 2, 1],
+        [0, 1, 0]
+    ],
+    "smoothing_8_neighbor": [
+        [1, 1, 1],
+        [1, 2, 1],
+        [1, 1, 1]
+    ],
+    "mean": [
+        [1, 1, 1],
+        [1, 1, 1],
+        [1, 1, 1]
+    ],
+    "gaussian": [
+        [1, 2, 1],
+        [2, 4, 2],
+        [1, 2, 1]
+    ],
+
+    # HIGH-PASS FILTER (EDGE DETECTION)
+    "laplacian_4_neighbor": [
+        [0, -1, 0],
+        [-1, 4, -1],
+        [0, -1, 0]
+    ],
+    "laplacian_8_neighbor": [
+        [-1, -1, -1],
+        [-1, 8, -1],
+        [-1, -1, -1]
+    ],
+    "laplacian_LoG": [
+        [1, -2, 1],
+        [-2, 4, -2],
+        [1, -2, 1]
+    ],
+
+    # Penambahan 1: Operator Prewitt (3x3 Gradient)
+    "prewitt_horizontal": [
+        [-1, 0, 1],
+        [-1, 0, 1],
+        [-1, 0, 1]
+    ],
+    "prewitt_vertical": [
+        [-1, -1, -1],
+        [0, 0, 0],
+        [1, 1, 1]
+    ],
+
+    # Penambahan 2: Operator Robert (2x2 Gradient)
+    "robert_diagonal_x": [
+        [1, 0],
+        [0, -1]
+    ],
+    "robert_diagonal_y": [
+        [0, 1],
+        [-1, 0]
+    ],
+
+    "sobel_horizontal": [
+        [-1, -2, -1],
+        [0, 0, 0],
+        [1, 2, 1]
+    ],
+    "sobel_vertical": [
+        [-1, 0, 1],
+        [-2, 0, 2],
+        [-1, 0, 1]
+    ],
+
+    # HIGH-BOOST FILTER (SHARPENING)
+    "sharpen_high_boost": [
+        [0, -1, 0],
+        [-1, 5, -1],
+        [0, -1, 0]
+    ],
+
+    "high boost filter": [
+        [-1, -1, -1],
+        [-1, 8, -1],
+        [-1, -1, -1]
+    ],
+
+    # SPECIAL FILTER: EMBOSS
+    "emboss_top_left": [  # (a) Embossing dari arah kiri atas
+        [-4, -4, 0],
+        [-4, 1, 4],
+        [0, 4, 4]
+    ],
+    "emboss_left": [  # (b) Embossing dari arah kiri
+        [-6, 0, 6],
+        [-6, 1, 6],
+        [-6, 0, 6]
+    ],
+    "emboss_bottom_right": [  # (c) Embossing dari arah kanan bawah
+        [4, 4, 0],
+        [4, 1, -4],
+        [0, -4, -4]
+    ],
+    "emboss_right": [  # (d) Embossing dari arah kanan
+        [6, 0, -6],
+        [6, 1, -6],
+        [6, 0, -6]
+    ],
+    "motion_blur_horizontal": [
+        [1, 1, 1],
+        [0, 0, 0],
+        [0, 0, 0]
+    ]
+
+}
@@ -1,123 +1,16 @@
+from functools import partial
+
 from PIL import Image
 import matplotlib.pyplot as plt
+import numpy as np
 
-
-list_kernels = {
-    # LOW-PASS FILTER (SMOOTHING / BLURRING)
-    # Catatan: Kernel "sharpening 1" dan "sharpening 2" pada dasarnya adalah filter low-pass (smoothing)
-    # kecuali dinormalisasi sebagai filter sharpening high-boost.
-    "smoothing_diamond": [
-        [0, 1, 0],
-        [1, 2, 1],
-        [0, 1, 0]
-    ],
-    "smoothing_8_neighbor": [
-        [1, 1, 1],
-        [1, 2, 1],
-        [1, 1, 1]
-    ],
-    "mean": [
-        [1, 1, 1],
-        [1, 1, 1],
-        [1, 1, 1]
-    ],
-    "gaussian": [
-        [1, 2, 1],
-        [2, 4, 2],
-        [1, 2, 1]
-    ],
-
-    # HIGH-PASS FILTER (EDGE DETECTION)
-    "laplacian_4_neighbor": [
-        [0, -1, 0],
-        [-1, 4, -1],
-        [0, -1, 0]
-    ],
-    "laplacian_8_neighbor": [
-        [-1, -1, -1],
-        [-1, 8, -1],
-        [-1, -1, -1]
-    ],
-    "laplacian_LoG": [
-        [1, -2, 1],
-        [-2, 4, -2],
-        [1, -2, 1]
-    ],
-
-    # Penambahan 1: Operator Prewitt (3x3 Gradient)
-    "prewitt_horizontal": [
-        [-1, 0, 1],
-        [-1, 0, 1],
-        [-1, 0, 1]
-    ],
-    "prewitt_vertical": [
-        [-1, -1, -1],
-        [0, 0, 0],
-        [1, 1, 1]
-    ],
-
-    # Penambahan 2: Operator Robert (2x2 Gradient)
-    "robert_diagonal_x": [
-        [1, 0],
-        [0, -1]
-    ],
-    "robert_diagonal_y": [
-        [0, 1],
-        [-1, 0]
-    ],
-
-    "sobel_horizontal": [
-        [-1, -2, -1],
-        [0, 0, 0],
-        [1, 2, 1]
-    ],
-    "sobel_vertical": [
-        [-1, 0, 1],
-        [-2, 0, 2],
-        [-1, 0, 1]
-    ],
-
-    # HIGH-BOOST FILTER (SHARPENING)
-    "sharpen_high_boost": [
-        [0, -1, 0],
-        [-1, 5, -1],
-        [0, -1, 0]
-    ],
-
-    "high boost filter": [
-        [-1, -1, -1],
-        [-1, 8, -1],
-        [-1, -1, -1]
-    ],
-
-    # SPECIAL FILTER: EMBOSS
-    "emboss_top_left": [  # (a) Embossing dari arah kiri atas
-        [-4, -4, 0],
-        [-4, 1, 4],
-        [0, 4, 4]
-    ],
-    "emboss_left": [  # (b) Embossing dari arah kiri
-        [-6, 0, 6],
-        [-6, 1, 6],
-        [-6, 0, 6]
-    ],
-    "emboss_bottom_right": [  # (c) Embossing dari arah kanan bawah
-        [4, 4, 0],
-        [4, 1, -4],
-        [0, -4, -4]
-    ],
-    "emboss_right": [  # (d) Embossing dari arah kanan
-        [6, 0, -6],
-        [6, 1, -6],
-        [6, 0, -6]
-    ],
-    "motion_blur_horizontal": [
-        [1, 1, 1],
-        [0, 0, 0],
-        [0, 0, 0]
-    ]
-
-}
+from image_array import pixel_access, to_array, to_image
+from recursive_gaussian import gaussian_blur_array
+from kernel_registry import get_kernel, kernel_taps
+from buffer_pool import check_not_source, output_image
+from image_loader import open_image
+from roi import convolve_roi, apply_roi, find_tray_roi
+from backends import get_function
 
 
 def check_neighbor(x, y):
@@ -188,11 +81,17 @@ def get_pixel(px_img, w, h, nx, ny, padding="zero"):
         return 0
 
 
-def apply_kernel(px_img, w, h, kernel, padding="zero"):
+def apply_kernel(px_img, w, h, kernel, padding="zero", out=None):
     """
     Menerapkan kernel konvolusi pada gambar.
-    px_img: PixelAccess object dari PIL
+    px_img: PixelAccess object dari PIL, atau Image (hanya Image yang bisa
+    dicek terhadap out)
+    kernel: nama kernel terdaftar, matriks (list), atau CompiledKernel
+    out: gambar tujuan opsional (mode dan ukuran sama), bukan gambar sumber
+    (ValueError)
     """
+    check_not_source(out, px_img)
+    px_img = pixel_access(px_img)
     # Cek apakah gambar berwarna atau grayscale
     is_color = None
 
@@ -202,17 +101,14 @@ def apply_kernel(px_img, w, h, kernel, padding="zero"):
     except Exception:
         is_color = False
 
-    k_size = len(kernel)
-    offset = k_size // 2
+    # Offset, normalisasi dan koefisien sudah dihitung sekali di registry
+    compiled = get_kernel(kernel)
+    taps = kernel_taps(compiled)
+    k_sum = compiled.norm
 
-    # Hitung sum kernel untuk normalisasi (jika diperlukan)
-    # for row in kernel:
-    #     print(row)
-    k_sum = sum(sum(row) for row in kernel)
-    # print(f"berwarna = {k_sum}")
     if is_color:
         # Buat gambar output berwarna
-        out_img = Image.new("RGB", (w, h))
+        out_img = output_image(out, "RGB", (w, h))
         out_px = out_img.load()
 
         for y in range(h):
@@ -221,24 +117,20 @@ def apply_kernel(px_img, w, h, kernel, padding="zero"):
                 total_g = 0.0
                 total_b = 0.0
 
-                for i in range(-offset, offset + 1):
-                    for j in range(-offset, offset + 1):
-                        nx = x + j
-                        ny = y + i
-                        pv = get_pixel(px_img, w, h, nx, ny, padding)
-                        kval = kernel[i + offset][j + offset]
-
-                        if isinstance(pv, tuple):
-                            total_r += kval * pv[0]
-                            total_g += kval * pv[1]
-                            total_b += kval * pv[2]
-                        else:
-                            total_r += kval * pv
-                            total_g += kval * pv
-                            total_b += kval * pv
+                for dy, dx, kval in taps:
+                    pv = get_pixel(px_img, w, h, x + dx, y + dy, padding)
+
+                    if isinstance(pv, tuple):
+                        total_r += kval * pv[0]
+                        total_g += kval * pv[1]
+                        total_b += kval * pv[2]
+                    else:
+                        total_r += kval * pv
+                        total_g += kval * pv
+                        total_b += kval * pv
 
                 # Normalisasi jika kernel sum > 0 (untuk mean/gaussian)
-                if k_sum > 0:
+                if k_sum != 1:
                     total_r /= k_sum
                     total_g /= k_sum
                     total_b /= k_sum
@@ -252,23 +144,19 @@ def apply_kernel(px_img, w, h, kernel, padding="zero"):
 
     else:
         # Buat gambar output grayscale
-        out_img = Image.new("L", (w, h))
+        out_img = output_image(out, "L", (w, h))
         out_px = out_img.load()
 
         for y in range(h):
             for x in range(w):
                 total = 0.0
 
-                for i in range(-offset, offset + 1):
-                    for j in range(-offset, offset + 1):
-                        nx = x + j
-                        ny = y + i
-                        pv = get_pixel(px_img, w, h, nx, ny, padding)
-                        kval = kernel[i + offset][j + offset]
-                        total += kval * pv
+                for dy, dx, kval in taps:
+                    pv = get_pixel(px_img, w, h, x + dx, y + dy, padding)
+                    total += kval * pv
 
                 # Normalisasi jika kernel sum > 0
-                if k_sum > 0:
+                if k_sum != 1:
                     total /= k_sum
 
                 # Clamp ke range 0-255
@@ -277,15 +165,14 @@ def apply_kernel(px_img, w, h, kernel, padding="zero"):
     return out_img
 
 
-def filter_batas(px_img, w, h, padding="zero"):
+def filter_batas(px_img, w, h, padding="zero", out=None):
     """Filter batas: clamp pixel ke min/max tetangga"""
+    check_not_source(out, px_img)
+    px_img = pixel_access(px_img)
     sample = px_img[0, 0]
     is_color = isinstance(sample, tuple)
 
-    if is_color:
-        out_img = Image.new("RGB", (w, h))
-    else:
-        out_img = Image.new("L", (w, h))
+    out_img = output_image(out, "RGB" if is_color else "L", (w, h))
 
     out_px = out_img.load()
 
@@ -342,15 +229,14 @@ def filter_batas(px_img, w, h, padding="zero"):
     return out_img
 
 
-def filter_batas_min(px_img, w, h, padding="zero"):
+def filter_batas_min(px_img, w, h, padding="zero", out=None):
     """Filter batas min"""
+    check_not_source(out, px_img)
+    px_img = pixel_access(px_img)
     sample = px_img[0, 0]
     is_color = isinstance(sample, tuple)
 
-    if is_color:
-        out_img = Image.new("RGB", (w, h))
-    else:
-        out_img = Image.new("L", (w, h))
+    out_img = output_image(out, "RGB" if is_color else "L", (w, h))
 
     out_px = out_img.load()
 
@@ -397,15 +283,14 @@ def filter_batas_min(px_img, w, h, padding="zero"):
     return out_img
 
 
-def filter_batas_max(px_img, w, h, padding="zero"):
+def filter_batas_max(px_img, w, h, padding="zero", out=None):
     """Filter batas max"""
+    check_not_source(out, px_img)
+    px_img = pixel_access(px_img)
     sample = px_img[0, 0]
     is_color = isinstance(sample, tuple)
 
-    if is_color:
-        out_img = Image.new("RGB", (w, h))
-    else:
-        out_img = Image.new("L", (w, h))
+    out_img = output_image(out, "RGB" if is_color else "L", (w, h))
 
     out_px = out_img.load()
 
@@ -452,15 +337,14 @@ def filter_batas_max(px_img, w, h, padding="zero"):
     return out_img
 
 
-def filter_mean(px_img, w, h, padding="zero"):
+def filter_mean(px_img, w, h, padding="zero", out=None):
     """Filter mean menggunakan 4-tetangga"""
+    check_not_source(out, px_img)
+    px_img = pixel_access(px_img)
     sample = px_img[0, 0]
     is_color = isinstance(sample, tuple)
 
-    if is_color:
-        out_img = Image.new("RGB", (w, h))
-    else:
-        out_img = Image.new("L", (w, h))
+    out_img = output_image(out, "RGB" if is_color else "L", (w, h))
 
     out_px = out_img.load()
 
@@ -505,15 +389,14 @@ def filter_mean(px_img, w, h, padding="zero"):
     return out_img
 
 
-def filter_median(px_img, w, h, padding="zero"):
+def filter_median(px_img, w, h, padding="zero", out=None):
     """Filter median menggunakan 4-tetangga"""
+    check_not_source(out, px_img)
+    px_img = pixel_access(px_img)
     sample = px_img[0, 0]
     is_color = isinstance(sample, tuple)
 
-    if is_color:
-        out_img = Image.new("RGB", (w, h))
-    else:
-        out_img = Image.new("L", (w, h))
+    out_img = output_image(out, "RGB" if is_color else "L", (w, h))
 
     out_px = out_img.load()
 
@@ -558,6 +441,17 @@ def filter_median(px_img, w, h, padding="zero"):
     return out_img
 
 
+def filter_gaussian(px_img, w, h, sigma=1.0, padding="zero", out=None):
+    """Filter Gaussian rekursif (IIR) dengan sigma bebas.
+    Biaya per pixel konstan berapapun nilai sigma. out tidak boleh gambar
+    sumber (ValueError).
+    """
+    check_not_source(out, px_img)
+    arr = to_array(px_img, w, h)
+    blurred = gaussian_blur_array(arr, sigma, padding)
+    return to_image(np.round(blurred, out=blurred), out=out)
+
+
 def show_images_matplotlib(input_img, result_img, filter_name, titles=("Input", "Result")):
     """Menampilkan dua gambar berdampingan menggunakan matplotlib"""
     if isinstance(input_img, str):
@@ -590,6 +484,7 @@ def print_menu():
     print("2.  Smoothing (8-Neighbor)")
     print("3.  Mean")
     print("4.  Gaussian")
+    print("26. Gaussian Rekursif (sigma bebas)")
 
     print("\n[HIGH-PASS FILTERS (EDGE DETECTION)]")
     print("5.  Laplacian (4-Neighbor)")
@@ -646,8 +541,80 @@ def choose_padding():
             print("Pilihan tidak valid! Silakan pilih 1-4.")
 
 
-def process_filter(img, px, w, h, filter_choice, padding):
-    """Memproses gambar dengan filter yang dipilih"""
+def choose_decode_scale():
+    """Memilih skala decode untuk preview cepat"""
+    print("\n[SKALA GAMBAR]")
+    print("1. Penuh (default)")
+    print("2. 1/2")
+    print("4. 1/4")
+    print("8. 1/8 (preview tercepat)")
+
+    while True:
+        choice = input("Pilih skala (1/2/4/8) [default: 1]: ").strip()
+        if choice == "":
+            return 1
+        if choice in ("1", "2", "4", "8"):
+            return int(choice)
+        print("Pilihan tidak valid! Silakan pilih 1, 2, 4 atau 8.")
+
+
+def choose_sigma():
+    """Memilih sigma untuk Gaussian rekursif"""
+    while True:
+        choice = input("Masukkan sigma (>= 0.5) [default: 2.0]: ").strip()
+        if choice == "":
+            return 2.0
+        try:
+            sigma = float(choice)
+        except ValueError:
+            sigma = 0
+        if sigma >= 0.5:
+            return sigma
+        print("Sigma tidak valid! Masukkan angka >= 0.5.")
+
+
+def run_in_roi(filter_fn, img, px, w, h, padding, roi, halo=1):
+    """Menjalankan filter (px, w, h, padding) penuh atau hanya di dalam ROI"""
+    if roi is None:
+        return filter_fn(px, w, h, padding=padding)
+    return apply_roi(
+        lambda crop: filter_fn(crop.load(), crop.width, crop.height,
+                               padding=padding),
+        img, roi, halo=halo)
+
+
+def choose_roi(img):
+    """Memilih area yang diproses (region of interest)"""
+    print("\n[AREA PROSES]")
+    print("1. Seluruh gambar (default)")
+    print("2. ROI otomatis (deteksi baki)")
+    print("3. Persegi manual (x1,y1,x2,y2)")
+
+    while True:
+        choice = input("Pilih area (1-3) [default: 1]: ").strip()
+        if choice == "" or choice == "1":
+            return None
+        elif choice == "2":
+            roi = find_tray_roi(img.convert("L"))
+            print(f"ROI otomatis: {roi}")
+            return roi
+        elif choice == "3":
+            try:
+                x1, y1, x2, y2 = (int(v) for v in
+                                  input("x1,y1,x2,y2: ").split(","))
+                return [(x1, y1, x2, y2)]
+            except ValueError:
+                print("Format tidak valid! Contoh: 10,10,200,150")
+        else:
+            print("Pilihan tidak valid! Silakan pilih 1-3.")
+
+
+def process_filter(img, px, w, h, filter_choice, padding, roi=None):
+    """Memproses gambar dengan filter yang dipilih.
+    roi: daftar persegi (x1, y1, x2, y2) atau mask; di luar ROI tidak diubah.
+    Filter dijalankan lewat backend aktif (backends.set_backend atau
+    variabel lingkungan PCD_BACKEND: "fast" / "reference").
+    """
 
     kernel_filters = {
         1: ("smoothing_diamond", "Kernel - Smoothing Diamond"),
@@ -675,35 +642,54 @@ def process_filter(img, px, w, h, filter_choice, padding):
     if filter_choice in kernel_filters:
         kernel_name, display_name = kernel_filters[filter_choice]
         print(f"\nMemproses dengan {display_name} (padding: {padding})...")
-        result = apply_kernel(
-            px, w, h, list_kernels[kernel_name], padding=padding)
+        if roi is None:
+            # kernel dipanggil lewat nama registry (CompiledKernel)
+            result = get_function("apply_kernel")(
+                px, w, h, kernel_name, padding)
+        else:
+            result = convolve_roi(img, kernel_name, roi, padding=padding)
         show_images_matplotlib(img, result, display_name)
 
     elif filter_choice == 21:
         print(f"\nMemproses dengan Filter Mean...")
-        result = filter_mean(px, w, h, padding=padding)
+        result = run_in_roi(get_function("filter_mean"), img, px, w, h,
+                            padding, roi)
         show_images_matplotlib(img, result, "Filter - Mean (4-neighbors)")
 
     elif filter_choice == 22:
         print(f"\nMemproses dengan Filter Median...")
-        result = filter_median(px, w, h, padding=padding)
+        result = run_in_roi(get_function("filter_median"), img, px, w, h,
+                            padding, roi)
         show_images_matplotlib(img, result, "Filter - Median")
 
     elif filter_choice == 23:
         print(f"\nMemproses dengan Filter Batas...")
-        result = filter_batas(px, w, h, padding=padding)
+        result = run_in_roi(get_function("filter_batas"), img, px, w, h,
+                            padding, roi)
         show_images_matplotlib(img, result, "Filter - Batas")
 
     elif filter_choice == 24:
         print(f"\nMemproses dengan Filter Batas Min...")
-        result = filter_batas_min(px, w, h, padding=padding)
+        result = run_in_roi(get_function("filter_batas_min"), img, px, w, h,
+                            padding, roi)
         show_images_matplotlib(img, result, "Filter - Batas Min")
 
     elif filter_choice == 25:
         print(f"\nMemproses dengan Filter Batas Max...")
-        result = filter_batas_max(px, w, h, padding=padding)
+        result = run_in_roi(get_function("filter_batas_max"), img, px, w, h,
+                            padding, roi)
         show_images_matplotlib(img, result, "Filter - Batas Max")
 
+    elif filter_choice == 26:
+        sigma = choose_sigma()
+        print(f"\nMemproses dengan Gaussian Rekursif (sigma: {sigma}, "
+              f"padding: {padding})...")
+        result = run_in_roi(
+            partial(filter_gaussian, sigma=sigma), img, px, w, h, padding,
+            roi, halo=int(3 * sigma) + 1)
+        show_images_matplotlib(
+            img, result, f"Filter - Gaussian Rekursif (sigma {sigma})")
+
     else:
         print("Pilihan filter tidak valid!")
 
@@ -719,8 +705,10 @@ if __name__ == "__main__":
     if not img_path:
         img_path = "./images/input/noise.jpg"
 
+    scale = choose_decode_scale()
+
     try:
-        img = Image.open(img_path)
+        img = open_image(img_path, scale)
         px = img.load()
         w, h = img.size
 
@@ -731,7 +719,7 @@ if __name__ == "__main__":
         while True:
             print_menu()
 
-            choice = input("\nPilih filter (0-25): ").strip()
+            choice = input("\nPilih filter (0-26): ").strip()
 
             if choice == "0":
                 print("\nTerima kasih! Program selesai.")
@@ -740,15 +728,18 @@ if __name__ == "__main__":
             try:
                 filter_choice = int(choice)
 
-                if filter_choice < 0 or filter_choice > 25:
-                    print("Pilihan tidak valid! Silakan pilih 0-25.")
+                if filter_choice < 0 or filter_choice > 26:
+                    print("Pilihan tidak valid! Silakan pilih 0-26.")
                     continue
 
                 # Pilih padding
                 padding = choose_padding()
 
+                # Pilih area proses
+                roi = choose_roi(img)
+
                 # Proses filter
-                process_filter(img, px, w, h, filter_choice, padding)
+                process_filter(img, px, w, h, filter_choice, padding, roi)
 
                 # Tanya apakah ingin mencoba filter lain
                 again = input(
@@ -758,7 +749,7 @@ if __name__ == "__main__":
                     break
 
             except ValueError:
-                print("Input tidak valid! Masukkan angka 0-25.")
+                print("Input tidak valid! Masukkan angka 0-26.")
             except Exception as e:
                 print(f"Error saat memproses: {e}")
 
@@ -0,0 +1,50 @@
+import numpy as np
+
+from image_array import to_image
+from recursive_gaussian import gaussian_blur_array
+
+
+def downsample(img_gray, method="box"):
+    """Halve a grayscale image.
+
+    method "box" averages each 2x2 block; "gaussian" blurs with sigma 1
+    (recursive filter) and keeps every second pixel. Odd trailing
+    rows/columns are dropped.
+    """
+    arr = np.asarray(img_gray, dtype=np.float64)
+    h2, w2 = arr.shape[0] // 2, arr.shape[1] // 2
+    if h2 == 0 or w2 == 0:
+        raise ValueError("Gambar terlalu kecil untuk diperkecil lagi")
+    if method == "gaussian":
+        small = gaussian_blur_array(arr, 1.0, "replicate")[0:2 * h2:2,
+                                                          0:2 * w2:2]
+    elif method == "box":
+        small = arr[:2 * h2, :2 * w2].reshape(h2, 2, w2, 2).mean(axis=(1, 3))
+    else:
+        raise ValueError(f"Metode pyramid tidak dikenal: {method!r}")
+    return to_image(np.round(small))
+
+
+def build_pyramid(img_gray, levels=2, method="box"):
+    """Return [full, 1/2, 1/4, ...] with levels + 1 grayscale images."""
+    pyramid = [img_gray]
+    for _ in range(levels):
+        pyramid.append(downsample(pyramid[-1], method))
+    return pyramid
+
+
+def scale_area(area, level):
+    """Pixel area at full resolution expressed at pyramid level."""
+    return area / float(4 ** level)
+
+
+def upscale_bbox(box, level, margin, size):
+    """Map an inclusive (x1, y1, x2, y2) box from pyramid level back to
+    full resolution, grown by margin pixels and clipped to size (w, h)."""
+    s = 2 ** level
+    w, h = size
+    x1, y1, x2, y2 = box
+    return (max(0, x1 * s - margin), max(0, y1 * s - margin),
+            min(w - 1, (x2 + 1) * s - 1 + margin),
+            min(h - 1, (y2 + 1) * s - 1 + margin))
+
@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+
+from image_array import pad_array
+
+
+def young_van_vliet_coefficients(sigma):
+    """Return (B, b1, b2, b3) of the Young & van Vliet recursive Gaussian,
+    already divided by b0. Valid for sigma >= 0.5.
+
+    q(sigma) is the 1995 fit. Along each axis the impulse response
+    matches a sampled Gaussian of sigma within 10% of its peak, but the
+    exponential tails of the recursion decay slower, so its standard
+    deviation is larger: about 1.24 at sigma 1, 1.10 * sigma for large
+    sigma. The 2002 q(sigma) of Young, van Vliet & van Ginkel fixes the
+    standard deviation instead and makes the core 25% too narrow at
+    sigma 1, so it is not used.
+    """
+    if sigma < 0.5:
+        raise ValueError("sigma minimal 0.5 untuk Gaussian rekursif")
+    if sigma >= 2.5:
+        q = 0.98711 * sigma - 0.96330
+    else:
+        q = 3.97156 - 4.14554 * math.sqrt(1 - 0.26891 * sigma)
+
+    b0 = 1.57825 + 2.44413 * q + 1.4281 * q ** 2 + 0.422205 * q ** 3
+    b1 = 2.44413 * q + 2.85619 * q ** 2 + 1.26661 * q ** 3
+    b2 = -(1.4281 * q ** 2 + 1.26661 * q ** 3)
+    b3 = 0.422205 * q ** 3
+    B = 1 - (b1 + b2 + b3) / b0
+    return B, b1 / b0, b2 / b0, b3 / b0
+
+
+def _iir_axis(data, axis, coeffs):
+    """Causal + anti-causal third-order recursion along one axis, in place.
+
+    The loop runs over the filtered axis only; every step updates a whole
+    row/column at once, so the cost per pixel does not depend on sigma.
+    """
+    B, b1, b2, b3 = coeffs
+    line = np.moveaxis(data, axis, 0)
+    n = line.shape[0]
+
+    # kondisi awal: sinyal dianggap konstan sebelum sampel pertama
+    p1 = line[0].copy()
+    p2 = p1.copy()
+    p3 = p1.copy()
+    for i in range(n):
+        cur = B * line[i] + b1 * p1 + b2 * p2 + b3 * p3
+        line[i] = cur
+        p3, p2, p1 = p2, p1, cur
+
+    p1 = line[n - 1].copy()
+    p2 = p1.copy()
+    p3 = p1.copy()
+    for i in range(n - 1, -1, -1):
+        cur = B * line[i] + b1 * p1 + b2 * p2 + b3 * p3
+        line[i] = cur
+        p3, p2, p1 = p2, p1, cur
+
+
+def gaussian_blur_array(arr, sigma=1.0, padding="zero"):
+    """Recursive (IIR) Gaussian blur of an H x W or H x W x C array.
+
+    Cost per pixel is constant for any sigma. The border is extended by
+    3*sigma with the same padding rules as main.get_pixel so the filter
+    transient settles before the real image starts. Returns float64.
+    """
+    coeffs = young_van_vliet_coefficients(sigma)
+    h, w = arr.shape[:2]
+    pad = int(math.ceil(3 * sigma))
+    data = pad_array(np.asarray(arr, dtype=np.float64), pad, pad, padding)
+
+    _iir_axis(data, 1, coeffs)
+    _iir_axis(data, 0, coeffs)
+    return data[pad:pad + h, pad:pad + w]
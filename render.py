@@ -0,0 +1,122 @@
+from PIL import Image
+import numpy as np
+
+
+BOX_COLOR = (0, 255, 0)
+CENTER_COLOR = (255, 0, 0)
+CONTOUR_COLOR = (255, 255, 0)
+
+
+def label_palette(n_labels):
+    """Lookup table (n_labels + 1) x 3 of label colours.
+    Label 0 -> black; label l -> (97l, 57l, 37l) mod 256, the same colours
+    labels_to_color_image has always used.
+    """
+    lab = np.arange(n_labels + 1, dtype=np.int64)[:, None]
+    palette = (lab * np.array([97, 57, 37])) % 256
+    palette[0] = 0
+    return palette.astype(np.uint8)
+
+
+def labels_to_color_array(labels):
+    """Colour a label array with one palette gather (H x W x 3 uint8)."""
+    labels = np.asarray(labels)
+    n = int(labels.max()) if labels.size else 0
+    return label_palette(n)[labels]
+
+
+def label_bboxes(labels):
+    """Bounding boxes of every label in one pass over the foreground.
+
+    Returns a dict {label: (x1, y1, x2, y2)} with inclusive corners.
+    """
+    labels = np.asarray(labels)
+    ys, xs = np.nonzero(labels)
+    if ys.size == 0:
+        return {}
+    lab = labels[ys, xs]
+    n = int(lab.max())
+    x1 = np.full(n + 1, labels.shape[1], dtype=np.int64)
+    y1 = np.full(n + 1, labels.shape[0], dtype=np.int64)
+    x2 = np.full(n + 1, -1, dtype=np.int64)
+    y2 = np.full(n + 1, -1, dtype=np.int64)
+    np.minimum.at(x1, lab, xs)
+    np.minimum.at(y1, lab, ys)
+    np.maximum.at(x2, lab, xs)
+    np.maximum.at(y2, lab, ys)
+    present = np.flatnonzero(x2 >= 0)
+    return {int(l): (int(x1[l]), int(y1[l]), int(x2[l]), int(y2[l]))
+            for l in present}
+
+
+def _paint(canvas, region, color):
+    """Assign color to canvas[region]; keeps alpha opaque on RGBA canvases."""
+    if canvas.shape[2] == 4:
+        canvas[region] = tuple(color) + (255,)
+    else:
+        canvas[region] = color
+
+
+def draw_boxes(canvas, boxes, color=BOX_COLOR):
+    """Draw box outlines on an H x W x C array with slice assignments."""
+    h, w = canvas.shape[:2]
+    for x1, y1, x2, y2 in boxes:
+        xa, xb = max(x1, 0), min(x2, w - 1)
+        ya, yb = max(y1, 0), min(y2, h - 1)
+        if xa > xb or ya > yb:
+            continue
+        if 0 <= y1 < h:
+            _paint(canvas, np.s_[y1, xa:xb + 1], color)
+        if 0 <= y2 < h:
+            _paint(canvas, np.s_[y2, xa:xb + 1], color)
+        if 0 <= x1 < w:
+            _paint(canvas, np.s_[ya:yb + 1, x1], color)
+        if 0 <= x2 < w:
+            _paint(canvas, np.s_[ya:yb + 1, x2], color)
+    return canvas
+
+
+def draw_centers(canvas, centers, radius=2, color=CENTER_COLOR):
+    """Draw filled (2*radius+1) squares at each (cx, cy)."""
+    h, w = canvas.shape[:2]
+    for cx, cy in centers:
+        ya, yb = max(cy - radius, 0), min(cy + radius + 1, h)
+        xa, xb = max(cx - radius, 0), min(cx + radius + 1, w)
+        if ya < yb and xa < xb:
+            _paint(canvas, np.s_[ya:yb, xa:xb], color)
+    return canvas
+
+
+def label_contours(labels):
+    """Boolean mask of label pixels that have a 4-neighbour with a
+    different label (including background or the image border)."""
+    labels = np.asarray(labels)
+    edge = np.zeros(labels.shape, dtype=bool)
+    edge[1:, :] |= labels[1:, :] != labels[:-1, :]
+    edge[:-1, :] |= labels[:-1, :] != labels[1:, :]
+    edge[:, 1:] |= labels[:, 1:] != labels[:, :-1]
+    edge[:, :-1] |= labels[:, :-1] != labels[:, 1:]
+    edge[[0, -1], :] = True
+    edge[:, [0, -1]] = True
+    return edge & (labels != 0)
+
+
+def render_overlay(img_color, labels, contours=False, boxes=None):
+    """Overlay bounding boxes (green), centres (red) and optionally label
+    contours (yellow) on the original image. Returns a PIL image.
+    labels may be None when boxes is given and contours is False.
+    """
+    if img_color.mode not in ("RGB", "RGBA"):
+        img_color = img_color.convert("RGB")
+    canvas = np.array(img_color)
+
+    if contours:
+        _paint(canvas, label_contours(np.asarray(labels)), CONTOUR_COLOR)
+
+    if boxes is None:
+        boxes = label_bboxes(labels)
+    draw_boxes(canvas, boxes.values())
+    centers = [((x1 + x2) // 2, (y1 + y2) // 2)
+               for x1, y1, x2, y2 in boxes.values()]
+    draw_centers(canvas, centers)
+    return Image.fromarray(canvas, img_color.mode)
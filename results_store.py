@@ -0,0 +1,211 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from rle import RunLengthLabels
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    started_at  REAL NOT NULL,
+    lot         TEXT,
+    params      TEXT
+);
+CREATE TABLE IF NOT EXISTS images (
+    id           INTEGER PRIMARY KEY,
+    run_id       INTEGER NOT NULL REFERENCES runs(id),
+    path         TEXT NOT NULL,
+    lot          TEXT,
+    width        INTEGER,
+    height       INTEGER,
+    count        INTEGER NOT NULL,
+    processed_at REAL NOT NULL,
+    output_path  TEXT,
+    labels_rle   BLOB
+);
+CREATE TABLE IF NOT EXISTS grains (
+    id           INTEGER PRIMARY KEY,
+    image_id     INTEGER NOT NULL REFERENCES images(id),
+    label        INTEGER NOT NULL,
+    area         INTEGER NOT NULL,
+    cx           REAL,
+    cy           REAL,
+    x1           INTEGER,
+    y1           INTEGER,
+    x2           INTEGER,
+    y2           INTEGER,
+    major_axis   REAL,
+    minor_axis   REAL,
+    orientation  REAL,
+    eccentricity REAL,
+    perimeter    REAL,
+    solidity     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_images_path ON images(path);
+CREATE INDEX IF NOT EXISTS idx_images_lot_time ON images(lot, processed_at);
+CREATE INDEX IF NOT EXISTS idx_images_time ON images(processed_at);
+CREATE INDEX IF NOT EXISTS idx_grains_image ON grains(image_id);
+CREATE INDEX IF NOT EXISTS idx_grains_area ON grains(area);
+"""
+
+_GRAIN_COLUMNS = ("image_id", "label", "area", "cx", "cy", "x1", "y1", "x2",
+                  "y2", "major_axis", "minor_axis", "orientation",
+                  "eccentricity", "perimeter", "solidity")
+
+
+def _grain_row(image_id, p):
+    cx, cy = p["centroid"]
+    x1, y1, x2, y2 = p["bbox"]
+    return (image_id, p["label"], p["area"], cx, cy, x1, y1, x2, y2,
+            p["major_axis"], p["minor_axis"], p["orientation"],
+            p["eccentricity"], p["perimeter"], p["solidity"])
+
+
+class ResultsStore:
+    """Counting results in a local SQLite file (runs -> images -> grains).
+
+    Grain rows are buffered and written with executemany in one
+    transaction per batch_size rows, so storing millions of grains costs
+    a handful of commits rather than one per row. Indexes on image path,
+    lot/time and grain area keep the queries below fast.
+
+    Safe to share between threads (one connection guarded by a lock),
+    e.g. by the write workers of batch_pipeline.
+    """
+
+    def __init__(self, path="./images/output/hasil.sqlite", batch_size=5000):
+        self.path = path
+        self.batch_size = batch_size
+        folder = os.path.dirname(path)
+        if folder and path != ":memory:":
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, lot=None, params=None):
+        """Register a processing run; returns its id."""
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (started_at, lot, params) VALUES (?, ?, ?)",
+                (time.time(), lot, json.dumps(params or {}, default=str)))
+            return cur.lastrowid
+
+    def add_image(self, run_id, path, result, lot=None, output_path=None,
+                  save_runs=False):
+        """Record one image and buffer its grains.
+
+        result is a dict like detect_rice_grains returns (needs "count"
+        and "props"; "gray" or "size" gives the size, "runs" the RLE
+        labels when save_runs). Returns the image id.
+        """
+        size = result["gray"].size if "gray" in result \
+            else result.get("size", (None, None))
+        blob = result["runs"].to_bytes() if save_runs and "runs" in result \
+            else None
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO images (run_id, path, lot, width, height, count, "
+                "processed_at, output_path, labels_rle) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, path, lot, size[0], size[1], result["count"],
+                 time.time(), output_path, blob))
+            image_id = cur.lastrowid
+            self._pending.extend(_grain_row(image_id, p)
+                                 for p in result["props"])
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+        return image_id
+
+    def _flush_locked(self):
+        with self.conn:
+            if self._pending:
+                self.conn.executemany(
+                    f"INSERT INTO grains ({', '.join(_GRAIN_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_GRAIN_COLUMNS))})",
+                    self._pending)
+        self._pending = []
+
+    def flush(self):
+        """Write buffered grains and commit."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ---- query ----
+
+    def _query(self, sql, args=()):
+        """Flush pending grains, then run a read query under the lock."""
+        with self._lock:
+            self._flush_locked()
+            cur = self.conn.execute(sql, args)
+            return cur.fetchall(), [d[0] for d in cur.description]
+
+    def _where_lot(self, lot):
+        return ("WHERE i.lot = ?", (lot,)) if lot is not None else ("", ())
+
+    def size_distribution(self, lot=None, bin_width=100):
+        """Grain area histogram: list of (bin_start, count)."""
+        where, args = self._where_lot(lot)
+        rows, _ = self._query(
+            f"SELECT (g.area / ?) * ? AS bin, COUNT(*) FROM grains g "
+            f"JOIN images i ON i.id = g.image_id {where} "
+            f"GROUP BY bin ORDER BY bin", (bin_width, bin_width) + args)
+        return rows
+
+    def grain_summary(self, lot=None):
+        """Dict with grain count and min/avg/max area (optionally per lot)."""
+        where, args = self._where_lot(lot)
+        rows, _ = self._query(
+            f"SELECT COUNT(*), MIN(g.area), AVG(g.area), MAX(g.area), "
+            f"AVG(g.eccentricity) FROM grains g "
+            f"JOIN images i ON i.id = g.image_id {where}", args)
+        return dict(zip(("grains", "min_area", "mean_area", "max_area",
+                         "mean_eccentricity"), rows[0]))
+
+    def image_counts(self, lot=None, since=None):
+        """List of (path, count, processed_at) ordered by time."""
+        clauses, args = [], []
+        if lot is not None:
+            clauses.append("lot = ?")
+            args.append(lot)
+        if since is not None:
+            clauses.append("processed_at >= ?")
+            args.append(since)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows, _ = self._query(
+            f"SELECT path, count, processed_at FROM images {where} "
+            f"ORDER BY processed_at", args)
+        return rows
+
+    def grains_for_image(self, path):
+        """Grain rows (dicts) of the latest record of an image path."""
+        rows, names = self._query(
+            "SELECT g.* FROM grains g WHERE g.image_id = ("
+            "SELECT id FROM images WHERE path = ? "
+            "ORDER BY processed_at DESC LIMIT 1) ORDER BY g.label", (path,))
+        return [dict(zip(names, row)) for row in rows]
+
+    def load_runs(self, path):
+        """Stored RLE labels of the latest record of an image, or None."""
+        rows, _ = self._query(
+            "SELECT labels_rle FROM images WHERE path = ? "
+            "ORDER BY processed_at DESC LIMIT 1", (path,))
+        if not rows or rows[0][0] is None:
+            return None
+        return RunLengthLabels.from_bytes(rows[0][0])
@@ -0,0 +1,138 @@
+from PIL import Image
+import numpy as np
+
+from histogram import auto_threshold
+from image_array import to_array, to_image, pad_array
+from kernel_registry import (
+    get_kernel, kernel_padding, correlate_padded, finish_array)
+
+
+def roi_mask(roi, size):
+    """Boolean H x W mask of a region of interest.
+
+    roi is a list of inclusive (x1, y1, x2, y2) rectangles, a binary
+    PIL image / array (nonzero = inside), or None for the whole image.
+    """
+    w, h = size
+    if roi is None:
+        return np.ones((h, w), dtype=bool)
+    if isinstance(roi, Image.Image) or isinstance(roi, np.ndarray):
+        mask = np.asarray(roi) != 0
+        if mask.shape != (h, w):
+            raise ValueError(f"Mask ROI berukuran {mask.shape[::-1]}, "
+                             f"harus {(w, h)}")
+        return mask
+    mask = np.zeros((h, w), dtype=bool)
+    for x1, y1, x2, y2 in roi:
+        mask[max(0, y1):min(h, y2 + 1), max(0, x1):min(w, x2 + 1)] = True
+    return mask
+
+
+def mask_bbox(mask, halo=0):
+    """Inclusive bounding box of a mask grown by halo pixels, or None."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    h, w = mask.shape
+    x1, y1 = int(cols[0]), int(rows[0])
+    x2, y2 = int(cols[-1]), int(rows[-1])
+    return (max(0, x1 - halo), max(0, y1 - halo),
+            min(w - 1, x2 + halo), min(h - 1, y2 + halo))
+
+
+def find_tray_roi(img_gray, scale=8, threshold="otsu", margin=16):
+    """Locate the tray with a coarse threshold on a reduced image.
+
+    The image is box-reduced by scale, thresholded (automatic method or
+    fixed level) and the class that touches the image border least is
+    taken as the tray. Returns [(x1, y1, x2, y2)] in full-resolution
+    coordinates grown by margin, or None when nothing is found.
+    """
+    w, h = img_gray.size
+    factor = max(1, min(scale, w, h))
+    small = img_gray.reduce(factor) if factor > 1 else img_gray
+    arr = np.asarray(small)
+    level = auto_threshold(small, threshold) if isinstance(threshold, str) \
+        else threshold
+    bright = arr > level
+
+    border = np.concatenate([bright[0], bright[-1], bright[:, 0],
+                             bright[:, -1]])
+    tray = ~bright if border.mean() > 0.5 else bright
+    box = mask_bbox(tray)
+    if box is None:
+        return None
+    x1, y1, x2, y2 = box
+    return [(max(0, x1 * factor - margin), max(0, y1 * factor - margin),
+             min(w - 1, (x2 + 1) * factor - 1 + margin),
+             min(h - 1, (y2 + 1) * factor - 1 + margin))]
+
+
+def _combine(result, original, mask, outside):
+    """Keep result inside mask; outside is "keep" (original) or "zero"."""
+    if mask.ndim < result.ndim:
+        mask = mask[..., None]
+    fill = original if outside == "keep" else np.zeros_like(result)
+    return np.where(mask, result, fill)
+
+
+def convolve_roi(src, kernel, roi, padding="zero", outside="keep", w=None,
+                 h=None):
+    """Apply a kernel only inside the ROI; exact for every padding mode.
+
+    The padded image is built once, then only the ROI bounding boxes are
+    convolved. Pixels outside the ROI are left untouched (outside="keep")
+    or set to 0 (outside="zero"). Returns a PIL image.
+    """
+    arr = to_array(src, w, h)
+    ck = get_kernel(kernel)
+    h, w = arr.shape[:2]
+    mask = roi_mask(roi, (w, h))
+    pad = kernel_padding(ck)
+    padded = pad_array(arr, pad, pad, padding)
+    result = arr.copy() if outside == "keep" else np.zeros_like(arr)
+
+    rects = [mask_bbox(mask)] if not isinstance(roi, list) else \
+        [mask_bbox(roi_mask([r], (w, h))) for r in roi]
+    for box in rects:
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        window = padded[y1:y2 + 1 + 2 * pad, x1:x2 + 1 + 2 * pad]
+        total = correlate_padded(window.astype(ck.coeffs.dtype), ck,
+                                 y2 - y1 + 1, x2 - x1 + 1)
+        region = np.s_[y1:y2 + 1, x1:x2 + 1]
+        result[region] = _combine(finish_array(total, ck), result[region],
+                                  mask[region], outside)
+    return to_image(result)
+
+
+def apply_roi(fn, img, roi, halo=1, outside="keep"):
+    """Run an image -> image function only inside the ROI.
+
+    Each ROI box is cropped with a halo of real neighbour pixels
+    (halo >= kernel radius), fn is applied to the crop, and only the
+    ROI pixels are written back. Border handling matches a full-image
+    run except for "wrap" padding at boxes touching the image edge.
+    """
+    w, h = img.size
+    mask = roi_mask(roi, (w, h))
+    base = to_array(img)
+    result = base.copy() if outside == "keep" else np.zeros_like(base)
+
+    rects = [mask_bbox(mask)] if not isinstance(roi, list) else \
+        [mask_bbox(roi_mask([r], (w, h))) for r in roi]
+    for box in rects:
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        cx1, cy1 = max(0, x1 - halo), max(0, y1 - halo)
+        cx2, cy2 = min(w - 1, x2 + halo), min(h - 1, y2 + halo)
+        crop = img.crop((cx1, cy1, cx2 + 1, cy2 + 1))
+        out = to_array(fn(crop))[y1 - cy1:y2 - cy1 + 1,
+                                 x1 - cx1:x2 - cx1 + 1]
+        region = np.s_[y1:y2 + 1, x1:x2 + 1]
+        result[region] = _combine(out, result[region], mask[region],
+                                  outside)
+    return to_image(result)
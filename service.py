@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import importlib
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+
+COUNT_PARAMS = {
+    "threshold": 25,
+    "min_area": 800,
+    "max_area": 9000,
+    "split_touching": False,
+    "blur_sigma": None,
+    "pyramid_level": 0,
+    "decode_scale": 1,
+    "roi": None,
+    "edge_method": "sobel",
+}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large",
+               500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+# ---- sisi worker (proses terpisah) ----
+
+def _init_worker():
+    """Process-pool initializer: import the pipeline (and matplotlib,
+    without a display) and compile the kernels once per worker."""
+    import matplotlib
+    matplotlib.use("Agg")
+    importlib.import_module("count_rice")
+    from kernel_registry import get_kernel
+    for name in ("sobel_h", "sobel_v", "sobel_horizontal", "sobel_vertical"):
+        get_kernel(name)
+
+
+def _count_one(job):
+    from count_rice import load_image, detect_rice_grains
+    from buffer_pool import default_pool
+
+    params = dict(COUNT_PARAMS)
+    params.update(job.get("params", {}))
+    source = job["path"] if "path" in job else io.BytesIO(job["data"])
+    scale = int(params.pop("decode_scale"))
+    img_gray, _ = load_image(source, scale, gray_only=True)
+    params["min_area"] = params["min_area"] / scale ** 2
+    params["max_area"] = params["max_area"] / scale ** 2
+
+    start = time.perf_counter()
+    result = detect_rice_grains(img_gray, verbose=False, **params)
+    # buffer kembali ke pool milik worker untuk request berikutnya
+    default_pool.release_image(result["edges"])
+    default_pool.release_image(result["binary"])
+    return {
+        "count": result["count"],
+        "size": list(img_gray.size),
+        "decode_scale": scale,
+        "compute_ms": round(1000 * (time.perf_counter() - start), 2),
+        "grains": result["props"],
+    }
+
+
+def count_batch(jobs):
+    """Run a batch of count jobs in one worker call; each job is a dict
+    with "path" or "data" (encoded image bytes) and optional "params".
+    Failures are returned per job as {"error": ...}."""
+    results = []
+    for job in jobs:
+        try:
+            results.append(_count_one(job))
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+# ---- sisi server (asyncio) ----
+
+class LatencyStats:
+    """Sliding window of request latencies with percentile summaries."""
+
+    def __init__(self, window=1000):
+        self.samples = deque(maxlen=window)
+        self.total = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.total += 1
+
+    def summary(self):
+        data = sorted(self.samples)
+
+        def pct(p):
+            if not data:
+                return None
+            k = min(len(data) - 1, int(round(p / 100 * (len(data) - 1))))
+            return round(1000 * data[k], 2)
+
+        return {
+            "requests": self.total,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "window": len(data),
+            "latency_ms": {"p50": pct(50), "p90": pct(90), "p99": pct(99),
+                           "max": pct(100)},
+        }
+
+
+class CountService:
+    """HTTP front end over a warm process pool.
+
+    Requests are put on a bounded queue; batchers (one per worker) take
+    up to batch_size requests that arrive within batch_wait seconds and
+    send them to a worker in one call. When the queue is full a request
+    is answered with 503 immediately instead of waiting (back-pressure).
+
+      POST /count   JSON {"path": ..., <params>} or raw image bytes with
+                    params in the query string (?threshold=otsu&...)
+      GET  /stats   latency percentiles, queue depth, counters
+      GET  /health  liveness
+    """
+
+    def __init__(self, workers=2, queue_size=16, batch_size=4,
+                 batch_wait=0.005, max_body=32 * 1024 * 1024):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_body = max_body
+        self.stats = LatencyStats()
+        self.batches = 0
+        self.queue = None
+        self.pool = None
+        self._batchers = []
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.pool = ProcessPoolExecutor(self.workers,
+                                        initializer=_init_worker)
+        # panaskan semua worker sebelum menerima request
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, count_batch,
+                                                    [])
+                               for _ in range(self.workers)])
+        self._batchers = [asyncio.create_task(self._batcher())
+                          for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for task in self._batchers:
+            task.cancel()
+        self.pool.shutdown()
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            jobs = [job for job, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.pool, count_batch,
+                                                     jobs)
+            except Exception as e:
+                results = [{"error": f"{type(e).__name__}: {e}"}] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def submit(self, job):
+        """Queue a count job; returns the result dict, or None when the
+        queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((job, future))
+        except asyncio.QueueFull:
+            return None
+        return await future
+
+    def _parse_job(self, target, headers, body):
+        query = dict(parse_qsl(urlsplit(target).query))
+        if headers.get("content-type", "").startswith("application/json"):
+            payload = json.loads(body or b"{}")
+            if "path" not in payload:
+                raise ValueError("JSON harus berisi 'path'")
+            job = {"path": payload.pop("path")}
+            params = payload
+        else:
+            if not body:
+                raise ValueError("Body kosong: kirim gambar atau JSON")
+            job = {"data": body}
+            params = query
+        job["params"] = {k: _coerce(k, v) for k, v in params.items()
+                         if k in COUNT_PARAMS}
+        return job
+
+    async def _route(self, method, target, headers, body):
+        path = urlsplit(target).path
+        if path == "/health":
+            return 200, {"status": "ok", "workers": self.workers}
+        if path == "/stats":
+            return 200, self.stats.summary() | {
+                "queue": self.queue.qsize(),
+                "queue_size": self.queue_size,
+                "batches": self.batches,
+            }
+        if path != "/count":
+            return 404, {"error": f"Path tidak dikenal: {path}"}
+        if method != "POST":
+            return 405, {"error": "Gunakan POST"}
+
+        try:
+            job = self._parse_job(target, headers, body)
+        except (ValueError, json.JSONDecodeError) as e:
+            return 400, {"error": str(e)}
+        result = await self.submit(job)
+        if result is None:
+            self.stats.rejected += 1
+            return 503, {"error": "Antrean penuh, coba lagi"}
+        if "error" in result:
+            self.stats.errors += 1
+            return 400, result
+        return 200, result
+
+    async def _handle(self, reader, writer):
+        start = time.perf_counter()
+        status, payload = 500, {"error": "Request tidak valid"}
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            method, target, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > self.max_body:
+                status, payload = 413, {"error": "Body terlalu besar"}
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, target, headers,
+                                                    body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload).encode()
+        extra = "Retry-After: 1\r\n" if status == 503 else ""
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n{extra}"
+            f"Connection: close\r\n\r\n".encode() + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+        if status == 200 and urlsplit(target).path == "/count":
+            self.stats.record(time.perf_counter() - start)
+
+
+def _coerce(key, value):
+    """Convert a query-string value to the type of the default param."""
+    if not isinstance(value, str):
+        return value
+    default = COUNT_PARAMS[key]
+    if key == "threshold":
+        return int(value) if value.isdigit() else value
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "ya", "yes")
+    if isinstance(default, int):
+        return int(value)
+    if key == "blur_sigma":
+        return float(value) if value else None
+    return value or None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Layanan HTTP penghitung butir beras dengan worker "
+                    "yang tetap hangat.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int,
+                        default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--queue", type=int, default=16,
+                        help="panjang antrean sebelum request ditolak (503)")
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--batch-wait", type=float, default=0.005,
+                        help="detik menunggu request lain untuk satu batch")
+    args = parser.parse_args()
+
+    async def serve():
+        service = CountService(args.workers, args.queue, args.batch,
+                               args.batch_wait)
+        server = await service.start(args.host, args.port)
+        print(f"Melayani di http://{args.host}:{args.port} "
+              f"({args.workers} worker)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.pool.shutdown()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\nLayanan dihentikan.")
+
+
+if __name__ == "__main__":
+    main()
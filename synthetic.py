@@ -0,0 +1,249 @@
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from rle import RunLengthLabels, row_runs
+
+
+# gambar lebih besar dari ini ditulis sebagai .npy (memmap), bukan PNG
+PNG_MAX_PIXELS = 64 * 1024 * 1024
+
+
+def _ellipse_radius(a, b, phi):
+    """Distance from the centre to the edge of an ellipse along phi
+    (measured from its major axis)."""
+    return a * b / math.hypot(b * math.cos(phi), a * math.sin(phi))
+
+
+def place_grains(width, height, count, length=(40, 70), aspect=(2.5, 4.0),
+                 touching=0.0, seed=None, max_tries=50):
+    """Random grain ellipses for a tray.
+
+    length  : (min, max) major axis in pixels
+    aspect  : (min, max) major / minor axis ratio
+    touching: fraction of grains placed in contact with an earlier grain
+              (they merge into one blob for plain connected components)
+    Other grains do not overlap: their bounding circles are kept apart
+    with a spatial hash, so placement cost does not grow with the image.
+    Returns a list of dicts: cx, cy, a, b (semi-axes), angle (radians),
+    touches (index of the grain it touches, or None).
+    """
+    rng = np.random.default_rng(seed)
+    cell = max(length) + 2
+    grid = {}
+    grains = []
+
+    def neighbours(cx, cy):
+        gx, gy = int(cx // cell), int(cy // cell)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                yield from grid.get((gx + dx, gy + dy), ())
+
+    def free(cx, cy, r, parent):
+        for i in neighbours(cx, cy):
+            if i == parent:
+                continue
+            g = grains[i]
+            if math.hypot(g["cx"] - cx, g["cy"] - cy) < g["a"] + r + 1:
+                return False
+        return True
+
+    for _ in range(count):
+        for _ in range(max_tries):
+            a = rng.uniform(*length) / 2
+            b = a / rng.uniform(*aspect)
+            angle = rng.uniform(0, math.pi)
+            parent = None
+            if grains and rng.random() < touching:
+                # tempel ke butir lain: jarak pusat = jumlah jari-jari
+                # kedua elips pada arah sambungan, dikurangi 1 pixel
+                parent = int(rng.integers(len(grains)))
+                p = grains[parent]
+                theta = rng.uniform(0, 2 * math.pi)
+                d = (_ellipse_radius(p["a"], p["b"], theta - p["angle"]) +
+                     _ellipse_radius(a, b, theta - angle) - 1)
+                cx = p["cx"] + d * math.cos(theta)
+                cy = p["cy"] + d * math.sin(theta)
+            else:
+                cx = rng.uniform(a, width - a)
+                cy = rng.uniform(a, height - a)
+            if not (a <= cx <= width - a and a <= cy <= height - a):
+                continue
+            if free(cx, cy, a, parent):
+                break
+        else:
+            continue
+        grid.setdefault((int(cx // cell), int(cy // cell)), []).append(
+            len(grains))
+        grains.append({"cx": cx, "cy": cy, "a": a, "b": b, "angle": angle,
+                       "touches": parent})
+    return grains
+
+
+def _grain_bbox(g):
+    # kotak pembatas elips yang diputar
+    c, s = math.cos(g["angle"]), math.sin(g["angle"])
+    hx = math.hypot(g["a"] * c, g["b"] * s)
+    hy = math.hypot(g["a"] * s, g["b"] * c)
+    return (int(math.floor(g["cx"] - hx)), int(math.floor(g["cy"] - hy)),
+            int(math.ceil(g["cx"] + hx)), int(math.ceil(g["cy"] + hy)))
+
+
+def render_band(grains, boxes, width, y0, y1, background=40, level=200,
+                noise=6.0, rng=None):
+    """Image rows y0..y1-1 of a tray and their ground-truth labels.
+
+    Each grain is drawn in its own bounding box with a vectorized
+    ellipse test and a soft centre-bright shading; where grains overlap
+    the earlier one keeps the pixel in the labels. Returns (uint8 image,
+    int32 labels), both (y1 - y0) x width.
+    """
+    h = y1 - y0
+    labels = np.zeros((h, width), dtype=np.int32)
+    shade = np.zeros((h, width), dtype=np.float32)
+    hits = np.flatnonzero((boxes[:, 1] < y1) & (boxes[:, 3] >= y0))
+    for i in hits.tolist():
+        g = grains[i]
+        x1, gy1, x2, gy2 = boxes[i]
+        x1, x2 = max(0, x1), min(width - 1, x2)
+        ya, yb = max(y0, gy1), min(y1 - 1, gy2)
+        ys = np.arange(ya, yb + 1, dtype=np.float32)[:, None] - g["cy"]
+        xs = np.arange(x1, x2 + 1, dtype=np.float32)[None, :] - g["cx"]
+        c, s = math.cos(g["angle"]), math.sin(g["angle"])
+        u = (xs * c + ys * s) / g["a"]
+        v = (-xs * s + ys * c) / g["b"]
+        r2 = u * u + v * v
+        inside = r2 <= 1.0
+        region = np.s_[ya - y0:yb - y0 + 1, x1:x2 + 1]
+        free = inside & (labels[region] == 0)
+        labels[region][free] = i + 1
+        np.maximum(shade[region], np.where(inside, 1.0 - 0.35 * r2, 0.0),
+                   out=shade[region])
+
+    img = background + (level - background) * shade
+    if noise and rng is not None:
+        img += rng.normal(0.0, noise, size=img.shape).astype(np.float32)
+    return np.clip(np.round(img), 0, 255).astype(np.uint8), labels
+
+
+def generate_tray(path, width, height, count, length=(40, 70),
+                  aspect=(2.5, 4.0), touching=0.0, noise=6.0, seed=None,
+                  background=40, level=200, band_rows=1024):
+    """Render one synthetic tray and its ground truth next to it.
+
+    Writes <path>.png (or <path>.npy memmap above PNG_MAX_PIXELS),
+    <path>_labels.rle (rle.RunLengthLabels of the grain masks) and
+    <path>.json (true count, parameters and grain ellipses). The image is
+    rendered in horizontal bands, so memory stays bounded by band_rows x
+    width even for gigapixel trays. Returns the metadata dict.
+    """
+    grains = place_grains(width, height, count, length, aspect, touching,
+                          seed)
+    boxes = np.array([_grain_bbox(g) for g in grains],
+                     dtype=np.int64).reshape(-1, 4)
+    big = width * height > PNG_MAX_PIXELS
+    if big:
+        image = np.lib.format.open_memmap(path + ".npy", mode="w+",
+                                          dtype=np.uint8,
+                                          shape=(height, width))
+    else:
+        image = np.empty((height, width), dtype=np.uint8)
+
+    runs = []
+    for band, y0 in enumerate(range(0, height, band_rows)):
+        y1 = min(height, y0 + band_rows)
+        rng = np.random.default_rng([seed or 0, band])
+        pixels, labels = render_band(grains, boxes, width, y0, y1,
+                                     background, level, noise, rng)
+        image[y0:y1] = pixels
+        rows, starts, ends, values = row_runs(labels)
+        runs.append((rows + y0, starts, ends, values))
+
+    if big:
+        image.flush()
+        image_path = path + ".npy"
+    else:
+        image_path = path + ".png"
+        Image.fromarray(image, "L").save(image_path)
+
+    columns = [np.concatenate(c) if runs else [] for c in zip(*runs)]
+    truth = RunLengthLabels((height, width), *columns)
+    truth.save(path + "_labels.rle")
+
+    meta = {
+        "image": os.path.basename(image_path),
+        "labels": os.path.basename(path) + "_labels.rle",
+        "width": width,
+        "height": height,
+        "count": len(grains),
+        "requested": count,
+        "touching_pairs": sum(g["touches"] is not None for g in grains),
+        "params": {"length": list(length), "aspect": list(aspect),
+                   "touching": touching, "noise": noise, "seed": seed,
+                   "background": background, "level": level},
+        "grains": [{k: (round(v, 3) if isinstance(v, float) else v)
+                    for k, v in g.items()} for g in grains],
+    }
+    with open(path + ".json", "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def load_truth(path):
+    """(metadata dict, RunLengthLabels) written by generate_tray."""
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    return meta, RunLengthLabels.load(path + "_labels.rle")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Buat gambar baki beras sintetis beserta ground truth "
+                    "(jumlah butir dan mask).")
+    parser.add_argument("output", help="folder keluaran")
+    parser.add_argument("--trays", type=int, default=1)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--count", type=int, default=150)
+    parser.add_argument("--length", type=float, nargs=2, default=(40, 70),
+                        help="panjang butir min max (pixel)")
+    parser.add_argument("--aspect", type=float, nargs=2, default=(2.5, 4.0))
+    parser.add_argument("--touching", type=float, default=0.0,
+                        help="fraksi butir yang bersentuhan (0-1)")
+    parser.add_argument("--noise", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true",
+                        help="hitung ulang dengan detect_rice_grains dan "
+                             "bandingkan dengan ground truth")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for i in range(args.trays):
+        path = os.path.join(args.output, f"baki_{i:03d}")
+        start = time.perf_counter()
+        meta = generate_tray(path, args.width, args.height, args.count,
+                             tuple(args.length), tuple(args.aspect),
+                             args.touching, args.noise, args.seed + i)
+        print(f"{meta['image']}: {meta['count']} butir "
+              f"({meta['touching_pairs']} bersentuhan), "
+              f"{time.perf_counter() - start:.2f} s")
+
+        if args.check and meta["image"].endswith(".png"):
+            from count_rice import detect_rice_grains
+            areas = [math.pi * g["a"] * g["b"] for g in meta["grains"]]
+            img = Image.open(os.path.join(args.output, meta["image"]))
+            start = time.perf_counter()
+            result = detect_rice_grains(img, "otsu", 0.5 * min(areas),
+                                        1.5 * max(areas), verbose=False,
+                                        edge_method="canny")
+            print(f"  terdeteksi {result['count']} / {meta['count']} "
+                  f"dalam {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import random
+
+import pytest
+
+from backends import OPERATIONS, available_backends
+from verify_backends import verify
+
+
+FAST_BACKENDS = [b for b in available_backends() if b != "reference"]
+
+
+@pytest.mark.parametrize("backend", FAST_BACKENDS)
+@pytest.mark.parametrize("op", OPERATIONS)
+def test_backend_matches_reference(op, backend):
+    result = verify(op, backend, trials=40, rng=random.Random(1234),
+                    max_size=12)
+    assert result["mismatches"] == 0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from batch_filters import (
+    RANK_OPS, apply_kernel_batch, rank_filter_batch, stack_images,
+    unstack_images)
+from image_array import to_array
+from main import (
+    apply_kernel, filter_batas, filter_batas_max, filter_batas_min,
+    filter_mean, filter_median)
+
+
+MAIN_RANK = {"min": filter_batas_min, "max": filter_batas_max,
+             "median": filter_median, "mean": filter_mean,
+             "batas": filter_batas}
+
+
+def images(mode, n=3, w=17, h=11):
+    rng = np.random.default_rng(7)
+    shape = (h, w, 3) if mode == "RGB" else (h, w)
+    return [Image.fromarray(rng.integers(0, 256, shape, dtype=np.uint8),
+                            mode) for _ in range(n)]
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB"])
+@pytest.mark.parametrize("padding", ["zero", "replicate", "reflect", "wrap"])
+@pytest.mark.parametrize("kernel", ["gaussian", "laplacian_LoG",
+                                    "sobel_vertical", "sharpen_high_boost"])
+def test_kernel_batch_equals_per_image(kernel, padding, mode):
+    imgs = images(mode)
+    stack = stack_images(imgs)
+    expected = [to_array(apply_kernel(img, *img.size, kernel, padding))
+                for img in imgs]
+    # anggaran kecil memaksa pemotongan per pita baris
+    for chunk_bytes in (1 << 20, 2000, 1):
+        result = apply_kernel_batch(stack, kernel, padding,
+                                    chunk_bytes=chunk_bytes)
+        for got, want in zip(unstack_images(result), expected):
+            assert (to_array(got) == want).all()
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB"])
+@pytest.mark.parametrize("op", RANK_OPS)
+def test_rank_batch_equals_main_filters(op, mode):
+    imgs = images(mode, w=9, h=7)
+    result = rank_filter_batch(stack_images(imgs), op, chunk_bytes=1)
+    for img, got in zip(imgs, result):
+        want = MAIN_RANK[op](img, *img.size)
+        assert (got == to_array(want)).all()
+
+
+def test_stack_rejects_mixed_sizes():
+    with pytest.raises(ValueError):
+        stack_images(images("L", n=1) + images("L", n=1, w=5))
+    with pytest.raises(ValueError):
+        stack_images([])
+    with pytest.raises(ValueError):
+        rank_filter_batch(stack_images(images("L")), "modus")
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from canny import canny_edge_detection, fill_holes, hysteresis
+from count_rice import detect_rice_grains
+
+
+def step_image(w=40, h=30, col=20):
+    arr = np.full((h, w), 50, dtype=np.uint8)
+    arr[:, col:] = 200
+    return Image.fromarray(arr, "L")
+
+
+def disk(shape, cx, cy, r):
+    yy, xx = np.mgrid[:shape[0], :shape[1]]
+    return (xx - cx) ** 2 + (yy - cy) ** 2 <= r * r
+
+
+def test_step_edge_is_thin_and_in_place():
+    edges = np.asarray(canny_edge_detection(step_image(), 40, 80)) != 0
+    # satu pixel per baris, tepat di batas kolom 19/20
+    assert (edges.sum(axis=1) == 1).all()
+    cols = np.flatnonzero(edges.any(axis=0))
+    assert set(cols.tolist()) <= {19, 20}
+
+
+def test_disk_outline_is_closed_and_fills():
+    shape = (40, 40)
+    arr = np.where(disk(shape, 20, 20, 12), 200, 40).astype(np.uint8)
+    edges = np.asarray(canny_edge_detection(Image.fromarray(arr, "L"),
+                                            40, 80)) != 0
+    filled = fill_holes(edges)
+    # kontur tertutup: bagian dalam lingkaran ikut terisi
+    assert filled[disk(shape, 20, 20, 9)].all()
+    assert not filled[~disk(shape, 20, 20, 14)].any()
+
+
+def test_hysteresis_links_weak_edges_to_strong():
+    thin = np.zeros((10, 12))
+    thin[2, 1:9] = 30          # garis lemah ...
+    thin[2, 9] = 100           # ... yang tersambung ke pixel kuat
+    thin[3, 10] = 30           # tetangga diagonal ikut tersambung
+    thin[7, 2:8] = 30          # garis lemah tanpa pixel kuat
+    edges = hysteresis(thin, 20, 80)
+    assert edges[2, 1:10].all() and edges[3, 10]
+    assert not edges[7].any()
+    assert edges.sum() == 10
+
+
+def test_fill_holes_keeps_open_outlines():
+    ring = disk((30, 30), 15, 15, 10) & ~disk((30, 30), 15, 15, 8)
+    assert fill_holes(ring).sum() == disk((30, 30), 15, 15, 10).sum()
+    ring[15, 22:] = False      # cincin terbuka
+    assert (fill_holes(ring) == ring).all()
+
+
+@pytest.mark.parametrize("method", ["Canny", "cany", ""])
+def test_unknown_edge_method_raises(method):
+    with pytest.raises(ValueError):
+        detect_rice_grains(step_image(), 25, 10, 100, edge_method=method,
+                           verbose=False)
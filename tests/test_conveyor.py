@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conveyor import ConveyorCounter, estimate_shift, row_profile
+from synthetic import generate_tray
+
+
+FRAME_ROWS = 200
+
+
+def belt_frames(tmp_path, seed, step):
+    """A synthetic tray seen through a window sliding over the belt.
+
+    The tray is padded with one empty frame of background on both ends,
+    so every grain passes fully through the view. Content moves down by
+    step rows per frame. Returns (metadata, frames).
+    """
+    meta = generate_tray(str(tmp_path / "sabuk"), 240, 900, 25, seed=seed)
+    strip = np.asarray(Image.open(tmp_path / meta["image"]))
+    strip = np.pad(strip, ((FRAME_ROWS, FRAME_ROWS), (0, 0)),
+                   constant_values=meta["params"]["background"])
+    tops = list(range(strip.shape[0] - FRAME_ROWS, -1, -step))
+    if tops[-1] != 0:
+        tops.append(0)
+    return meta, [Image.fromarray(strip[t:t + FRAME_ROWS].copy(), "L")
+                  for t in tops]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_belt_total_matches_ground_truth(tmp_path, seed):
+    meta, frames = belt_frames(tmp_path, seed, step=37)
+    areas = [math.pi * g["a"] * g["b"] for g in meta["grains"]]
+    counter = ConveyorCounter(25, 0.5 * min(areas), 1.5 * max(areas),
+                              margin=80, max_shift=60)
+    assert counter.run(frames, verbose=False) == meta["count"]
+    # hanya strip baru + margin yang diproses, bukan setiap frame utuh
+    assert counter.rows_processed < counter.rows_seen
+
+
+def test_repeated_frame_adds_nothing(tmp_path):
+    _, frames = belt_frames(tmp_path, 0, step=37)
+    counter = ConveyorCounter(25, 300, 9000, margin=80, max_shift=60)
+    frame = frames[len(frames) // 2]
+    first = counter.process(frame)["total"]
+    assert first > 0
+    for _ in range(3):
+        info = counter.process(frame)
+        assert info["shift"] == 0 and info["total"] == first
+
+
+def test_estimate_shift_recovers_displacement():
+    rng = np.random.default_rng(4)
+    belt = rng.normal(100, 30, 600).cumsum() % 255
+    prev = belt[200:400]
+    for shift in (-45, -7, 0, 12, 60):
+        cur = belt[200 - shift:400 - shift]
+        assert estimate_shift(prev, cur, 80) == shift
+    img = Image.fromarray(np.tile(belt[:50, None], (1, 8)).astype(np.uint8))
+    assert np.allclose(row_profile(img), belt[:50].astype(np.uint8))
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from count_rice import detect_rice_grains
+
+
+INPUT = os.path.join(os.path.dirname(__file__), os.pardir, "images",
+                     "input")
+SAMPLE = os.path.join(INPUT, "beras_2.jpg")
+
+
+def test_blur_leaves_input_untouched():
+    img = Image.open(SAMPLE).convert("L")
+    before = np.asarray(img).copy()
+    counts = [detect_rice_grains(img, 25, 800, 9000, blur_sigma=1.5,
+                                 verbose=False)["count"] for _ in range(2)]
+    assert (np.asarray(img) == before).all()
+    assert counts[0] == counts[1]
+
+
+def test_pyramid_rejects_unsupported_options():
+    img = Image.open(SAMPLE).convert("L")
+    with pytest.raises(ValueError):
+        detect_rice_grains(img, 25, 800, 9000, pyramid_level=1,
+                           edge_method="canny", verbose=False)
+    with pytest.raises(ValueError):
+        detect_rice_grains(img, 25, 800, 9000, pyramid_level=1,
+                           split_touching=True, verbose=False)
+
+
+@pytest.mark.parametrize("name", sorted(os.listdir(INPUT)))
+@pytest.mark.parametrize("threshold", [25, "otsu"])
+def test_pyramid_count_matches_single_scale(name, threshold):
+    img = Image.open(os.path.join(INPUT, name)).convert("L")
+    expected = detect_rice_grains(img, threshold, 800, 9000,
+                                  verbose=False)["count"]
+    for level in (1, 2):
+        result = detect_rice_grains(img, threshold, 800, 9000,
+                                    pyramid_level=level, verbose=False)
+        assert result["count"] == expected
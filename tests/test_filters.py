@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from buffer_pool import BufferPool
+from count_rice import sobel_edge_detection
+from kernel_registry import convolve
+from main import apply_kernel, filter_median
+
+
+def _image(w=12, h=9):
+    rng = np.random.default_rng(0)
+    # copy(): gambar dari fromarray hanya-baca dan disalin saat ditulis
+    return Image.fromarray(rng.integers(0, 256, (h, w), dtype=np.uint8),
+                           "L").copy()
+
+
+def test_out_aliasing_source_is_rejected():
+    img = _image()
+    with pytest.raises(ValueError):
+        apply_kernel(img, *img.size, "gaussian", out=img)
+    with pytest.raises(ValueError):
+        filter_median(img, *img.size, out=img)
+    with pytest.raises(ValueError):
+        convolve(img, "gaussian", out=img)
+    with pytest.raises(ValueError):
+        sobel_edge_detection(img, out=img)
+
+
+def test_image_and_pixel_access_sources_agree():
+    img = _image()
+    out = Image.new("L", img.size)
+    expected = filter_median(img.load(), *img.size)
+    assert filter_median(img, *img.size, out=out) is out
+    assert (np.asarray(out) == np.asarray(expected)).all()
+
+
+def test_out_buffer_matches_fresh_result():
+    img = _image()
+    before = np.asarray(img).copy()
+    out = Image.new("L", img.size)
+    expected = apply_kernel(img.load(), *img.size, "gaussian")
+    assert apply_kernel(img.load(), *img.size, "gaussian", out=out) is out
+    assert (np.asarray(out) == np.asarray(expected)).all()
+    assert (np.asarray(img) == before).all()
+
+
+def test_steady_state_reuses_pooled_arrays():
+    img = _image(40, 30)
+    pool = BufferPool()
+    out = Image.new("L", img.size)
+    first = np.asarray(sobel_edge_detection(img, pool=pool)).copy()
+    convolve(img, "mean", pool=pool)
+    allocations = pool.allocations
+    for _ in range(3):
+        sobel_edge_detection(img, out=out, pool=pool)
+        convolve(img, "mean", out=Image.new("L", img.size), pool=pool)
+    assert pool.allocations == allocations
+    assert (np.asarray(out) == first).all()
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from histogram import (
+    auto_threshold, histogram, threshold_otsu, threshold_percentile,
+    threshold_triangle, tile_histograms)
+
+
+def bimodal(seed=0):
+    rng = np.random.default_rng(seed)
+    low = rng.normal(60, 12, 3000)
+    high = rng.normal(180, 15, 2000)
+    values = np.clip(np.concatenate([low, high]), 0, 255)
+    return values.astype(np.uint8).reshape(50, 100)
+
+
+def brute_force_otsu(arr):
+    """Cut with the largest between-class variance, tried one by one."""
+    values = arr.ravel().astype(np.float64)
+    best, best_t = -1.0, None
+    for t in range(256):
+        a, b = values[values <= t], values[values > t]
+        if a.size == 0 or b.size == 0:
+            continue
+        var = a.size * b.size * (a.mean() - b.mean()) ** 2
+        if var > best * (1 + 1e-12):
+            best, best_t = var, t
+    return best_t
+
+
+def test_otsu_matches_brute_force_on_bimodal():
+    arr = bimodal()
+    t = threshold_otsu(histogram(arr))
+    assert 90 < t < 150
+    assert t == brute_force_otsu(arr)
+    assert auto_threshold(arr, "otsu") == t
+
+
+def test_triangle_cuts_the_long_tail():
+    rng = np.random.default_rng(1)
+    values = np.clip(rng.exponential(25, 20000) + 20, 0, 255)
+    hist = histogram(values.astype(np.uint8).reshape(100, 200))
+    t = threshold_triangle(hist)
+    peak = int(np.argmax(hist))
+    assert peak < t < np.flatnonzero(hist)[-1]
+    # histogram cermin: threshold ikut tercermin
+    assert threshold_triangle(hist[::-1]) == 255 - t
+
+
+@pytest.mark.parametrize("p", [5, 50, 90, 100])
+def test_percentile_is_smallest_level_reaching_share(p):
+    arr = bimodal(2)
+    t = threshold_percentile(histogram(arr), p)
+    values = np.sort(arr.ravel())
+    assert t == values[int(np.ceil(p / 100 * values.size)) - 1]
+    assert auto_threshold(arr, f"percentile:{p}") == t
+
+
+@pytest.mark.parametrize("method", ["otsu", "triangle", "percentile:50"])
+def test_constant_image_has_no_foreground(method):
+    arr = np.full((20, 30), 77, dtype=np.uint8)
+    assert auto_threshold(arr, method) == 77
+    assert threshold_otsu(np.zeros(256)) == 0
+
+
+def test_tile_histograms_match_per_tile_bincount():
+    arr = np.random.default_rng(3).integers(0, 256, (70, 45),
+                                            dtype=np.uint8)
+    tiles = tile_histograms(arr, tile_size=16)
+    assert tiles.shape == (5, 3, 256)
+    for ty in range(5):
+        for tx in range(3):
+            tile = arr[ty * 16:(ty + 1) * 16, tx * 16:(tx + 1) * 16]
+            expected = np.bincount(tile.ravel(), minlength=256)
+            assert (tiles[ty, tx] == expected).all()
+    assert (tiles.sum(axis=(0, 1)) == histogram(arr)).all()
+
+
+def test_invalid_input_rejected():
+    with pytest.raises(ValueError):
+        histogram(np.zeros((4, 4, 3), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        auto_threshold(np.zeros((4, 4), dtype=np.uint8), "mean")
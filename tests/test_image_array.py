@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_array import pad_array, padded_window
+from kernel_registry import convolve
+from main import get_pixel
+
+PADDINGS = ("zero", "replicate", "reflect", "wrap")
+
+
+def _image(w, h):
+    values = (np.arange(w * h, dtype=np.uint8) * 37 + 10).reshape(h, w)
+    return Image.fromarray(values, "L")
+
+
+@pytest.mark.parametrize("padding", PADDINGS)
+@pytest.mark.parametrize("w,h", [(1, 1), (2, 1), (2, 3), (3, 2), (4, 4)])
+def test_pad_array_matches_get_pixel_on_tiny_images(w, h, padding):
+    # radius kernel >= ukuran gambar: indeks bisa keluar dari kedua sisi
+    img = _image(w, h)
+    px = img.load()
+    pad = 4
+    padded = pad_array(np.asarray(img), pad, pad, padding)
+    window = padded_window(np.asarray(img), 0, 0, w - 1, h - 1, pad, padding)
+    expected = np.array([[get_pixel(px, w, h, x, y, padding)
+                          for x in range(-pad, w + pad)]
+                         for y in range(-pad, h + pad)])
+    assert (padded == expected).all()
+    assert (window == expected).all()
+
+
+def test_reflect_narrow_image_wide_kernel():
+    img = _image(2, 3)
+    px = img.load()
+    kernel = [[0] * 5 for _ in range(5)]
+    kernel[2][0] = 1  # satu tap di dx = -2
+    result = convolve(img, kernel, padding="reflect").load()
+    for y in range(3):
+        for x in range(2):
+            assert result[x, y] == get_pixel(px, 2, 3, x - 2, y, "reflect")
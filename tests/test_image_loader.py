@@ -0,0 +1,49 @@
+import math
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from count_rice import load_image, rgb_to_grayscale
+from image_loader import open_image
+
+
+INPUT = os.path.join(os.path.dirname(__file__), os.pardir, "images",
+                     "input")
+JPEG = os.path.join(INPUT, "beras_2.jpg")
+PNG = os.path.join(INPUT, "image.png")
+
+
+@pytest.mark.parametrize("scale", [1, 2, 4, 8])
+def test_jpeg_decodes_at_draft_size(scale):
+    full = Image.open(JPEG)
+    w, h = full.size
+    img = open_image(JPEG, scale)
+    assert img.size == (math.ceil(w / scale), math.ceil(h / scale))
+    # hasil identik dengan decode draft langsung (skala DCT di decoder)
+    direct = Image.open(JPEG)
+    direct.draft(direct.mode, (w // scale, h // scale))
+    assert (np.asarray(img) == np.asarray(direct.convert(img.mode))).all()
+    gray = open_image(JPEG, scale, "L")
+    assert gray.mode == "L" and gray.size == img.size
+
+
+@pytest.mark.parametrize("scale", [2, 4, 8])
+def test_other_formats_are_reduced_after_decode(scale):
+    img = open_image(PNG, scale)
+    assert (np.asarray(img) == np.asarray(Image.open(PNG).reduce(scale))).all()
+
+
+def test_invalid_scale_rejected():
+    with pytest.raises(ValueError):
+        open_image(JPEG, 3)
+
+
+def test_load_image_gray_matches_luminosity_loop():
+    gray, color = load_image(JPEG, 4)
+    assert gray.size == color.size
+    expected = np.asarray(rgb_to_grayscale(color))
+    assert (np.asarray(gray) == expected).all()
+    gray_only, none = load_image(JPEG, 4, gray_only=True)
+    assert none is None and gray_only.size == gray.size
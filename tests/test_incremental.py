@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from count_rice import detect_rice_grains, sobel_edge_detection
+from image_array import to_array
+from incremental import IncrementalFilter, IncrementalRiceCounter
+from kernel_registry import convolve
+
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "images",
+                      "input", "beras_2.jpg")
+
+
+def edits(h, w):
+    """(patch, x, y) edits, the last ones hanging over the image edges."""
+    rng = np.random.default_rng(3)
+    patch = rng.integers(0, 256, size=(40, 50), dtype=np.uint8)
+    return [(patch, 100, 80), (np.zeros((30, 30), np.uint8), 200, 150),
+            (patch, w - 20, h - 15), (patch, -25, -10)]
+
+
+@pytest.mark.parametrize("padding", ["zero", "replicate", "reflect", "wrap"])
+def test_filter_matches_full_rerun(padding):
+    gray = to_array(Image.open(SAMPLE).convert("L"))
+    inc = IncrementalFilter(gray, "gaussian", padding)
+    expected = Image.fromarray(gray.copy(), "L")
+    for patch, x, y in edits(*gray.shape):
+        inc.paste(patch, x, y)
+        # PIL memotong patch di tepi gambar dengan cara yang sama
+        expected.paste(Image.fromarray(patch, "L"), (x, y))
+        inc.refresh()
+    expected = to_array(expected)
+    assert (inc.source == expected).all()
+    full = to_array(convolve(expected, "gaussian", padding))
+    assert (inc.result == full).all()
+
+
+def test_rice_counter_matches_full_rerun():
+    img = Image.open(SAMPLE).convert("L")
+    inc = IncrementalRiceCounter(img, 25, 800, 9000)
+    h, w = inc.source.shape
+    for patch, x, y in edits(h, w):
+        inc.paste(patch, x, y)
+        inc.refresh()
+    edited = Image.fromarray(inc.source.copy(), "L")
+    result = detect_rice_grains(edited, 25, 800, 9000, verbose=False)
+    assert (inc.edges == to_array(sobel_edge_detection(edited))).all()
+    assert inc.count() == result["count"]
+    assert ((inc.labels() > 0) == (result["runs"].to_dense() > 0)).all()
+
+
+def test_paste_outside_image_raises():
+    gray = np.zeros((20, 30), np.uint8)
+    inc = IncrementalFilter(gray, "mean")
+    with pytest.raises(ValueError):
+        inc.paste(np.ones((5, 5), np.uint8), 30, 0)
+    with pytest.raises(ValueError):
+        inc.paste(np.ones((5, 5), np.uint8), -5, 3)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from recursive_gaussian import gaussian_blur_array
+
+
+def impulse_response(sigma, n):
+    x = np.zeros((n, n))
+    x[n // 2, n // 2] = 1.0
+    return gaussian_blur_array(x, sigma, "zero")
+
+
+def sampled_gaussian(sigma, n):
+    i = np.arange(n) - n // 2
+    g = np.exp(-i ** 2 / (2 * sigma ** 2))
+    return g / g.sum()
+
+
+@pytest.mark.parametrize("sigma", [1.0, 1.5, 2.0, 3.0, 5.0])
+def test_impulse_response_matches_sampled_gaussian(sigma):
+    n = int(16 * sigma) | 1
+    response = impulse_response(sigma, n)
+    assert np.isclose(response.sum(), 1.0, atol=1e-3)
+    # terpisah: respons 2D = hasil kali respons tiap sumbu
+    row = response.sum(axis=0)
+    col = response.sum(axis=1)
+    assert np.allclose(response, np.outer(col, row) / response.sum())
+    g = sampled_gaussian(sigma, n)
+    assert np.abs(row - g).max() < 0.1 * g.max()
+    assert np.abs(col - g).max() < 0.1 * g.max()
+
+
+@pytest.mark.parametrize("sigma", [1.0, 2.0, 5.0])
+def test_standard_deviation_deviation_is_bounded(sigma):
+    # ekor rekursi lebih lambat turun (lihat docstring koefisien)
+    n = int(16 * sigma) | 1
+    row = impulse_response(sigma, n).sum(axis=0)
+    i = np.arange(n) - n // 2
+    std = np.sqrt((row * i * i).sum() / row.sum())
+    assert sigma < std < 1.3 * sigma
+
+
+def test_small_sigma_rejected():
+    with pytest.raises(ValueError):
+        gaussian_blur_array(np.zeros((4, 4)), 0.4)
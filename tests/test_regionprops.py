@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from regionprops import fill_grains, region_properties
+from rle import RunLengthLabels
+
+
+def ellipse(shape, cx, cy, a, b, angle):
+    yy, xx = np.mgrid[:shape[0], :shape[1]]
+    c, s = np.cos(angle), np.sin(angle)
+    u = (xx - cx) * c + (yy - cy) * s
+    v = -(xx - cx) * s + (yy - cy) * c
+    return (u / a) ** 2 + (v / b) ** 2 <= 1
+
+
+def brute_force(mask):
+    """Reference descriptors of one boolean mask, pixel by pixel."""
+    ys, xs = np.nonzero(mask)
+    cx, cy = xs.mean(), ys.mean()
+    cov = np.cov(np.stack([xs, ys]), bias=True)
+    lam = np.sort(np.linalg.eigvalsh(cov))[::-1]
+    padded = np.pad(mask, 1)
+    # sisi pixel yang berbatasan dengan latar (termasuk tepi gambar)
+    sides = sum(int((padded & ~np.roll(padded, shift, axis)).sum())
+                for shift, axis in ((1, 0), (-1, 0), (1, 1), (-1, 1)))
+    return {
+        "area": int(mask.sum()),
+        "centroid": (cx, cy),
+        "bbox": (int(xs.min()), int(ys.min()), int(xs.max()),
+                 int(ys.max())),
+        "major_axis": 4 * np.sqrt(lam[0]),
+        "minor_axis": 4 * np.sqrt(lam[1]),
+        "perimeter": sides,
+    }
+
+
+@pytest.mark.parametrize("params", [
+    (20, 15, 12, 5, 0.0),
+    (25, 20, 15, 6, 0.7),
+    (18, 24, 9, 8, -1.2),
+    (6, 4, 7, 3, 0.3),          # terpotong tepi gambar
+])
+def test_props_match_brute_force(params):
+    shape = (40, 50)
+    labels = np.zeros(shape, dtype=np.int32)
+    masks = [ellipse(shape, *params), ellipse(shape, 42, 30, 5, 3, 0.4)]
+    for lab, mask in enumerate(masks, 1):
+        labels[mask & (labels == 0)] = lab
+    props = region_properties(labels)
+    assert [p["label"] for p in props] == [1, 2]
+    for p, lab in zip(props, (1, 2)):
+        ref = brute_force(labels == lab)
+        assert p["area"] == ref["area"]
+        assert p["bbox"] == ref["bbox"]
+        assert p["perimeter"] == ref["perimeter"]
+        assert np.allclose(p["centroid"], ref["centroid"])
+        assert np.isclose(p["major_axis"], ref["major_axis"])
+        assert np.isclose(p["minor_axis"], ref["minor_axis"])
+
+
+def test_props_from_runs_equal_dense():
+    labels = np.zeros((30, 30), dtype=np.int32)
+    labels[ellipse(labels.shape, 14, 15, 10, 4, 0.5)] = 3
+    dense = region_properties(labels, with_solidity=True)
+    runs = region_properties(RunLengthLabels.from_dense(labels),
+                             with_solidity=True)
+    assert dense == runs
+    assert 0.8 < dense[0]["solidity"] <= 1.0
+
+
+def test_fill_grains_fills_closed_and_open_outlines():
+    shape = (40, 60)
+    solid = ellipse(shape, 18, 20, 14, 7, 0.3)
+    inner = ellipse(shape, 18, 20, 12, 5, 0.3)
+    ring = solid & ~inner
+    # busur: hanya separuh atas garis luar
+    arc_solid = ellipse(shape, 45, 20, 12, 6, 0.0)
+    arc = arc_solid & ~ellipse(shape, 45, 20, 10, 4, 0.0)
+    arc[20:, :] = False
+    labels = np.where(ring, 1, np.where(arc, 2, 0))
+    filled = fill_grains(RunLengthLabels.from_dense(labels))
+    grains = {lab: np.zeros(shape, bool) for lab in (1, 2)}
+    for r, s, e, lab in zip(filled.rows, filled.starts, filled.ends,
+                            filled.labels):
+        grains[int(lab)][r, s:e] = True
+    assert (grains[1] == solid).all()
+    assert (grains[2] >= arc).all()
+    assert grains[2].sum() > 2 * arc.sum()
+    assert not grains[2][21:, :].any()
@@ -0,0 +1,95 @@
+import numpy as np
+from PIL import Image
+
+from render import label_bboxes, labels_to_color_array, render_overlay
+from rle import RunLengthLabels
+
+
+def random_labels(seed=0, shape=(30, 40)):
+    """Random blobs, one per 10 x 10 cell so their boxes do not overlap
+    (the old loop let a later box cover an earlier centre)."""
+    rng = np.random.default_rng(seed)
+    labels = np.zeros(shape, dtype=np.int32)
+    lab = 0
+    for cy in range(0, shape[0], 10):
+        for cx in range(0, shape[1], 10):
+            if rng.random() < 0.3:
+                continue
+            lab += 1
+            cell = labels[cy:cy + 9, cx:cx + 9]
+            cell[rng.random(cell.shape) < 0.3] = lab
+    return labels
+
+
+def loop_overlay(img_color, labels):
+    """Per-pixel overlay, as count_rice drew it before vectorisation."""
+    overlay = img_color.copy()
+    px = overlay.load()
+    h, w = labels.shape
+    boxes = {}
+    for y in range(h):
+        for x in range(w):
+            lab = labels[y, x]
+            if lab == 0:
+                continue
+            b = boxes.setdefault(lab, [x, y, x, y])
+            b[0], b[1] = min(b[0], x), min(b[1], y)
+            b[2], b[3] = max(b[2], x), max(b[3], y)
+    for x1, y1, x2, y2 in boxes.values():
+        for x in range(x1, x2 + 1):
+            px[x, y1] = (0, 255, 0)
+            px[x, y2] = (0, 255, 0)
+        for y in range(y1, y2 + 1):
+            px[x1, y] = (0, 255, 0)
+            px[x2, y] = (0, 255, 0)
+        cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+        for dx in range(-2, 3):
+            for dy in range(-2, 3):
+                if 0 <= cx + dx < w and 0 <= cy + dy < h:
+                    px[cx + dx, cy + dy] = (255, 0, 0)
+    return overlay
+
+
+def test_color_array_matches_per_label_colours():
+    labels = random_labels()
+    colors = labels_to_color_array(labels)
+    for lab in range(int(labels.max()) + 1):
+        expected = (0, 0, 0) if lab == 0 else \
+            ((lab * 97) % 256, (lab * 57) % 256, (lab * 37) % 256)
+        assert (colors[labels == lab] == expected).all()
+
+
+def test_bboxes_match_brute_force():
+    labels = random_labels(1)
+    boxes = label_bboxes(labels)
+    for lab in np.unique(labels[labels > 0]):
+        ys, xs = np.nonzero(labels == lab)
+        assert boxes[lab] == (xs.min(), ys.min(), xs.max(), ys.max())
+    assert label_bboxes(np.zeros((3, 3), dtype=np.int32)) == {}
+
+
+def test_overlay_matches_per_pixel_loop():
+    labels = random_labels(2)
+    rng = np.random.default_rng(5)
+    img = Image.fromarray(rng.integers(0, 256, labels.shape + (3,),
+                                       dtype=np.uint8), "RGB")
+    expected = np.asarray(loop_overlay(img, labels))
+    assert (np.asarray(render_overlay(img, labels)) == expected).all()
+    # kotak dari run menghasilkan gambar yang sama tanpa label padat
+    boxes = RunLengthLabels.from_dense(labels).bboxes()
+    assert (np.asarray(render_overlay(img, None, boxes=boxes))
+            == expected).all()
+
+
+def test_contours_mark_only_grain_borders():
+    yy, xx = np.mgrid[:21, :21]
+    labels = ((xx - 10) ** 2 + (yy - 10) ** 2 <= 36).astype(np.int32)
+    img = Image.new("L", (21, 21))
+    out = np.asarray(render_overlay(img, labels, contours=True))
+    yellow = (out == (255, 255, 0)).all(axis=2)
+    inside = (xx - 10) ** 2 + (yy - 10) ** 2 <= 25
+    assert yellow[6, 6] and yellow[14, 14]        # tepi miring lingkaran
+    assert not yellow[inside].any()
+    assert (out[10, 7] == 0).all()                # bagian dalam tetap
+    assert (out[4, 10] == (0, 255, 0)).all()      # kotak menutup kontur
+    assert (out[10, 10] == (255, 0, 0)).all()
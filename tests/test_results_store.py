@@ -0,0 +1,66 @@
+import numpy as np
+
+from regionprops import region_properties
+from results_store import ResultsStore
+from rle import RunLengthLabels
+
+
+def fake_result(areas, width=40):
+    """detect_rice_grains-like dict with one horizontal bar per area."""
+    labels = np.zeros((2 * len(areas) + 1, width), dtype=np.int32)
+    for i, area in enumerate(areas):
+        labels[2 * i, :area] = i + 1
+    runs = RunLengthLabels.from_dense(labels)
+    return {"count": len(areas), "props": region_properties(runs),
+            "runs": runs, "size": (width, labels.shape[0])}
+
+
+def stored_grains(store):
+    return store.conn.execute("SELECT COUNT(*) FROM grains").fetchone()[0]
+
+
+def test_grains_are_written_in_batches():
+    store = ResultsStore(":memory:", batch_size=4)
+    run = store.start_run(lot="A", params={"threshold": 25})
+    store.add_image(run, "a.png", fake_result([5, 12, 30]), lot="A")
+    assert stored_grains(store) == 0          # masih di buffer
+    store.add_image(run, "b.png", fake_result([7, 18]), lot="A")
+    assert stored_grains(store) == 5          # batch penuh: ditulis
+    store.add_image(run, "c.png", fake_result([25]), lot="B")
+    assert stored_grains(store) == 5
+    store.flush()
+    assert stored_grains(store) == 6
+    store.close()
+
+
+def test_summary_and_size_distribution():
+    with ResultsStore(":memory:", batch_size=100) as store:
+        run = store.start_run()
+        store.add_image(run, "a.png", fake_result([5, 12, 30]), lot="A")
+        store.add_image(run, "b.png", fake_result([25]), lot="B")
+        # query membaca grain yang masih di buffer juga
+        summary = store.grain_summary()
+        assert summary["grains"] == 4
+        assert summary["min_area"] == 5 and summary["max_area"] == 30
+        assert summary["mean_area"] == (5 + 12 + 30 + 25) / 4
+        assert store.grain_summary(lot="B")["grains"] == 1
+        assert store.size_distribution(bin_width=10) == \
+            [(0, 1), (10, 1), (20, 1), (30, 1)]
+        assert store.size_distribution(lot="A", bin_width=20) == \
+            [(0, 2), (20, 1)]
+        assert [r[:2] for r in store.image_counts(lot="A")] == [("a.png", 3)]
+        grains = store.grains_for_image("a.png")
+        assert [g["area"] for g in grains] == [5, 12, 30]
+
+
+def test_load_runs_round_trip():
+    with ResultsStore(":memory:") as store:
+        run = store.start_run()
+        result = fake_result([3, 9, 16])
+        store.add_image(run, "a.png", result, save_runs=True)
+        store.add_image(run, "b.png", result)
+        back = store.load_runs("a.png")
+        assert back.shape == result["runs"].shape
+        assert (back.to_dense() == result["runs"].to_dense()).all()
+        assert store.load_runs("b.png") is None
+        assert store.load_runs("missing.png") is None
@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from count_rice import connected_components
+from rle import RunLengthLabels, label_runs, row_runs
+
+
+def random_mask(seed, shape, density):
+    rng = np.random.default_rng(seed)
+    return rng.random(shape) < density
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_label_runs_matches_connected_components(seed):
+    shape = (1 + seed * 7, 3 + seed * 5)
+    mask = random_mask(seed, shape, 0.2 + 0.12 * seed)
+    img = Image.fromarray(np.where(mask, 255, 0).astype(np.uint8), "L")
+    runs, count = label_runs(img)
+    labels, expected = connected_components(img)
+    assert count == expected
+    assert (runs.to_dense() == np.asarray(labels)).all()
+
+
+def test_dense_round_trip_and_descriptors():
+    labels = np.zeros((6, 8), dtype=np.int32)
+    labels[1, 1:4] = 1
+    labels[2, 2:4] = 1
+    labels[4, 5:8] = 2
+    labels[5, 0] = 3
+    runs = RunLengthLabels.from_dense(labels)
+    assert len(runs) == 4 and runs.count == 3
+    assert (runs.to_dense() == labels).all()
+    assert runs.areas() == {1: 5, 2: 3, 3: 1}
+    assert runs.bboxes() == {1: (1, 1, 3, 2), 2: (5, 4, 7, 4),
+                             3: (0, 5, 0, 5)}
+    box, mask = runs.mask(1)
+    assert box == (1, 1, 3, 2)
+    assert (mask == (labels[1:3, 1:4] == 1)).all()
+    kept, n = runs.filter_by_area(2, 4)
+    assert n == 1 and (kept.to_dense() == (labels == 2)).all()
+
+
+@pytest.mark.parametrize("shape", [(30, 40), (3, 70000)])
+def test_bytes_round_trip(shape):
+    runs, _ = label_runs(random_mask(9, shape, 0.4))
+    back = RunLengthLabels.from_bytes(runs.to_bytes())
+    assert back.shape == runs.shape
+    for col in ("rows", "starts", "ends", "labels"):
+        assert (getattr(back, col) == getattr(runs, col)).all()
+
+
+def test_bytes_reject_foreign_data():
+    with pytest.raises(ValueError):
+        RunLengthLabels.from_bytes(b"PNG!" + bytes(20))
+
+
+def test_json_round_trip(tmp_path):
+    runs, _ = label_runs(random_mask(4, (25, 33), 0.45))
+    data = runs.to_json()
+    assert [g["area"] for g in data["grains"]] == \
+        [runs.areas()[g["label"]] for g in data["grains"]]
+    path = tmp_path / "runs.json"
+    runs.save_json(path)
+    back = RunLengthLabels.from_json(path.read_text())
+    assert (back.to_dense() == runs.to_dense()).all()
+    assert (RunLengthLabels.from_json(json.loads(json.dumps(data)))
+            .to_dense() == runs.to_dense()).all()
+
+
+def test_empty_runs_round_trip():
+    runs = RunLengthLabels.from_dense(np.zeros((4, 5), dtype=np.int32))
+    assert len(runs) == 0 and runs.count == 0
+    assert RunLengthLabels.from_bytes(runs.to_bytes()).shape == (4, 5)
+    assert RunLengthLabels.from_json(runs.to_json()).to_dense().sum() == 0
+
+
+def test_row_runs_ends_are_exclusive():
+    rows, starts, ends, values = row_runs(np.array([[0, 2, 2, 0, 3],
+                                                    [1, 0, 0, 0, 0]]))
+    assert rows.tolist() == [0, 0, 1]
+    assert starts.tolist() == [1, 4, 0]
+    assert ends.tolist() == [3, 5, 1]
+    assert values.tolist() == [2, 3, 1]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_array import to_array
+from kernel_registry import convolve, get_kernel, kernel_padding
+from roi import apply_roi, convolve_roi, find_tray_roi, roi_mask
+
+
+RECTS = [(5, 4, 20, 15), (30, 0, 39, 9), (-3, 20, 8, 40)]
+
+
+def gray(w=40, h=30):
+    rng = np.random.default_rng(11)
+    return Image.fromarray(rng.integers(0, 256, (h, w), dtype=np.uint8),
+                           "L")
+
+
+def blob_mask(w=40, h=30):
+    yy, xx = np.mgrid[:h, :w]
+    return ((xx - 22) ** 2 + (yy - 14) ** 2 <= 64).astype(np.uint8) * 255
+
+
+@pytest.mark.parametrize("outside", ["keep", "zero"])
+@pytest.mark.parametrize("roi", [RECTS, blob_mask()], ids=["rects", "mask"])
+@pytest.mark.parametrize("padding", ["zero", "replicate", "reflect"])
+@pytest.mark.parametrize("kernel", ["gaussian", "laplacian_LoG"])
+def test_crop_with_halo_equals_full_image_in_roi(kernel, padding, roi,
+                                                 outside):
+    img = gray()
+    halo = kernel_padding(get_kernel(kernel))
+    full = to_array(convolve(img, kernel, padding))
+    mask = roi_mask(roi, img.size)
+    fill = to_array(img) if outside == "keep" else 0
+    expected = np.where(mask, full, fill)
+
+    got = apply_roi(lambda crop: convolve(crop, kernel, padding), img, roi,
+                    halo=halo, outside=outside)
+    assert (to_array(got) == expected).all()
+    # konvolusi langsung dari padding gambar utuh memberi hasil sama
+    got = convolve_roi(img, kernel, roi, padding, outside)
+    assert (to_array(got) == expected).all()
+
+
+def test_convolve_roi_wrap_padding_is_exact():
+    img = gray()
+    full = to_array(convolve(img, "gaussian", "wrap"))
+    mask = roi_mask(RECTS, img.size)
+    got = to_array(convolve_roi(img, "gaussian", RECTS, "wrap"))
+    assert (got[mask] == full[mask]).all()
+    assert (got[~mask] == to_array(img)[~mask]).all()
+
+
+def test_find_tray_roi_covers_the_tray():
+    arr = np.full((240, 320), 30, dtype=np.uint8)
+    arr[50:190, 70:260] = 200
+    (x1, y1, x2, y2), = find_tray_roi(Image.fromarray(arr, "L"))
+    # margin menutup blok kasar campuran di tepi baki
+    assert x1 <= 70 and y1 <= 50 and x2 >= 259 and y2 >= 189
+    slack = 16 + 8
+    assert x1 >= 70 - slack and y1 >= 50 - slack
+    assert x2 <= 259 + slack and y2 <= 189 + slack
+
+
+def test_mask_roi_must_match_image_size():
+    with pytest.raises(ValueError):
+        roi_mask(np.ones((5, 5)), (6, 5))
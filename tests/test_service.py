@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+
+from count_rice import detect_rice_grains, load_image
+from service import CountService, _coerce, count_batch
+
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "images",
+                      "input", "beras_2.jpg")
+
+
+def test_count_batch_matches_pipeline():
+    img_gray, _ = load_image(SAMPLE, gray_only=True)
+    expected = detect_rice_grains(img_gray, 25, 800, 9000, verbose=False)
+    with open(SAMPLE, "rb") as f:
+        data = f.read()
+    by_path, by_bytes, broken = count_batch([
+        {"path": SAMPLE},
+        {"data": data, "params": {"threshold": 25}},
+        {"data": b"bukan gambar"},
+    ])
+    assert by_path["count"] == by_bytes["count"] == expected["count"]
+    assert by_path["size"] == list(img_gray.size)
+    assert len(by_path["grains"]) == expected["count"]
+    # kegagalan satu job tidak menggagalkan seluruh batch
+    assert set(broken) == {"error"}
+
+
+def test_coerce_query_values():
+    assert _coerce("threshold", "30") == 30
+    assert _coerce("threshold", "otsu") == "otsu"
+    assert _coerce("split_touching", "ya") is True
+    assert _coerce("decode_scale", "2") == 2
+    assert _coerce("blur_sigma", "1.5") == 1.5
+    assert _coerce("blur_sigma", "") is None
+
+
+async def _request(port, method, target, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: x\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_http_count_request():
+    with open(SAMPLE, "rb") as f:
+        data = f.read()
+
+    async def run():
+        service = CountService(workers=1, batch_wait=0)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            health = await _request(port, "GET", "/health")
+            count = await _request(port, "POST", "/count?decode_scale=2",
+                                   data)
+            missing = await _request(port, "GET", "/tidak-ada")
+            stats = await _request(port, "GET", "/stats")
+        finally:
+            await service.close()
+        return health, count, missing, stats
+
+    health, count, missing, stats = asyncio.run(run())
+    assert health == (200, {"status": "ok", "workers": 1})
+    status, body = count
+    assert status == 200 and body["decode_scale"] == 2
+    assert body["count"] == len(body["grains"]) > 0
+    assert missing[0] == 404
+    assert stats[0] == 200 and stats[1]["requests"] == 1
@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from count_rice import detect_rice_grains
+from synthetic import generate_tray, load_truth
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_tray_count_matches_detector(tmp_path, seed):
+    path = str(tmp_path / "baki")
+    meta = generate_tray(path, 500, 400, 30, seed=seed)
+    _, truth = load_truth(path)
+    assert np.unique(truth.labels).size == meta["count"] > 0
+
+    # batas luas seperti pada `synthetic.py --check`
+    areas = [math.pi * g["a"] * g["b"] for g in meta["grains"]]
+    img = Image.open(tmp_path / meta["image"])
+    result = detect_rice_grains(img, "otsu", 0.5 * min(areas),
+                                1.5 * max(areas), verbose=False,
+                                edge_method="canny")
+    assert result["count"] == meta["count"]
+    # setiap butir terdeteksi berpusat di butir asli yang berbeda
+    dense = truth.to_dense()
+    hits = {int(dense[int(round(p["centroid"][1])),
+                      int(round(p["centroid"][0]))])
+            for p in result["props"]}
+    assert len(hits) == meta["count"] and 0 not in hits
+
+
+def test_banded_render_equals_single_band(tmp_path):
+    kwargs = dict(touching=0.3, noise=0, seed=5)
+    whole = generate_tray(str(tmp_path / "a"), 300, 200, 15, **kwargs)
+    banded = generate_tray(str(tmp_path / "b"), 300, 200, 15, band_rows=37,
+                           **kwargs)
+    assert whole == banded | {"image": "a.png", "labels": "a_labels.rle"}
+    assert whole["touching_pairs"] > 0
+    assert (np.asarray(Image.open(tmp_path / "a.png")) ==
+            np.asarray(Image.open(tmp_path / "b.png"))).all()
+    _, truth_a = load_truth(str(tmp_path / "a"))
+    _, truth_b = load_truth(str(tmp_path / "b"))
+    assert (truth_a.to_dense() == truth_b.to_dense()).all()
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from count_rice import detect_rice_grains
+from synthetic import generate_tray, load_truth
+from watershed import split_touching_grains
+
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "images",
+                      "input", "beras_2.jpg")
+
+
+def _ellipse(shape, cx, cy, a, b):
+    ys, xs = np.mgrid[:shape[0], :shape[1]]
+    return ((xs - cx) / a) ** 2 + ((ys - cy) / b) ** 2 <= 1.0
+
+
+def test_separated_grains_stay_whole(tmp_path):
+    path = str(tmp_path / "baki")
+    meta = generate_tray(path, 500, 400, 20, touching=0.0, seed=1)
+    _, truth = load_truth(path)
+    _, count = split_touching_grains(truth.to_dense() > 0)
+    assert count == meta["count"]
+
+
+def test_touching_pair_is_split():
+    mask = _ellipse((60, 120), 35, 30, 30, 12) | _ellipse((60, 120), 88, 30,
+                                                           24, 10)
+    _, count = split_touching_grains(mask)
+    assert count == 2
+
+
+def test_outline_ring_is_filled():
+    ring = _ellipse((60, 100), 50, 30, 40, 15) & ~_ellipse((60, 100), 50, 30,
+                                                           37, 12)
+    labels, count = split_touching_grains(ring)
+    assert count == 1
+    assert np.asarray(labels)[30, 50] == 1
+
+
+def test_all_foreground_mask():
+    labels, count = split_touching_grains(np.ones((20, 30), dtype=bool))
+    assert count == 1
+    assert np.asarray(labels).min() == 1
+
+
+def test_split_keeps_plain_count_on_sample():
+    img = Image.open(SAMPLE).convert("L")
+    plain = detect_rice_grains(img, 25, 800, 9000, verbose=False)
+    split = detect_rice_grains(img, 25, 800, 9000, split_touching=True,
+                               verbose=False)
+    assert split["count"] == plain["count"] == 6
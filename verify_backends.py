@@ -0,0 +1,174 @@
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from backends import OPERATIONS, available_backends, get_function
+from image_array import to_array
+from kernels import list_kernels
+
+
+PADDINGS = ("zero", "replicate", "reflect", "wrap")
+RANK_OPS = ("filter_batas", "filter_batas_min", "filter_batas_max",
+            "filter_mean", "filter_median")
+
+
+def random_size(rng, max_size):
+    """Mostly ordinary sizes, with 1-pixel strips and tiny images mixed in
+    because that is where padding and neighbour rules go wrong."""
+    kind = rng.random()
+    if kind < 0.15:
+        return 1, rng.randint(1, max_size)
+    if kind < 0.3:
+        return rng.randint(1, max_size), 1
+    if kind < 0.45:
+        return rng.randint(1, 3), rng.randint(1, 3)
+    return rng.randint(2, max_size), rng.randint(2, max_size)
+
+
+def random_image(rng, size, mode):
+    w, h = size
+    np_rng = np.random.default_rng(rng.getrandbits(32))
+    if rng.random() < 0.2:
+        # nilai ekstrem memicu clamp 0/255 dan pembagian k_sum
+        values = np_rng.choice([0, 1, 254, 255], size=(h, w, 3))
+    else:
+        values = np_rng.integers(0, 256, size=(h, w, 3))
+    img = Image.fromarray(values.astype(np.uint8), "RGB")
+    return img.convert(mode) if mode != "RGB" else img
+
+
+def random_binary(rng, size):
+    w, h = size
+    np_rng = np.random.default_rng(rng.getrandbits(32))
+    density = rng.random()
+    mask = np_rng.random((h, w)) < density
+    return Image.fromarray((mask * 255).astype(np.uint8), "L")
+
+
+def kernel_cases(rng):
+    """Every list_kernels entry (passed by registry name, as main does)
+    plus random integer kernels of odd and even (2x2 Robert-style)
+    sizes, including zero- and negative-sum."""
+    cases = [(name, name) for name in list_kernels]
+    for size in (1, 2, 3, 4, 5):
+        coeffs = [[rng.randint(-3, 3) for _ in range(size)]
+                  for _ in range(size)]
+        cases.append((f"acak_{size}x{size}", coeffs))
+    return cases
+
+
+def images_equal(a, b):
+    """(equal, detail) for two images or (labels, count) results."""
+    if isinstance(a, tuple):
+        (la, na), (lb, nb) = a, b
+        if na != nb:
+            return False, f"jumlah label {na} != {nb}"
+        a, b = np.asarray(la), np.asarray(lb)
+    else:
+        if a.mode != b.mode or a.size != b.size:
+            return False, (f"mode/ukuran {a.mode}{a.size} != "
+                           f"{b.mode}{b.size}")
+        a, b = to_array(a), to_array(b)
+    diff = np.argwhere(a != b)
+    if diff.size == 0:
+        return True, ""
+    y, x = diff[0][:2]
+    return False, (f"{len(diff)} pixel berbeda, pertama di (x={x}, y={y}): "
+                   f"referensi {a[y, x].tolist()} vs "
+                   f"cepat {b[y, x].tolist()}")
+
+
+def make_cases(op, rng, max_size):
+    """(description, call) for one randomized case of op; call(fn) runs
+    the case with an implementation of op."""
+    size = random_size(rng, max_size)
+    if op == "apply_kernel":
+        name, kernel = rng.choice(kernel_cases(rng))
+        mode = rng.choice(("L", "RGB"))
+        padding = rng.choice(PADDINGS)
+        img = random_image(rng, size, mode)
+        return (f"{name} {mode} {size} {padding}",
+                lambda f: f(img.load(), *size, kernel, padding))
+    if op in RANK_OPS:
+        mode = rng.choice(("L", "RGB"))
+        padding = rng.choice(PADDINGS)
+        img = random_image(rng, size, mode)
+        return (f"{mode} {size} {padding}",
+                lambda f: f(img.load(), *size, padding=padding))
+    if op == "sobel_edge_detection":
+        img = random_image(rng, size, "L")
+        return f"L {size}", lambda f: f(img)
+    if op == "threshold_image":
+        img = random_image(rng, size, "L")
+        level = rng.randint(0, 255)
+        return f"L {size} t={level}", lambda f: f(img, level)
+    if op == "connected_components":
+        img = random_binary(rng, size)
+        return f"biner {size}", lambda f: f(img)
+    raise ValueError(f"Operasi tidak dikenal: {op}")
+
+
+def verify(op, fast, trials, rng, max_size, show=3):
+    """Run trials random cases of op; returns a summary dict."""
+    ref_fn = get_function(op, "reference")
+    fast_fn = get_function(op, fast)
+    t_ref = t_fast = 0.0
+    mismatches = []
+    for _ in range(trials):
+        desc, call = make_cases(op, rng, max_size)
+        start = time.perf_counter()
+        expected = call(ref_fn)
+        t_ref += time.perf_counter() - start
+        start = time.perf_counter()
+        got = call(fast_fn)
+        t_fast += time.perf_counter() - start
+        equal, detail = images_equal(expected, got)
+        if not equal:
+            mismatches.append(f"{desc}: {detail}")
+    for line in mismatches[:show]:
+        print(f"  ✗ {op} {line}")
+    return {"op": op, "cases": trials, "mismatches": len(mismatches),
+            "ref_s": t_ref, "fast_s": t_fast,
+            "speedup": t_ref / t_fast if t_fast > 0 else float("inf")}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bandingkan backend cepat dengan backend referensi "
+                    "(Python murni) pada gambar acak.")
+    parser.add_argument("--backend", default="fast",
+                        choices=[b for b in available_backends()
+                                 if b != "reference"])
+    parser.add_argument("--ops", nargs="*", default=list(OPERATIONS),
+                        choices=OPERATIONS)
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--max-size", type=int, default=48)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2**31)
+    print(f"Seed: {seed} (ulangi dengan --seed {seed})")
+    rng = random.Random(seed)
+
+    rows = [verify(op, args.backend, args.trials, rng, args.max_size)
+            for op in args.ops]
+
+    print(f"\n{'Operasi':<22} {'kasus':>5} {'beda':>5} {'ref(s)':>8} "
+          f"{'cepat(s)':>8} {'speedup':>8}")
+    for r in rows:
+        print(f"{r['op']:<22} {r['cases']:>5} {r['mismatches']:>5} "
+              f"{r['ref_s']:>8.3f} {r['fast_s']:>8.3f} "
+              f"{r['speedup']:>7.1f}x")
+    failed = sum(r["mismatches"] for r in rows)
+    if failed:
+        print(f"\nGAGAL: {failed} kasus berbeda dari referensi")
+        sys.exit(1)
+    print("\nSemua kasus identik dengan referensi.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+from collections import deque
+
+import numpy as np
+
+from canny import fill_holes
+from rle import label_runs
+
+
+INF = float("inf")
+
+
+def _edt_1d(f, n):
+    """Squared 1D distance transform of sampled function f (Felzenszwalb &
+    Huttenlocher). Runs in O(n) using the lower envelope of parabolas.
+    """
+    v = []  # lokasi parabola pada lower envelope
+    z = []  # batas kiri tiap parabola
+    for q in range(n):
+        fq = f[q]
+        if fq == INF:
+            continue
+        if not v:
+            v.append(q)
+            z.append(-INF)
+            continue
+        while True:
+            p = v[-1]
+            s = ((fq + q * q) - (f[p] + p * p)) / (2 * q - 2 * p)
+            if s <= z[-1]:
+                v.pop()
+                z.pop()
+                continue
+            break
+        v.append(q)
+        z.append(s)
+    if not v:
+        return [INF] * n
+    z.append(INF)
+
+    d = [0.0] * n
+    k = 0
+    for q in range(n):
+        while z[k + 1] < q:
+            k += 1
+        p = v[k]
+        d[q] = (q - p) * (q - p) + f[p]
+    return d
+
+
+def distance_transform_edt(mask):
+    """Exact Euclidean distance transform of a binary mask.
+
+    Every nonzero pixel receives its distance to the nearest zero pixel,
+    zero pixels get 0. Two separable 1D passes, O(N) overall. Returns a
+    float64 array (H x W); without any zero pixel every distance is inf,
+    so pad the mask when the image border should count as background.
+    """
+    mask = np.asarray(mask) != 0
+    h, w = mask.shape
+    if not mask.any():
+        return np.zeros((h, w), dtype=np.float64)
+
+    # Tahap 1: jarak vertikal ke background terdekat, per kolom (vektor)
+    big = h + w
+    col = np.where(mask, big, 0).astype(np.float64)
+    for y in range(1, h):
+        col[y] = np.minimum(col[y], col[y - 1] + 1)
+    for y in range(h - 2, -1, -1):
+        col[y] = np.minimum(col[y], col[y + 1] + 1)
+    g = col * col
+    g[col >= big] = INF
+
+    # Tahap 2: lower envelope per baris, hanya untuk baris yang berisi objek
+    out = np.zeros((h, w), dtype=np.float64)
+    for y in np.flatnonzero(mask.any(axis=1)):
+        out[y] = _edt_1d(g[y].tolist(), w)
+    return np.sqrt(out)
+
+
+def _neighbors(connectivity):
+    if connectivity == 4:
+        return ((0, -1), (-1, 0), (1, 0), (0, 1))
+    return ((-1, -1), (0, -1), (1, -1), (-1, 0),
+            (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def _label_seeds(seed_mask, connectivity=8):
+    """Label connected regions of a boolean seed mask with a BFS."""
+    h, w = seed_mask.shape
+    labels = np.zeros((h, w), dtype=np.int32)
+    offsets = _neighbors(connectivity)
+    current = 0
+    for y, x in zip(*np.nonzero(seed_mask)):
+        if labels[y, x]:
+            continue
+        current += 1
+        labels[y, x] = current
+        queue = deque([(y, x)])
+        while queue:
+            cy, cx = queue.popleft()
+            for dx, dy in offsets:
+                ny, nx = cy + dy, cx + dx
+                if (0 <= ny < h and 0 <= nx < w and seed_mask[ny, nx]
+                        and not labels[ny, nx]):
+                    labels[ny, nx] = current
+                    queue.append((ny, nx))
+    return labels, current
+
+
+def peak_dynamics(dist):
+    """Regional maxima of a distance map and their dynamics.
+
+    Pixels are added from the highest distance down and joined to their
+    already added 8-neighbours with union-find. When two regions meet,
+    the one with the lower peak dies; its dynamic is its peak minus the
+    level of the meeting point (the saddle). The highest peak of every
+    connected component never dies and gets an infinite dynamic.
+    Returns a list of (y, x, peak, dynamic).
+    """
+    h, w = dist.shape
+    stride = w + 2
+    # bingkai -1 di sekeliling: tetangga di luar gambar tidak pernah aktif
+    padded = np.full((h + 2, stride), -1.0)
+    padded[1:-1, 1:-1] = dist
+    flat = padded.ravel()
+    order = np.flatnonzero(flat > 0)
+    order = order[np.argsort(-flat[order], kind="stable")].tolist()
+    values = flat.tolist()
+    offsets = (-stride - 1, -stride, -stride + 1, -1, 1,
+               stride - 1, stride, stride + 1)
+
+    parent = {}
+    peak_of = {}     # akar -> indeks pixel puncak region
+    events = []
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for p in order:
+        level = values[p]
+        roots = {find(q) for q in (p + o for o in offsets) if q in parent}
+        if not roots:
+            parent[p] = p
+            peak_of[p] = p
+            continue
+        # aturan "yang tua menang": region dengan puncak tertinggi bertahan
+        keep = max(roots, key=lambda r: values[peak_of[r]])
+        for r in roots:
+            if r != keep:
+                events.append((peak_of[r], values[peak_of[r]] - level))
+                parent[r] = keep
+        parent[p] = keep
+
+    events.extend((peak_of[r], INF) for r in parent if parent[r] == r)
+    result = []
+    for idx, dynamic in events:
+        y, x = divmod(idx, stride)
+        result.append((y - 1, x - 1, values[idx], dynamic))
+    return result
+
+
+def find_markers(dist, h=None, min_height=1.0, h_ratio=0.25):
+    """Markers at the maxima of a distance map whose dynamic is >= h.
+
+    A long grain has several nearly equal maxima along its ridge, but
+    the dips between them are shallow; two touching grains are joined
+    by a narrow neck, so the smaller one has a dynamic close to its own
+    half-width. h=None takes h_ratio times the median peak of the
+    connected components (the typical grain half-width), at least 2
+    pixels, below which the dips are rounding noise of the distance map.
+    Maxima lower than min_height are ignored. Returns (markers, count)
+    with one seed pixel per marker.
+    """
+    peaks = peak_dynamics(dist)
+    if h is None:
+        tops = [v for _, _, v, dyn in peaks if dyn == INF]
+        h = max(2.0, h_ratio * float(np.median(tops))) if tops else 2.0
+    markers = np.zeros(dist.shape, dtype=np.int32)
+    count = 0
+    for y, x, value, dynamic in peaks:
+        if dynamic >= h and value >= min_height:
+            count += 1
+            markers[y, x] = count
+    return markers, count
+
+
+def watershed(elevation, markers, mask=None, connectivity=4):
+    """Marker-controlled watershed by priority flooding.
+
+    elevation : 2D uint8 array (0..255), lower values are flooded first
+    markers   : 2D int array, > 0 for seed pixels
+    mask      : optional boolean array restricting the flooded area
+    Uses 256 FIFO buckets instead of a heap, so each pixel is pushed and
+    popped once: O(N + 256).
+    """
+    elevation = np.asarray(elevation)
+    if elevation.dtype != np.uint8:
+        raise ValueError("Elevation untuk watershed harus uint8 (0-255)")
+    h, w = elevation.shape
+    labels = np.array(markers, dtype=np.int32, copy=True)
+    if mask is None:
+        mask = np.ones((h, w), dtype=bool)
+    else:
+        mask = np.asarray(mask, dtype=bool)
+    labels[~mask] = 0
+
+    elev = elevation.tolist()
+    lab = labels.tolist()
+    allowed = mask.tolist()
+    offsets = _neighbors(connectivity)
+
+    buckets = [deque() for _ in range(256)]
+    queued = [[False] * w for _ in range(h)]
+    for y, x in zip(*np.nonzero(labels)):
+        y, x = int(y), int(x)
+        queued[y][x] = True
+        buckets[elev[y][x]].append((y, x))
+
+    level = 0
+    while level < 256:
+        bucket = buckets[level]
+        if not bucket:
+            level += 1
+            continue
+        y, x = bucket.popleft()
+        current = lab[y][x]
+        for dx, dy in offsets:
+            ny, nx = y + dy, x + dx
+            if not (0 <= ny < h and 0 <= nx < w):
+                continue
+            if queued[ny][nx] or not allowed[ny][nx]:
+                continue
+            queued[ny][nx] = True
+            lab[ny][nx] = current
+            # ketinggian tidak pernah turun di bawah level banjir saat ini
+            buckets[max(level, elev[ny][nx])].append((ny, nx))
+
+    return np.array(lab, dtype=np.int32)
+
+
+def split_touching_grains(binary_img, h=None, min_height=1.0, fill=True,
+                          max_area=None):
+    """Split merged blobs of a binary image with distance-transform
+    watershed. Returns (labels, label_count) in the same format as
+    count_rice.connected_components (2D list, labels 1..n).
+
+    fill: fill enclosed holes first, so the closed outline rings of the
+    Sobel threshold become solid grains before the distance transform.
+    h, min_height: marker selection, see find_markers.
+    max_area: when given, only components larger than this (blobs too big
+    for one grain) are split; smaller ones keep a single label, so open
+    edge arcs and lone grains are never cut into pieces.
+    """
+    mask = np.asarray(binary_img) != 0
+    if fill:
+        mask = fill_holes(mask)
+    whole = None
+    if max_area is not None:
+        runs, _ = label_runs(mask)
+        small = [lab for lab, a in runs.areas().items() if a <= max_area]
+        whole = runs.select(small).to_dense()
+        mask = mask & (whole == 0)
+    # bingkai latar 1 pixel: mask yang penuh tetap punya jarak berhingga
+    dist = distance_transform_edt(np.pad(mask, 1))[1:-1, 1:-1]
+    peak = dist.max()
+    if peak > 0:
+        markers, _ = find_markers(dist, h, min_height)
+        # puncak jarak -> lembah elevasi, banjir dimulai dari pusat butir
+        elevation = (255 - np.round(dist / peak * 255)).astype(np.uint8)
+        labels = watershed(elevation, markers, mask)
+    else:
+        labels = np.zeros(mask.shape, dtype=np.int32)
+    if whole is not None:
+        labels = np.where(whole > 0, whole + labels.max(), labels)
+
+    # blob tanpa marker (lebih kecil dari min_height) tetap dihitung sebagai
+    # satu komponen sendiri
+    orphan = mask & (labels == 0)
+    if orphan.any():
+        extra, _ = _label_seeds(orphan, connectivity=4)
+        labels[orphan] = extra[orphan] + labels.max()
+
+    # label berurutan 1..n
+    used = np.unique(labels[labels > 0])
+    if used.size == 0:
+        return np.zeros(labels.shape, dtype=np.int32).tolist(), 0
+    remap = np.zeros(labels.max() + 1, dtype=np.int32)
+    remap[used] = np.arange(1, used.size + 1)
+    return remap[labels].tolist(), int(used.size)